@@ -0,0 +1,52 @@
+# -----------------------------------------------------------------------------------------------------
+# @ Import Section
+# -----------------------------------------------------------------------------------------------------
+import os
+import random
+import sys
+from typing import List, Union
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import dna_analysis
+from bench_regex_engine import best_of
+from dna_analysis import is_mutant, is_mutant_batch
+
+# -----------------------------------------------------------------------------------------------------
+# @ Helper Function Section
+# -----------------------------------------------------------------------------------------------------
+def analyze_one_by_one(dna_list: List[List[str]]) -> List[Union[bool, ValueError]]:
+    """
+    The loop is_mutant_batch replaces: one is_mutant call per table.
+
+    :param dna_list: Tables as lists of row strings.
+    :return: The verdict, or the ValueError raised, of each table.
+    """
+    results = []
+    for dna in dna_list:
+        try:
+            results.append(is_mutant(dna))
+        except ValueError as ve:
+            results.append(ve)
+    return results
+
+# -----------------------------------------------------------------------------------------------------
+# @ Main Function Section
+# -----------------------------------------------------------------------------------------------------
+def main_benchmark(counts=(100, 1000, 10000), size: int = 6):
+    if dna_analysis.np is None:
+        print("NumPy is required for the vectorized batch")
+        return
+    random.seed(7)
+    print(f"{'tables':>7} {'is_mutant loop (s)':>19} {'is_mutant_batch (s)':>20} {'speedup':>9}")
+    for count in counts:
+        dna_list = [[''.join(random.choice('ATCG') for _ in range(size)) for _ in range(size)] for _ in range(count)]
+        assert is_mutant_batch(dna_list) == analyze_one_by_one(dna_list)
+        loop = best_of(lambda: analyze_one_by_one(dna_list), repeat=3)
+        batch = best_of(lambda: is_mutant_batch(dna_list), repeat=3)
+        print(f"{count:>7} {loop:>19.6f} {batch:>20.6f} {loop / batch:>8.1f}x")
+
+# -----------------------------------------------------------------------------------------------------
+# @ Entry Point Section
+# -----------------------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    main_benchmark()
@@ -0,0 +1,36 @@
+# -----------------------------------------------------------------------------------------------------
+# @ Import Section
+# -----------------------------------------------------------------------------------------------------
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from bench_regex_engine import best_of, human_dna
+from engines import get_engine
+from engines.codegen_engine import compile_detector
+
+# -----------------------------------------------------------------------------------------------------
+# @ Main Function Section
+# -----------------------------------------------------------------------------------------------------
+def main_benchmark(sizes=(6, 10, 20, 50)):
+    python = get_engine("python")
+    print(f"{'N':>4} {'compile (s)':>12} {'python engine (s)':>20} {'codegen (s)':>12} {'speedup':>9}")
+    for size in sizes:
+        dna = human_dna(size)
+        flat = ''.join(dna).encode('ascii')
+
+        start = time.perf_counter()
+        detect = compile_detector(size)
+        compile_time = time.perf_counter() - start
+
+        number = max(1, 20000 // (size * size))
+        reference = best_of(lambda: python(flat, size), number=number)
+        generated = best_of(lambda: detect(flat), number=number)
+        print(f"{size:>4} {compile_time:>12.4f} {reference:>20.6f} {generated:>12.6f} {reference / generated:>8.1f}x")
+
+# -----------------------------------------------------------------------------------------------------
+# @ Entry Point Section
+# -----------------------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    main_benchmark()
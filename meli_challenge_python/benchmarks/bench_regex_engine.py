@@ -0,0 +1,50 @@
+# -----------------------------------------------------------------------------------------------------
+# @ Import Section
+# -----------------------------------------------------------------------------------------------------
+import os
+import sys
+import timeit
+from typing import List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import main
+from engines import get_engine
+from engines.regex_engine import detect
+
+# -----------------------------------------------------------------------------------------------------
+# @ Helper Function Section
+# -----------------------------------------------------------------------------------------------------
+def human_dna(size: int) -> List[str]:
+    """
+    Builds an NxN matrix without any run of four, so every engine has to scan all of it.
+
+    :param size: Size of the square matrix.
+    :return: List of strings representing each row.
+    """
+    pattern = "ATCG" * (size // 4 + 2)
+    return [pattern[(i * 2) % 4:(i * 2) % 4 + size] if i % 2 == 0 else pattern[i % 4 + 1:i % 4 + 1 + size]
+            for i in range(size)]
+
+def best_of(func, repeat: int = 5, number: int = 1) -> float:
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number
+
+# -----------------------------------------------------------------------------------------------------
+# @ Main Function Section
+# -----------------------------------------------------------------------------------------------------
+def main_benchmark(sizes=(6, 20, 100, 500, 1000)):
+    python = get_engine("python")
+    print(f"{'N':>6} {'python engine (s)':>20} {'regex (s)':>12} {'speedup':>9}")
+    for size in sizes:
+        dna = human_dna(size)
+        flat = ''.join(dna).encode('ascii')
+        assert main.is_mutant(dna, engine="python") is False
+        number = max(1, 2000 // (size * size))
+        reference = best_of(lambda: python(flat, size), number=number)
+        regex = best_of(lambda: detect(flat, size), number=number)
+        print(f"{size:>6} {reference:>20.6f} {regex:>12.6f} {reference / regex:>8.1f}x")
+
+# -----------------------------------------------------------------------------------------------------
+# @ Entry Point Section
+# -----------------------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    main_benchmark()
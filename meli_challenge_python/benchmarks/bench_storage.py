@@ -0,0 +1,80 @@
+# -----------------------------------------------------------------------------------------------------
+# @ Import Section
+# -----------------------------------------------------------------------------------------------------
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from storage import PACKED_SCHEMA, dna_digest, migrate, pack_dna
+
+LEGACY_SCHEMA = '''
+    CREATE TABLE dna_records (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        dna TEXT NOT NULL UNIQUE,
+        is_mutant BOOLEAN NOT NULL,
+        detected_at DATETIME NOT NULL,
+        sequences_discovered TEXT
+    )
+'''
+
+# -----------------------------------------------------------------------------------------------------
+# @ Helper Function Section
+# -----------------------------------------------------------------------------------------------------
+def random_tables(size: int, count: int) -> List[bytes]:
+    random.seed(size)
+    return [bytes(random.choices(b"ATCG", k=size * size)) for _ in range(count)]
+
+def insert_legacy(path: str, tables: List[bytes]) -> float:
+    conn = sqlite3.connect(path)
+    conn.execute(LEGACY_SCHEMA)
+    start = time.perf_counter()
+    for flat in tables:
+        conn.execute('INSERT OR IGNORE INTO dna_records (dna, is_mutant, detected_at) VALUES (?, ?, ?)',
+                     (flat.decode('ascii'), False, '2024-11-26 12:00:00'))
+    conn.commit()
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed
+
+def insert_packed(path: str, tables: List[bytes], size: int) -> float:
+    conn = sqlite3.connect(path)
+    conn.execute(PACKED_SCHEMA.format(table='dna_records'))
+    start = time.perf_counter()
+    for flat in tables:
+        conn.execute('INSERT OR IGNORE INTO dna_records (dna_digest, dna_packed, is_mutant, detected_at) '
+                     'VALUES (?, ?, ?, ?)', (dna_digest(flat), pack_dna(flat, size), False, '2024-11-26 12:00:00'))
+    conn.commit()
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed
+
+def measure(size: int, count: int) -> Tuple[int, int, float, float, float]:
+    tables = random_tables(size, count)
+    with tempfile.TemporaryDirectory() as directory:
+        legacy, packed = os.path.join(directory, 'legacy.db'), os.path.join(directory, 'packed.db')
+        legacy_time = insert_legacy(legacy, tables)
+        packed_time = insert_packed(packed, tables, size)
+        legacy_size, packed_size = os.path.getsize(legacy), os.path.getsize(packed)
+        start = time.perf_counter()
+        migrate(legacy)
+        migrate_time = time.perf_counter() - start
+    return legacy_size, packed_size, count / legacy_time, count / packed_time, count / migrate_time
+
+# -----------------------------------------------------------------------------------------------------
+# @ Main Function Section
+# -----------------------------------------------------------------------------------------------------
+def main_benchmark(cases=((6, 100000), (50, 20000), (200, 2000))):
+    print(f"{'N':>5} {'rows':>7} {'TEXT (KB)':>10} {'packed (KB)':>12} {'size':>6} "
+          f"{'TEXT ins/s':>11} {'packed ins/s':>13} {'migrate rows/s':>15}")
+    for size, count in cases:
+        legacy_size, packed_size, legacy_rate, packed_rate, migrate_rate = measure(size, count)
+        print(f"{size:>5} {count:>7} {legacy_size // 1024:>10} {packed_size // 1024:>12} "
+              f"{packed_size / legacy_size:>6.0%} {legacy_rate:>11.0f} {packed_rate:>13.0f} {migrate_rate:>15.0f}")
+
+if __name__ == "__main__":
+    main_benchmark()
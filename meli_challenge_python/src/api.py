@@ -10,19 +10,27 @@ import json
 from datetime import datetime
 
 # Import from local modules
-from dna_analysis import is_mutant, init_db, record_dna_analysis
+from dna_analysis import (
+    analyze_edits, base_digest, flush_records, get_shared_stats, get_stats, init_db, line_memo_metrics, lookup_metrics, lookup_or_analyze_dna, record_dna_analysis,
+    record_metrics, result_key
+)
+from dna_matrix import DnaMatrix
+from storage import DIGEST_SIZE, INVERSE_SYMMETRY
+from engines import init_engines
+from result_cache import ResultCache
 
 # Configure logging
 def setup_logging(app):
     """
     Set up logging configuration for the application
     """
-    # Ensure logs directory exists
-    os.makedirs('logs', exist_ok=True)
+    # Ensure logs directory exists (LOG_DIR, logs by default)
+    log_dir = os.environ.get('LOG_DIR', 'logs')
+    os.makedirs(log_dir, exist_ok=True)
     
     # Configure file handler
     file_handler = RotatingFileHandler(
-        'logs/mutant_api.log', 
+        os.path.join(log_dir, 'mutant_api.log'), 
         maxBytes=10 * 1024 * 1024,  # 10 MB
         backupCount=5
     )
@@ -44,7 +52,7 @@ def create_app():
     
     # CORS configuration
     CORS(app, resources={
-        r"/mutant/": {"origins": "*"},
+        r"/mutant/": {"origins": "*", "expose_headers": ["X-DNA-Digest"]},
         r"/stats": {"origins": "*"}
     })
 
@@ -64,6 +72,14 @@ def create_app():
 # Initialize app and limiter
 app, limiter = create_app()
 
+# Results of recent tables, so resubmissions skip validation and detection; set
+# DNA_RESULT_CACHE_ENTRIES=0 to disable, DNA_RESULT_CACHE_TTL to expire entries (seconds)
+result_cache = ResultCache(
+    max_entries=int(os.environ.get('DNA_RESULT_CACHE_ENTRIES', '10000')),
+    max_bytes=int(os.environ.get('DNA_RESULT_CACHE_BYTES', str(64 * 1024 * 1024))),
+    ttl=float(os.environ.get('DNA_RESULT_CACHE_TTL', '0')) or None
+)
+
 @app.route('/mutant/', methods=['POST'])
 @limiter.limit("10 per minute")
 def mutant():
@@ -89,47 +105,111 @@ def mutant():
 
         # Analyze DNA
         try:
-            is_mutant_flag = is_mutant(dna)
-            
-            # Record DNA analysis 
-            record_dna_analysis(dna, is_mutant_flag)
+            # Encoded once; the key, the analysis and the record all read the same buffer
+            matrix = DnaMatrix.from_rows(dna)
+
+            # Recently seen tables are answered from memory, recorded ones from their stored
+            # verdict, both without detection
+            key = result_key(matrix)
+            analysis = result_cache.get(key) if key is not None else None
+            if analysis is None:
+                analysis, known = lookup_or_analyze_dna(matrix)
+
+                # Record DNA analysis from the same scan
+                if not known:
+                    record_dna_analysis(matrix, analysis)
+                if key is not None:
+                    result_cache.put(key, analysis)
             
             # Log the detection
-            detection_type = "Mutant" if is_mutant_flag else "Human"
+            detection_type = "Mutant" if analysis.is_mutant else "Human"
             app.logger.info(f"{detection_type} DNA detected: {json.dumps(dna)}")
 
+            # The base digest in the header lets the client edit the table with PATCH
+            headers = {'X-DNA-Digest': base_digest(matrix).hex()}
+
             # Return appropriate response
-            if is_mutant_flag:
-                return jsonify({'message': 'Mutant DNA detected'}), 200
+            if analysis.is_mutant:
+                return jsonify({'message': 'Mutant DNA detected'}), 200, headers
             else:
-                return jsonify({'message': 'Human DNA detected'}), 403
+                return jsonify({'message': 'Human DNA detected'}), 403, headers
 
         except ValueError as ve:
             app.logger.error(f"DNA Validation Error: {ve}")
-            return jsonify({'error': str(ve)}), 400
+            body = {'error': str(ve)}
+            # Point the client at the first offending cell when the validator located one
+            if getattr(ve, 'row', None) is not None:
+                body['row'] = ve.row
+            if getattr(ve, 'column', None) is not None:
+                body['column'] = ve.column
+            return jsonify(body), 400
 
     except Exception as e:
         app.logger.error(f"Unexpected error in /mutant/: {e}", exc_info=True)
         return jsonify({'error': 'Internal server error'}), 500
 
+@app.route('/mutant/<digest>', methods=['PATCH'])
+@limiter.limit("10 per minute")
+def mutant_edits(digest):
+    try:
+        # The base is the table with this base digest, as returned in X-DNA-Digest by POST
+        # /mutant/ and by earlier edits
+        try:
+            base = bytes.fromhex(digest)
+        except ValueError:
+            base = b''
+        if len(base) != DIGEST_SIZE + 1 or base[-1] >= len(INVERSE_SYMMETRY):
+            app.logger.warning(f"Invalid DNA digest: {digest}")
+            return jsonify({'error': 'Invalid DNA digest'}), 400
+
+        if not request.is_json:
+            app.logger.warning("Non-JSON request received")
+            return jsonify({'error': 'Request must be JSON'}), 400
+
+        data = request.get_json()
+        edits = data.get('edits') if isinstance(data, dict) else None
+        if not isinstance(edits, list) or not all(isinstance(edit, list) and len(edit) == 3 for edit in edits):
+            app.logger.warning(f"Invalid DNA edits format: {type(edits)}")
+            return jsonify({'error': 'Edits must be a list of [row, column, base]'}), 400
+
+        try:
+            analysis, edited_digest = analyze_edits(base, edits)
+        except LookupError as le:
+            app.logger.warning(f"DNA edits on an unknown base: {le}")
+            return jsonify({'error': 'Unknown base DNA'}), 404
+        except ValueError as ve:
+            app.logger.error(f"DNA Validation Error: {ve}")
+            body = {'error': str(ve)}
+            if getattr(ve, 'row', None) is not None:
+                body['row'] = ve.row
+            if getattr(ve, 'column', None) is not None:
+                body['column'] = ve.column
+            return jsonify(body), 400
+
+        detection_type = "Mutant" if analysis.is_mutant else "Human"
+        app.logger.info(f"{detection_type} DNA detected after {len(edits)} edits of {digest}")
+
+        # The base digest of the edited table lets the client chain further edits
+        headers = {'X-DNA-Digest': edited_digest.hex()}
+        if analysis.is_mutant:
+            return jsonify({'message': 'Mutant DNA detected', 'digest': edited_digest.hex()}), 200, headers
+        else:
+            return jsonify({'message': 'Human DNA detected', 'digest': edited_digest.hex()}), 403, headers
+
+    except Exception as e:
+        app.logger.error(f"Unexpected error in /mutant/<digest>: {e}", exc_info=True)
+        return jsonify({'error': 'Internal server error'}), 500
+
 @app.route('/stats', methods=['GET'])
 @limiter.limit("30 per minute")
 def stats():
     try:
-        conn = sqlite3.connect('dna_records.db')
-        cursor = conn.cursor()
-
-        # Fetch mutant and human DNA counts with error handling
-        cursor.execute('''
-            SELECT 
-                SUM(CASE WHEN is_mutant = 1 THEN 1 ELSE 0 END) as mutant_count,
-                SUM(CASE WHEN is_mutant = 0 THEN 1 ELSE 0 END) as human_count
-            FROM dna_records
-        ''')
-        
-        result = cursor.fetchone()
-        count_mutant_dna = result[0] or 0
-        count_human_dna = result[1] or 0
+        # Shared-memory counters, read without I/O or waiting: like the other workers' queues,
+        # this worker's queued records are counted once the writer commits them. Without
+        # them the trigger-maintained row is read, after making this worker's records visible
+        if get_shared_stats() is None:
+            flush_records()
+        count_mutant_dna, count_human_dna, version = get_stats()
 
         # Calculate ratio safely
         ratio = count_mutant_dna / (count_human_dna + count_mutant_dna) if (count_human_dna + count_mutant_dna) > 0 else 0
@@ -137,13 +217,14 @@ def stats():
         # Log stats retrieval
         app.logger.info(f"Stats retrieved - Mutant: {count_mutant_dna}, Human: {count_human_dna}")
 
-        conn.close()
-
-        return jsonify({
+        response = jsonify({
             'count_mutant_dna': count_mutant_dna,
             'count_human_dna': count_human_dna,
             'ratio': round(ratio, 4)
         })
+        # Pollers revalidate with If-None-Match and get a 304 until the counters change
+        response.set_etag(f"stats-{version}")
+        return response.make_conditional(request)
 
     except sqlite3.Error as e:
         app.logger.error(f"Database error in /stats: {e}")
@@ -152,11 +233,28 @@ def stats():
         app.logger.error(f"Unexpected error in /stats: {e}", exc_info=True)
         return jsonify({'error': 'Internal server error'}), 500
 
+@app.route('/metrics', methods=['GET'])
+@limiter.limit("30 per minute")
+def metrics():
+    try:
+        return jsonify({
+            'write_behind': record_metrics(),
+            'record_lookup': lookup_metrics(),
+            'result_cache': result_cache.metrics(),
+            'line_memo': line_memo_metrics()
+        })
+    except Exception as e:
+        app.logger.error(f"Unexpected error in /metrics: {e}", exc_info=True)
+        return jsonify({'error': 'Internal server error'}), 500
+
 # Application configuration and startup
 if __name__ == "__main__":
     # Initialize database
     init_db()
 
+    # Load or measure the detection engine calibration before serving requests
+    init_engines()
+
     # Run the application with enhanced configuration
     host = '0.0.0.0'
     port = 5000
@@ -181,4 +279,6 @@ def create_production_app():
     Create an app instance for production deployment
     """
     app, _ = create_app()
+    init_db()
+    init_engines()
     return app
\ No newline at end of file
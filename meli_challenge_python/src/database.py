@@ -0,0 +1,154 @@
+"""
+SQLite connection management for the DNA records database.
+
+Every thread keeps one persistent connection, so the per-connection statement cache is
+reused across requests instead of re-preparing every statement. Connections run in WAL
+mode with synchronous=NORMAL, so readers never block the writer and commits do not
+fsync the database file, plus a memory-mapped I/O window and a larger page cache.
+
+Connections are never carried across fork(): a preforking server that imports the app
+before forking workers gets fresh connections in each worker, and the inherited ones are
+abandoned without being closed, as SQLite requires. They are kept referenced for the life of
+the worker, since a connection garbage-collected in the child would be closed there.
+
+The database path comes from DATABASE_URL (``sqlite:///relative.db`` or
+``sqlite:////absolute.db``), defaulting to dna_records.db in the working directory.
+"""
+import logging
+import os
+import sqlite3
+import threading
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+DATABASE_URL_ENV = "DATABASE_URL"
+DEFAULT_PATH = "dna_records.db"
+
+MMAP_SIZE = int(os.environ.get("DNA_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+# Negative values are KiB, as in PRAGMA cache_size
+CACHE_SIZE = int(os.environ.get("DNA_SQLITE_CACHE_SIZE", str(-64 * 1024)))
+BUSY_TIMEOUT = 5.0
+STATEMENT_CACHE_SIZE = 256
+
+_SQLITE_SCHEME = "sqlite:///"
+
+
+def database_path(url: Optional[str] = None) -> str:
+    """
+    Resolves the database file path from a DATABASE_URL value.
+
+    :param url: The URL; defaults to the DATABASE_URL environment variable.
+    :return: Path of the SQLite database file.
+    """
+    if url is None:
+        url = os.environ.get(DATABASE_URL_ENV)
+    if not url:
+        return DEFAULT_PATH
+    if not url.startswith(_SQLITE_SCHEME):
+        raise ValueError(f"Unsupported DATABASE_URL '{url}': only {_SQLITE_SCHEME}<path> is supported")
+    return url[len(_SQLITE_SCHEME):]
+
+
+class ConnectionManager:
+    """
+    Hands out one tuned connection per thread for a database file.
+
+    :param path: Path of the SQLite database file, resolved against the current directory.
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+        self._pid = os.getpid()
+
+    def connection(self) -> sqlite3.Connection:
+        """
+        Returns the connection of the calling thread, opening it on first use.
+        """
+        if self._pid != os.getpid():
+            self._forget_inherited()
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def close_all(self) -> None:
+        """
+        Closes every connection opened by this process. Threads reconnect on next use.
+        """
+        if self._pid != os.getpid():
+            self._forget_inherited()
+            return
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        # check_same_thread is off only so close_all can close every thread's connection
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, check_same_thread=False,
+                               cached_statements=STATEMENT_CACHE_SIZE)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        conn.execute(f"PRAGMA cache_size={CACHE_SIZE}")
+        logger.info(f"Opened SQLite connection to {self.path} in thread {threading.current_thread().name}")
+        return conn
+
+    def _forget_inherited(self) -> None:
+        # Connections opened before fork() belong to the parent; abandon them unclosed, still
+        # referenced so that collecting them does not close them either. The inherited lock
+        # may have been held by a parent thread, so it is replaced, not taken
+        _abandoned.extend(self._connections)
+        self._lock = threading.Lock()
+        self._connections = []
+        self._local = threading.local()
+        self._pid = os.getpid()
+
+
+_manager: Optional[ConnectionManager] = None
+_manager_lock = threading.Lock()
+
+# Connections inherited across fork(), never closed nor collected in this process
+_abandoned: List[sqlite3.Connection] = []
+
+
+def get_database() -> ConnectionManager:
+    """
+    Returns the process-wide connection manager for DATABASE_URL, creating it on first use.
+    """
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = ConnectionManager(database_path())
+    return _manager
+
+
+def get_connection() -> sqlite3.Connection:
+    """
+    Returns the calling thread's connection to the configured database.
+    """
+    return get_database().connection()
+
+
+def configure_database(path: Optional[str] = None) -> ConnectionManager:
+    """
+    Points the process at another database file, closing the current connections.
+
+    :param path: Path of the database file; None re-reads DATABASE_URL.
+    :return: The new connection manager.
+    """
+    global _manager
+    with _manager_lock:
+        if _manager is not None:
+            _manager.close_all()
+        _manager = ConnectionManager(path if path is not None else database_path())
+    return _manager
@@ -1,7 +1,43 @@
+import atexit
+import hashlib
 import logging
-from typing import List
+import os
+import re
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 import sqlite3
 from datetime import datetime
+from math import isqrt
+
+from engines import REFERENCE_ENGINE, get_engine, register_engine, select_engine
+from engines.regex_engine import locate_runs
+from database import ConnectionManager, get_database
+from dna_matrix import DnaMatrix, DnaValidationError
+from incremental import LineState
+import line_memo
+from result_cache import ResultCache
+from storage import (
+    DIGEST_SIZE, INVERSE_SYMMETRY, PACKED_SCHEMA, apply_symmetry, canonical_digest, canonical_form, dna_digest, install_stats,
+    pack_dna, read_stats, unpack_dna, uses_packed_format
+)
+import write_behind
+
+# Shared stats need flock, which only POSIX platforms have
+try:
+    from shared_stats import SharedStats
+except ImportError:
+    SharedStats = None
+
+# NumPy is optional: without it is_mutant_batch falls back to one is_mutant call per item
+# and is_mutant_file is unavailable
+try:
+    import numpy as np
+    from engines.numpy_engine import detect_batch, valid_alphabet
+    from mmap_scan import scan_file
+except ImportError:
+    np = None
 
 # Configure logging
 logging.basicConfig(
@@ -11,6 +47,153 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+class AnalysisResult:
+    """
+    Outcome of a DNA analysis: the verdict and, for mutants, where the two runs that settled
+    it start.
+
+    runs holds (direction, row, column) entries with direction H (horizontal), V (vertical),
+    D (diagonal) or A (anti-diagonal); it is empty for humans, whose runs are not located.
+    run_count is the number of runs located, so None rather than a count when none were:
+    for humans (a human table may still hold one run) and for mutants recorded before runs
+    were stored.
+    """
+    __slots__ = ("is_mutant", "run_count", "runs")
+
+    def __init__(self, is_mutant: bool, runs: List[Tuple[str, int, int]]):
+        self.is_mutant = is_mutant
+        self.run_count: Optional[int] = len(runs) if runs else None
+        self.runs = runs
+
+    def sequences_discovered(self) -> Optional[str]:
+        """
+        Compact form of the runs stored in dna_records, e.g. "H0,0;D2,1".
+
+        :return: The runs separated by ';', or None when no run was found.
+        """
+        if not self.runs:
+            return None
+        return ';'.join(f"{direction}{row},{column}" for direction, row, column in self.runs)
+
+    @classmethod
+    def from_record(cls, is_mutant: bool, sequences: Optional[str]) -> "AnalysisResult":
+        """
+        Rebuilds the result stored in dna_records. Records written before runs were stored
+        in compact form come back without runs.
+
+        :param is_mutant: The stored verdict.
+        :param sequences: The stored sequences_discovered value.
+        """
+        runs = []
+        if sequences and _SEQUENCES_PATTERN.fullmatch(sequences):
+            for run in sequences.split(';'):
+                row, column = run[1:].split(',')
+                runs.append((run[0], int(row), int(column)))
+        return cls(bool(is_mutant), runs)
+
+    def __sizeof__(self) -> int:
+        # Includes the runs, so caches can bound the memory of the results they hold
+        return object.__sizeof__(self) + sys.getsizeof(self.runs) + sum(map(sys.getsizeof, self.runs))
+
+    def __repr__(self) -> str:
+        return f"AnalysisResult(is_mutant={self.is_mutant}, runs={self.runs})"
+
+_SEQUENCES_PATTERN = re.compile(r"[HVDA]\d+,\d+(?:;[HVDA]\d+,\d+)*")
+
+# Translate table flagging every byte that is not a valid base with 1
+_INVALID_BASES = bytes(0 if byte in b"ATCG" else 1 for byte in range(256))
+
+# A table as a list of row strings, a DnaMatrix, or any object exporting the buffer
+# protocol (bytes, memoryview, a NumPy uint8 array...) holding the row-major bases
+DnaInput = Union[List[str], DnaMatrix, bytes, memoryview]
+
+# Bytes of a caller's buffer copied at a time to check the alphabet
+VALIDATION_CHUNK = 64 * 1024
+
+def as_matrix(dna: DnaInput, shape: Union[int, Sequence[int], None] = None) -> DnaMatrix:
+    """
+    Dispatches a DNA table to the DnaMatrix that reads it: a DnaMatrix as it is, a buffer
+    in place through DnaMatrix.view, anything else as a list of rows through from_rows.
+
+    :param dna: The table in any of the accepted forms.
+    :param shape: (N, N) or N of a buffer; defaults to the shape of a two-dimensional buffer.
+    """
+    if isinstance(dna, DnaMatrix):
+        return dna
+    try:
+        memoryview(dna)
+    except TypeError:
+        return DnaMatrix.from_rows(dna)
+    return DnaMatrix.view(dna, shape)
+
+def _invalid_position(flat) -> int:
+    if isinstance(flat, (bytes, bytearray)):
+        return -1 if not flat.translate(None, b"ATCG") else flat.translate(_INVALID_BASES).find(1)
+    # Views of a caller's buffer have no translate: chunks of it are copied, so no copy of
+    # the whole matrix is made
+    for start in range(0, len(flat), VALIDATION_CHUNK):
+        chunk = bytes(flat[start:start + VALIDATION_CHUNK])
+        if chunk.translate(None, b"ATCG"):
+            return start + chunk.translate(_INVALID_BASES).find(1)
+    return -1
+
+def encode_dna(dna: DnaInput, shape: Union[int, Sequence[int], None] = None) -> Tuple[Union[bytearray, memoryview], int]:
+    """
+    Validates the DNA table and encodes it as one row-major byte buffer, ready for any engine.
+
+    A list of rows is encoded with DnaMatrix.from_rows, which joins the rows once (checking
+    their type in C) and checks the shape from the joined length; a DnaMatrix is used as it
+    is, and a buffer is read in place. The alphabet is then checked with translate passes,
+    and the position of the first error is only searched for once an error is known.
+
+    :param dna: List of strings representing each row of an NxN DNA sequence table, a
+        DnaMatrix, or a buffer of row-major bases (see as_matrix).
+    :param shape: (N, N) or N of a buffer input.
+    :return: The buffer of the matrix and N.
+    """
+    matrix = as_matrix(dna, shape)
+    flat, n = matrix.buffer, matrix.n
+    position = _invalid_position(flat)
+    if position >= 0:
+        raise DnaValidationError("DNA can only contain characters A, T, C, G.",
+                                 row=position // n, column=position % n)
+    return flat, n
+
+# A table, its rotations and its mirror images get the same verdict, so result keys and
+# dna_records digests are taken on the canonical form among them. DNA_CANONICAL_KEYS=0
+# keys cached results by the exact form, DNA_CANONICAL_STORAGE=0 dedups records by it (and
+# keys cached results by it too, or a cache hit would keep a mirror image from its record)
+CANONICAL_KEYS = os.environ.get("DNA_CANONICAL_KEYS", "1") != "0"
+CANONICAL_STORAGE = os.environ.get("DNA_CANONICAL_STORAGE", "1") != "0"
+
+def result_key(dna: DnaInput) -> Optional[bytes]:
+    """
+    Computes the key of a DNA table's result, checking only what makes the key unambiguous
+    (a list of N strings of length N). The alphabet is not checked, so the key is only meant
+    for finding results of tables already validated. With CANONICAL_KEYS and
+    CANONICAL_STORAGE the rotations and mirror images of a table share its key.
+
+    :param dna: List of strings representing each row of an NxN DNA sequence table, or a DnaMatrix.
+    :return: The 16-byte digest, or None when the table is not a square of ASCII strings.
+    """
+    try:
+        matrix = as_matrix(dna)
+    except (TypeError, ValueError):
+        return None
+    return record_digest(matrix) if CANONICAL_KEYS else dna_digest(matrix.buffer)
+
+def record_digest(matrix: DnaMatrix) -> bytes:
+    """
+    Computes the digest a table is recorded under in dna_records: that of its canonical
+    form with CANONICAL_STORAGE, of the table itself otherwise. The canonical digest is
+    memoized on the matrix, so the result key, the lookup and the record of a request share
+    one computation.
+
+    :param matrix: The table; its alphabet is not checked.
+    :return: The 16-byte digest.
+    """
+    return matrix.canonical()[0] if CANONICAL_STORAGE else dna_digest(matrix.buffer)
+
 def check_sequence(sequence: str) -> bool:
     """
     Checks if there is a sequence of four identical letters in a string.
@@ -24,10 +207,44 @@ def check_sequence(sequence: str) -> bool:
         logger.error(f"Error in check_sequence: {e}")
         raise
 
+# Gather plans of extract_diagonals per N, least recently used first out once their
+# estimated memory goes over DNA_GATHER_PLAN_BYTES
+GATHER_PLAN_BYTES = int(os.environ.get("DNA_GATHER_PLAN_BYTES", str(16 * 1024 * 1024)))
+_diagonal_plans = ResultCache(max_bytes=GATHER_PLAN_BYTES)
+
+# (start, stop, step) slice of every diagonal in the row-major joined rows
+GatherPlan = List[Tuple[int, int, int]]
+
+def diagonal_plan(n: int) -> GatherPlan:
+    """
+    Returns the gather plan of the diagonals of an NxN matrix, in extract_diagonals order:
+    one strided slice of the joined rows per diagonal, so applying it is one C-level slice
+    per diagonal, with no index arithmetic left. Plans are cached per N.
+
+    :param n: Size of the square matrix.
+    :return: The (start, stop, step) of every diagonal, then of every anti-diagonal.
+    """
+    plan = _diagonal_plans.get(n)
+    if plan is None:
+        plan = []
+        # Top-left to bottom-right diagonals: cells (i, i - d) for the rows i that have one
+        for d in range(-n + 1, n):
+            first, last = max(d, 0), min(n, n + d) - 1
+            plan.append((first * (n + 1) - d, last * (n + 1) - d + 1, n + 1))
+        # Top-right to bottom-left diagonals: cells (i, n - 1 - i - d); a 1x1 matrix has one cell
+        for d in range(-n + 1, n):
+            first, last = max(-d, 0), min(n, n - d) - 1
+            plan.append((first * (n - 1) + n - 1 - d, last * (n - 1) + n - d, max(n - 1, 1)))
+        _diagonal_plans.put(n, plan, size=sys.getsizeof(plan) + sum(map(sys.getsizeof, plan)))
+    return plan
+
 def extract_diagonals(dna: List[str]) -> List[str]:
     """
     Extracts all diagonals (both from top-left to bottom-right and top-right to bottom-left) from the DNA matrix.
 
+    The rows are joined once and every diagonal is sliced out of the joined rows with the
+    cached diagonal_plan for N.
+
     :param dna: List of strings representing each row of an NxN DNA sequence table.
     :return: List of strings representing all diagonals.
     """
@@ -36,130 +253,654 @@ def extract_diagonals(dna: List[str]) -> List[str]:
         if n == 0:
             raise ValueError("DNA matrix cannot be empty")
 
-        for row in dna:
-            if len(row) != n:
-                raise ValueError("All rows in the DNA matrix must have the same length")
-
-        diagonals = []
-
-        # Top-left to bottom-right diagonals
-        for d in range(-n + 1, n):
-            diagonal = ""
-            for i in range(max(d, 0), min(n, n + d)):
-                if 0 <= i - d < n:
-                    diagonal += dna[i][i - d]
-            diagonals.append(diagonal)
-
-        # Top-right to bottom-left diagonals
-        for d in range(-n + 1, n):
-            diagonal = ""
-            for i in range(max(d, 0), min(n, n + d)):
-                if 0 <= n - 1 - i - d < n:
-                    diagonal += dna[i][n - 1 - i - d]
-            diagonals.append(diagonal)
+        try:
+            joined = ''.join(dna)
+        except TypeError:
+            # Rows given as sequences of single characters
+            joined = ''.join(map(''.join, dna))
+        # N rows adding up to N*N characters, none shorter than N, are all exactly N long
+        if len(joined) != n * n or min(map(len, dna)) != n:
+            raise ValueError("All rows in the DNA matrix must have the same length")
 
-        return diagonals
+        return [joined[start:stop:step] for start, stop, step in diagonal_plan(n)]
     except Exception as e:
         logger.error(f"Error in extract_diagonals: {e}")
         raise
 
-def is_mutant(dna: List[str]) -> bool:
+def detect_python(flat: bytes, n: int) -> bool:
+    """
+    Reference detection engine: checks every row, column and diagonal as a string with
+    check_sequence. Every other engine must return the same results.
+
+    :param flat: Row-major bytes of length N*N holding the validated bases.
+    :param n: Size of the square matrix.
+    :return: True if mutant, False otherwise.
+    """
+    dna = [bytes(flat[i * n:(i + 1) * n]).decode('ascii') for i in range(n)]
+    sequences_found = 0
+
+    # Horizontal and Vertical Checks
+    for row in dna:
+        if check_sequence(row):
+            sequences_found += 1
+            if sequences_found > 1:
+                logger.info(f"Mutant detected - Horizontal match found: {row}")
+                return True
+
+    for col in range(n):
+        column_str = ''.join([dna[row][col] for row in range(n)])
+        if check_sequence(column_str):
+            sequences_found += 1
+            if sequences_found > 1:
+                logger.info(f"Mutant detected - Vertical match found: {column_str}")
+                return True
+
+    # Diagonal Check
+    diagonals = extract_diagonals(dna)
+    for diagonal in diagonals:
+        if check_sequence(diagonal):
+            sequences_found += 1
+            if sequences_found > 1:
+                logger.info(f"Mutant detected - Diagonal match found: {diagonal}")
+                return True
+
+    return False
+
+register_engine(REFERENCE_ENGINE, detect_python)
+
+def is_mutant(dna: DnaInput, engine: Optional[str] = None, shape: Union[int, Sequence[int], None] = None) -> bool:
     """
     Determines if the given DNA sequence belongs to a mutant by looking for more than one sequence
     of four identical letters in any direction (horizontal, vertical, diagonal).
+
+    A buffer (bytes, memoryview, a C-contiguous NumPy uint8 array...) is read in place and
+    handed to the engine without being copied or turned into strings.
     
-    :param dna: List of strings representing each row of an NxN DNA sequence table.
+    :param dna: List of strings representing each row of an NxN DNA sequence table, a
+                DnaMatrix, or a buffer of N*N row-major bases.
+    :param engine: Optional name of the detection engine to use (e.g. "numpy", "python").
+                   Defaults to the engine picked by engines.select_engine for N.
+    :param shape: (N, N) or N of a buffer; a two-dimensional buffer carries its own.
     :return: True if mutant, False otherwise.
+    :raises DnaValidationError: If the table is invalid, with the first offending position.
     """
     try:
         # Error Handling
-        if not dna or not all(isinstance(row, str) for row in dna):
-            raise ValueError("DNA must be a list of strings.")
-        n = len(dna)
-        if any(len(row) != n for row in dna):
-            raise ValueError("DNA must be a square matrix of NxN.")
-        if any(char not in "ATCG" for row in dna for char in row):
-            raise ValueError("DNA can only contain characters A, T, C, G.")
-
-        sequences_found = 0
-
-        # Horizontal and Vertical Checks
-        for row in dna:
-            if check_sequence(row):
-                sequences_found += 1
-                if sequences_found > 1:
-                    logger.info(f"Mutant detected - Horizontal match found: {row}")
-                    return True
-        
-        for col in range(n):
-            column_str = ''.join([dna[row][col] for row in range(n)])
-            if check_sequence(column_str):
-                sequences_found += 1
-                if sequences_found > 1:
-                    logger.info(f"Mutant detected - Vertical match found: {column_str}")
-                    return True
-
-        # Diagonal Check
-        diagonals = extract_diagonals(dna)
-        for diagonal in diagonals:
-            if check_sequence(diagonal):
-                sequences_found += 1
-                if sequences_found > 1:
-                    logger.info(f"Mutant detected - Diagonal match found: {diagonal}")
-                    return True
-
-        logger.info(f"Non-mutant DNA sequence: No repeated 4-letter sequences")
-        return False
+        flat, n = encode_dna(dna, shape)
+
+        if engine is None:
+            engine = select_engine(n)
+        result = get_engine(engine)(flat, n)
+        logger.info(f"{'Mutant' if result else 'Non-mutant'} DNA sequence detected by '{engine}' engine")
+        return result
+    except Exception as e:
+        logger.error(f"Error analyzing DNA sequence: {e}")
+        raise
+
+def analyze_dna(dna: DnaInput, shape: Union[int, Sequence[int], None] = None) -> AnalysisResult:
+    """
+    Validates the DNA table and detects with the engine selected for N, returning the
+    verdict together with the runs that settled it, so the response and the stored record
+    come from the same analysis. Runs are only located for mutants, up to the two that
+    decide the verdict, so humans cost a single detection. While the line memo pays off,
+    detection goes through it instead, so lines seen in earlier analyses are not scanned.
+
+    :param dna: List of strings representing each row of an NxN DNA sequence table, a
+        DnaMatrix, or a buffer of N*N row-major bases.
+    :param shape: (N, N) or N of a buffer; a two-dimensional buffer carries its own.
+    :return: The AnalysisResult of the analysis.
+    :raises DnaValidationError: If the table is invalid, with the first offending position.
+    """
+    try:
+        return _analyze_encoded(*encode_dna(dna, shape))
+    except Exception as e:
+        logger.error(f"Error analyzing DNA sequence: {e}")
+        raise
+
+# Per-line results shared by the analyses, unless DNA_LINE_MEMO=0; it turns itself off while
+# fewer than DNA_LINE_MEMO_MIN_HIT_RATE of the lines are found in it, or while it is slower
+# than the engine
+LINE_MEMO = os.environ.get("DNA_LINE_MEMO", "1") != "0"
+_line_memo = line_memo.LineMemo(
+    max_entries=int(os.environ.get("DNA_LINE_MEMO_ENTRIES", str(line_memo.MAX_ENTRIES))),
+    max_bytes=int(os.environ.get("DNA_LINE_MEMO_BYTES", str(line_memo.MAX_BYTES))),
+    min_hit_rate=float(os.environ.get("DNA_LINE_MEMO_MIN_HIT_RATE", str(line_memo.MIN_HIT_RATE)))
+)
+
+def line_memo_metrics() -> Dict[str, float]:
+    """
+    Size, hit rate and state of the per-line memo.
+    """
+    return _line_memo.metrics()
+
+def _analyze_encoded(flat: bytes, n: int) -> AnalysisResult:
+    engine = get_engine(select_engine(n))
+    mutant = _line_memo.detect(flat, n, engine) if LINE_MEMO else engine(flat, n)
+    result = AnalysisResult(mutant, locate_runs(flat, n, limit=2) if mutant else [])
+    logger.info(f"{'Mutant' if result.is_mutant else 'Non-mutant'} DNA sequence analyzed: {result.sequences_discovered()}")
+    return result
+
+def lookup_or_analyze_dna(dna: DnaInput) -> Tuple[AnalysisResult, bool]:
+    """
+    Answers a DNA table already in dna_records from its stored verdict with one indexed
+    point lookup, and analyzes it like analyze_dna otherwise. Records still queued by the
+    write-behind writer are not visible yet and are analyzed again.
+
+    :param dna: List of strings representing each row of an NxN DNA sequence table, or a DnaMatrix.
+    :return: The AnalysisResult, and whether it came from dna_records (nothing to record).
+    :raises DnaValidationError: If the table is invalid, with the first offending position.
+    """
+    try:
+        matrix = as_matrix(dna)
+        flat, n = encode_dna(matrix)
+        if EDIT_MIN_N and n >= EDIT_MIN_N:
+            _remember_base(matrix)
+        digest = record_digest(matrix)
+        result = find_dna_analysis(flat, digest)
+        with _lookup_lock:
+            _lookup_counts['hits' if result is not None else 'misses'] += 1
+        if result is not None:
+            logger.info(f"{'Mutant' if result.is_mutant else 'Non-mutant'} DNA sequence found in dna_records")
+            return result, True
+        return _analyze_encoded(flat, n), False
     except Exception as e:
         logger.error(f"Error analyzing DNA sequence: {e}")
         raise
 
+# Outcomes of the dna_records lookups made by lookup_or_analyze_dna
+_lookup_counts = {'hits': 0, 'misses': 0}
+_lookup_lock = threading.Lock()
+
+def lookup_metrics() -> Dict[str, float]:
+    """
+    Hits and misses of the dna_records lookups, and the hit rate.
+    """
+    with _lookup_lock:
+        hits, misses = _lookup_counts['hits'], _lookup_counts['misses']
+    return {'hits': hits, 'misses': misses, 'hit_rate': round(hits / (hits + misses), 4) if hits + misses else 0.0}
+
+def is_mutant_batch(dna_list: List[List[str]]) -> List[Union[bool, ValueError]]:
+    """
+    Determines which of many DNA sequences belong to a mutant in a single call.
+
+    Inputs are grouped by N and every group is stacked into a (B, N, N) array, so the alphabet
+    validation and the four-direction run detection are vectorized across the whole group
+    instead of paying the per-call overhead of is_mutant for each matrix.
+
+    :param dna_list: List of DNA tables, each one a list of strings as accepted by is_mutant.
+    :return: One entry per input, in input order: True if mutant, False otherwise, or the
+             ValueError that is_mutant would raise for that input.
+    """
+    try:
+        results: List[Union[bool, ValueError, None]] = [None] * len(dna_list)
+
+        if np is None:
+            for index, dna in enumerate(dna_list):
+                try:
+                    results[index] = is_mutant(dna)
+                except ValueError as ve:
+                    results[index] = ve
+            return results
+
+        # Shape checks are per item; the encoded rows are grouped by N for stacking
+        groups: Dict[int, Tuple[List[int], List[str]]] = {}
+        for index, dna in enumerate(dna_list):
+            # join only accepts strings, which checks every row's type at C speed
+            try:
+                joined = ''.join(dna) if dna else None
+            except TypeError:
+                joined = None
+            if joined is None:
+                results[index] = ValueError("DNA must be a list of strings.")
+                continue
+            n = len(dna)
+            # N rows adding up to N*N characters, none shorter than N, are all exactly N long
+            if len(joined) != n * n or min(map(len, dna)) != n:
+                results[index] = ValueError("DNA must be a square matrix of NxN.")
+                continue
+            indexes, matrices = groups.setdefault(n, ([], []))
+            indexes.append(index)
+            matrices.append(joined)
+
+        for n, (indexes, matrices) in groups.items():
+            # Non-ASCII characters become '?' and fail the alphabet check below
+            encoded = ''.join(matrices).encode('ascii', 'replace')
+            grids = np.frombuffer(encoded, dtype=np.uint8).reshape(len(indexes), n, n)
+            valid = valid_alphabet(grids)
+            verdicts = iter(detect_batch(grids[valid]).tolist())
+            for index, is_valid in zip(indexes, valid.tolist()):
+                results[index] = next(verdicts) if is_valid else ValueError(
+                    "DNA can only contain characters A, T, C, G.")
+
+        logger.info(f"Batch of {len(dna_list)} DNA sequences analyzed in {len(groups)} size groups")
+        return results
+    except Exception as e:
+        logger.error(f"Error analyzing DNA batch: {e}")
+        raise
+
+def is_mutant_file(path: str, n: Optional[int] = None, workers: Optional[int] = None,
+                   band_rows: Optional[int] = None) -> bool:
+    """
+    Determines if a DNA matrix stored as a raw file (N*N bases, one byte each, row-major)
+    belongs to a mutant, without loading it as a list of strings.
+
+    The file is memory-mapped and split into row bands scanned by a process pool; every
+    worker maps the file itself instead of receiving a copy of its band. Remaining bands are
+    cancelled as soon as more than one line with a run is known, so their rows are not
+    validated in that case.
+
+    :param path: Path to the raw matrix file.
+    :param n: Size of the square matrix; inferred from the file size when omitted.
+    :param workers: Number of worker processes; defaults to the CPU count, 1 scans in-process.
+    :param band_rows: Rows per band; defaults to bands of about 64 MB.
+    :return: True if mutant, False otherwise.
+    """
+    try:
+        if np is None:
+            raise RuntimeError("Memory-mapped DNA analysis requires NumPy")
+        result = scan_file(path, n=n, workers=workers, band_rows=band_rows)
+        logger.info(f"{'Mutant' if result else 'Non-mutant'} DNA sequence detected in file {path}")
+        return result
+    except Exception as e:
+        logger.error(f"Error analyzing DNA file {path}: {e}")
+        raise
+
 def init_db():
     """
     Initialize the database with a more robust setup and additional fields
+
+    New databases use the packed layout of storage.py; a table in the former TEXT layout is
+    kept as-is (and still written to) until it is converted with ``storage.py migrate``.
     """
     try:
-        conn = sqlite3.connect('dna_records.db')
+        database = get_database()
+        conn = database.connection()
         cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS dna_records (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                dna TEXT NOT NULL UNIQUE,
-                is_mutant BOOLEAN NOT NULL,
-                detected_at DATETIME NOT NULL,
-                sequences_discovered TEXT
-            )
-        ''')
+        cursor.execute(PACKED_SCHEMA.format(table='dna_records'))
         conn.commit()
-        conn.close()
-        logger.info("Database initialized successfully")
+        install_stats(conn)
+        _packed_storage[database.path] = uses_packed_format(conn)
+        if not _packed_storage[database.path]:
+            logger.warning("dna_records uses the former TEXT layout; run 'python storage.py migrate' to pack it")
+        logger.info(f"Database {database.path} initialized successfully")
     except sqlite3.Error as e:
         logger.error(f"Database initialization error: {e}")
         raise
 
-def record_dna_analysis(dna: List[str], is_mutant_result: bool):
+# Layout of dna_records per database path, detected on first use and again if a migration
+# swaps the table
+_packed_storage: Dict[str, bool] = {}
+
+# Records are written by a background write-behind queue unless DNA_WRITE_BEHIND=0
+WRITE_BEHIND = os.environ.get("DNA_WRITE_BEHIND", "1") != "0"
+WRITE_BATCH_SIZE = int(os.environ.get("DNA_WRITE_BATCH_SIZE", str(write_behind.BATCH_SIZE)))
+WRITE_MAX_DELAY = float(os.environ.get("DNA_WRITE_MAX_DELAY", str(write_behind.MAX_DELAY)))
+# How long interpreter exit waits for queued records while the database keeps failing
+WRITE_CLOSE_TIMEOUT = float(os.environ.get("DNA_WRITE_CLOSE_TIMEOUT", "10"))
+
+_writer: Optional[write_behind.WriteBehindQueue] = None
+_writer_lock = threading.Lock()
+
+def _records_layout(database: ConnectionManager, conn: sqlite3.Connection, refresh: bool = False) -> bool:
+    packed = None if refresh else _packed_storage.get(database.path)
+    if packed is None:
+        packed = _packed_storage[database.path] = uses_packed_format(conn)
+    return packed
+
+def _record_digest(flat: bytes) -> bytes:
+    return canonical_digest(flat, isqrt(len(flat))) if CANONICAL_STORAGE else dna_digest(flat)
+
+def _find_record(conn: sqlite3.Connection, flat: bytes, packed: bool, digest: Optional[bytes]) -> Optional[tuple]:
+    if packed:
+        # Records written with exact-form dedup (or migrated) are found by their exact digest
+        return conn.execute('SELECT is_mutant, sequences_discovered FROM dna_records WHERE dna_digest IN (?, ?)',
+                            (digest or _record_digest(flat), dna_digest(flat))).fetchone()
+    return conn.execute('SELECT is_mutant, sequences_discovered FROM dna_records WHERE dna = ?',
+                        (str(flat, 'ascii'),)).fetchone()
+
+def find_dna_analysis(flat: bytes, digest: Optional[bytes] = None) -> Optional[AnalysisResult]:
     """
-    Record the DNA analysis results in the database
+    Looks a validated DNA table up in dna_records through its unique index (the digest, or
+    the text in the former layout). With CANONICAL_STORAGE a rotation or mirror image of the
+    table may be what was recorded: the verdict is the same, the runs are those of that form.
+
+    :param flat: Row-major ASCII bases of the table, as returned by encode_dna.
+    :param digest: record_digest of the table when the caller already has it.
+    :return: The stored AnalysisResult, or None when the table was never recorded.
     """
+    database = get_database()
+    conn = database.connection()
     try:
-        dna_str = ''.join(dna)
-        conn = sqlite3.connect('dna_records.db')
-        cursor = conn.cursor()
-        cursor.execute('''
+        row = _find_record(conn, flat, _records_layout(database, conn), digest)
+    except sqlite3.OperationalError:
+        # The table was migrated (or replaced) since its layout was detected
+        row = _find_record(conn, flat, _records_layout(database, conn, refresh=True), digest)
+    return AnalysisResult.from_record(*row) if row is not None else None
+
+def _insert_records(cursor: sqlite3.Cursor, rows: List[tuple], packed: bool):
+    if packed:
+        packed_rows = []
+        for dna, is_mutant_result, detected_at, sequences, *digest in rows:
+            flat = dna.encode('ascii') if isinstance(dna, str) else dna
+            packed_rows.append((digest[0] if digest else _record_digest(flat), pack_dna(flat, isqrt(len(flat))),
+                                is_mutant_result, detected_at, sequences))
+        cursor.executemany('''
+            INSERT OR IGNORE INTO dna_records 
+            (dna_digest, dna_packed, is_mutant, detected_at, sequences_discovered) 
+            VALUES (?, ?, ?, ?, ?)
+        ''', packed_rows)
+    else:
+        cursor.executemany('''
             INSERT OR IGNORE INTO dna_records 
             (dna, is_mutant, detected_at, sequences_discovered) 
             VALUES (?, ?, ?, ?)
-        ''', (
-            dna_str, 
-            is_mutant_result, 
-            datetime.now(),
-            str(extract_diagonals(dna)) if is_mutant_result else None
-        ))
+        ''', [(dna if isinstance(dna, str) else str(dna, 'ascii'), *rest[:3]) for dna, *rest in rows])
+
+def _write_batch(conn: sqlite3.Connection, rows: List[tuple], packed: bool, shared: Optional["SharedStats"]):
+    cursor = conn.cursor()
+    if shared is None:
+        _insert_records(cursor, rows, packed)
+        conn.commit()
+        return
+    # The trigger-maintained counters before and after the inserts give the rows really
+    # inserted; the shared counters get that delta atomically with the commit
+    cursor.execute("BEGIN IMMEDIATE")
+    mutant_before, human_before, _ = read_stats(conn)
+    _insert_records(cursor, rows, packed)
+    mutant_after, human_after, version = read_stats(conn)
+    with shared.locked():
         conn.commit()
-        conn.close()
-        logger.info(f"DNA record {'mutant' if is_mutant_result else 'non-mutant'} saved")
-    except sqlite3.IntegrityError:
-        logger.warning(f"DNA sequence {dna_str} already exists in database")
+        shared.add(mutant_after - mutant_before, human_after - human_before, version)
+
+def write_records(rows: List[tuple]):
+    """
+    Writes analysis records to the database in a single transaction, and adds the records
+    really inserted to the shared stats counters.
+
+    :param rows: (dna, is_mutant, detected_at, sequences_discovered) tuples, the DNA as the
+        joined rows or as its row-major bytes, optionally followed by its record_digest.
+    """
+    database = get_database()
+    conn = database.connection()
+    shared = get_shared_stats()
+    try:
+        try:
+            _write_batch(conn, rows, _records_layout(database, conn), shared)
+        except sqlite3.OperationalError:
+            # The table was migrated (or replaced) since its layout was detected
+            conn.rollback()
+            packed = _records_layout(database, conn, refresh=True)
+            _write_batch(conn, rows, packed, shared)
+        logger.info(f"{len(rows)} DNA records saved")
+    except Exception:
+        conn.rollback()
+        raise
+
+# Stats counters shared by the worker processes, unless DNA_SHARED_STATS=0 (or the platform
+# lacks flock), in which case /stats reads them from the database
+SHARED_STATS = os.environ.get("DNA_SHARED_STATS", "1") != "0" and SharedStats is not None
+SHARED_STATS_RECONCILE = float(os.environ.get("DNA_SHARED_STATS_RECONCILE", "30"))
+
+_shared_stats: Dict[str, "SharedStats"] = {}
+_shared_stats_lock = threading.Lock()
+_reconciler_pid: Optional[int] = None
+
+def _shared_stats_name(path: str) -> str:
+    return f"dna_stats_{hashlib.blake2b(path.encode(), digest_size=8).hexdigest()}"
+
+def reconcile_shared_stats(shared: Optional["SharedStats"] = None):
+    """
+    Overwrites the shared counters of the configured database with its own counters,
+    correcting any drift (e.g. records written by a process with shared stats disabled).
+
+    :param shared: The counters to reconcile; defaults to those of the configured database.
+    """
+    shared = shared or get_shared_stats()
+    if shared is None:
+        return
+    conn = get_database().connection()
+    # Installs the counters if needed, before taking the lock writers hold while committing
+    read_stats(conn)
+    with shared.locked():
+        shared.set(*read_stats(conn))
+    logger.info("Shared DNA stats reconciled with the database")
+
+def _reconcile_periodically():
+    while True:
+        time.sleep(SHARED_STATS_RECONCILE)
+        try:
+            # Only counters already in use: a database merely configured is left alone
+            shared = _shared_stats.get(get_database().path)
+            if shared is not None:
+                reconcile_shared_stats(shared)
+        except Exception as e:
+            logger.error(f"Error reconciling shared DNA stats: {e}")
+
+def get_shared_stats() -> Optional["SharedStats"]:
+    """
+    Returns the shared counters of the configured database, attaching to them on first use.
+    The first attach in a process seeds them from the database, and every process keeps a
+    thread reconciling them every DNA_SHARED_STATS_RECONCILE seconds.
+    """
+    global _reconciler_pid
+    if not SHARED_STATS:
+        return None
+    path = get_database().path
+    shared = _shared_stats.get(path)
+    if shared is None:
+        with _shared_stats_lock:
+            shared = _shared_stats.get(path)
+            if shared is None:
+                shared = SharedStats(_shared_stats_name(path))
+                try:
+                    reconcile_shared_stats(shared)
+                except Exception:
+                    shared.close(unlink=shared.created)
+                    raise
+                _shared_stats[path] = shared
+    if _reconciler_pid != os.getpid():
+        with _shared_stats_lock:
+            if _reconciler_pid != os.getpid():
+                _reconciler_pid = os.getpid()
+                threading.Thread(target=_reconcile_periodically, name="stats-reconciler", daemon=True).start()
+    return shared
+
+def close_shared_stats(unlink: bool = False):
+    """
+    Detaches the process from every shared counters segment, removing them if ``unlink``.
+    """
+    with _shared_stats_lock:
+        for shared in _shared_stats.values():
+            shared.close(unlink=unlink)
+        _shared_stats.clear()
+
+def get_stats() -> Tuple[int, int, int]:
+    """
+    Returns the mutant count, the human count and their version: from the shared counters
+    without any I/O when available, otherwise from the database counters.
+    """
+    shared = get_shared_stats()
+    if shared is not None:
+        return shared.read()
+    return read_stats(get_database().connection())
+
+def get_record_writer() -> write_behind.WriteBehindQueue:
+    """
+    Returns the write-behind queue of the process, creating it on first use. It is
+    flushed and stopped at interpreter exit, waiting at most WRITE_CLOSE_TIMEOUT seconds.
+    """
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = write_behind.WriteBehindQueue(write_records, batch_size=WRITE_BATCH_SIZE,
+                                                        max_delay=WRITE_MAX_DELAY)
+                atexit.register(_writer.close, WRITE_CLOSE_TIMEOUT)
+    return _writer
+
+def _forget_record_writer():
+    # The writer thread does not survive fork(); a child process starts its own queue
+    global _writer, _writer_lock
+    _writer = None
+    _writer_lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_record_writer)
+
+def flush_records(timeout: Optional[float] = None) -> bool:
+    """
+    Blocks until every record queued so far is written, so readers see all of them.
+
+    :param timeout: Longest time to wait in seconds, None to wait until done.
+    :return: True if the queue was drained, False on timeout or a failed write.
+    """
+    return _writer.flush(timeout) if _writer is not None else True
+
+def record_metrics() -> Dict[str, float]:
+    """
+    Depth and flush latency of the write-behind queue.
+    """
+    return get_record_writer().metrics()
+
+def record_dna_analysis(dna: DnaInput, analysis: AnalysisResult):
+    """
+    Record the DNA analysis results in the database
+
+    With write-behind enabled the record is queued and written by the background writer
+    in a batch; flush_records waits for it.
+
+    :param dna: List of strings representing each row of the analyzed DNA table, or the
+        analyzed DnaMatrix, whose buffer is queued without being decoded (copied first when
+        it is a view of the caller's buffer).
+    :param analysis: Result of analyze_dna for that table; its runs are stored as-is.
+    """
+    try:
+        if isinstance(dna, DnaMatrix):
+            _record(_owned(dna.buffer), analysis, record_digest(dna))
+        else:
+            _record(''.join(dna), analysis)
     except Exception as e:
         logger.error(f"Error recording DNA analysis: {e}")
-        raise
\ No newline at end of file
+        raise
+
+def _owned(buffer: Union[bytearray, memoryview]) -> Union[bytearray, bytes]:
+    # A view of the caller's buffer (DnaMatrix.view) may change or be released once the
+    # call returns, so what outlives the call keeps a copy
+    return bytes(buffer) if isinstance(buffer, memoryview) else buffer
+
+def _record(dna: Union[str, bytes], analysis: AnalysisResult, digest: Optional[bytes] = None):
+    row = (dna, analysis.is_mutant, datetime.now(), analysis.sequences_discovered())
+    if digest is not None:
+        row += (digest,)
+    if WRITE_BEHIND:
+        get_record_writer().put(row)
+    else:
+        write_records([row])
+    logger.info(f"DNA record {'mutant' if analysis.is_mutant else 'non-mutant'} {'queued' if WRITE_BEHIND else 'saved'}")
+
+# Line states by base digest of the recently submitted tables of at least DNA_EDIT_MIN_N
+# rows (0 remembers none) and of the edited ones, so edits on a large table only rescan the
+# lines through the edited cells
+EDIT_MIN_N = int(os.environ.get("DNA_EDIT_MIN_N", "128"))
+EDIT_STATES_BYTES = int(os.environ.get("DNA_EDIT_STATES_BYTES", str(256 * 1024 * 1024)))
+_line_states = ResultCache(max_bytes=EDIT_STATES_BYTES)
+
+def base_digest(dna: DnaInput) -> bytes:
+    """
+    Computes the digest analyze_edits finds a table by: the digest of its dna_records entry
+    followed by one byte, the symmetry (see storage.apply_symmetry) that turns the form that
+    digest is taken on back into the table. With CANONICAL_STORAGE that form is the
+    canonical one, so any rotation or mirror image of a recorded table can be edited in its
+    own orientation; without it, the table itself (symmetry 0).
+
+    :param dna: The table in any form accepted by as_matrix; only its shape is checked.
+    :return: The 17-byte base digest.
+    """
+    matrix = as_matrix(dna)
+    if not CANONICAL_STORAGE:
+        return dna_digest(matrix.buffer) + b"\0"
+    digest, symmetry = matrix.canonical()
+    return digest + bytes([INVERSE_SYMMETRY[symmetry]])
+
+def _remember_base(matrix: DnaMatrix):
+    # The lines are only scanned when the table is first edited
+    digest = base_digest(matrix)
+    if _line_states.get(digest) is None:
+        _line_states.put(digest, LineState(_owned(matrix.buffer), matrix.n))
+
+def analyze_edits(base: bytes, edits: List[Tuple[int, int, str]]) -> Tuple[AnalysisResult, bytes]:
+    """
+    Analyzes a recorded DNA table with some cells changed, rescanning only the rows, columns
+    and diagonals through the edited cells, and records the edited table.
+
+    The base is looked up among the tables submitted (with at least EDIT_MIN_N rows) or
+    edited before in this process, then in dna_records; its lines are scanned once on first
+    use. The edited table becomes a base itself.
+
+    :param base: base_digest of the table, as submitted.
+    :param edits: (row, column, base) changes, applied in order.
+    :return: The AnalysisResult of the edited table, and its base_digest.
+    :raises LookupError: If the base table is unknown.
+    :raises DnaValidationError: If an edit is outside the table or sets an invalid base.
+    """
+    try:
+        state = _line_state(base)
+        if state is None:
+            raise LookupError(f"Unknown base DNA {base.hex()}")
+        n = state.n
+        changes = []
+        for row, column, base in edits:
+            if not (isinstance(row, int) and isinstance(column, int) and 0 <= row < n and 0 <= column < n):
+                raise DnaValidationError("Edit position is outside the DNA matrix.", row=row, column=column)
+            if base not in ('A', 'T', 'C', 'G'):
+                raise DnaValidationError("DNA can only contain characters A, T, C, G.", row=row, column=column)
+            changes.append((row, column, ord(base)))
+
+        state = state.edit(changes)
+        mutant = state.is_mutant
+        result = AnalysisResult(mutant, state.locate_runs(limit=2) if mutant else [])
+        digest = base_digest(DnaMatrix(state.flat, n))
+        _line_states.put(digest, state)
+        _record(state.flat, result, digest[:DIGEST_SIZE])
+        logger.info(f"{'Mutant' if mutant else 'Non-mutant'} DNA sequence analyzed after {len(changes)} edits: "
+                    f"{result.sequences_discovered()}")
+        return result, digest
+    except Exception as e:
+        logger.error(f"Error analyzing DNA edits: {e}")
+        raise
+
+def _line_state(digest: bytes) -> Optional[LineState]:
+    state = _line_states.get(digest)
+    if state is None:
+        flat = _recorded_bases(digest)
+        if flat is None:
+            return None
+        state = LineState(flat, isqrt(len(flat)))
+    if state.flags is None:
+        # Scanned into a new state, so threads sharing the remembered one never see it half done
+        state = LineState.build(state.flat, state.n)
+        _line_states.put(digest, state)
+    return state
+
+def _recorded_bases(base: bytes) -> Optional[bytes]:
+    if len(base) != DIGEST_SIZE + 1 or base[-1] >= len(INVERSE_SYMMETRY):
+        return None
+    digest, symmetry = base[:-1], base[-1]
+    # Records still queued by the write-behind writer must be visible
+    flush_records()
+    database = get_database()
+    conn = database.connection()
+    if not _records_layout(database, conn, refresh=True):
+        return None
+    row = conn.execute('SELECT dna_packed FROM dna_records WHERE dna_digest = ?', (digest,)).fetchone()
+    if row is None:
+        return None
+    dna = unpack_dna(row[0])
+    n = len(dna)
+    flat = ''.join(dna).encode('ascii')
+    if dna_digest(flat) != digest:
+        # Stored in the orientation it was first seen in, under its canonical digest
+        flat = canonical_form(flat, n)
+        if dna_digest(flat) != digest:
+            return None
+    return apply_symmetry(flat, n, symmetry)
\ No newline at end of file
@@ -0,0 +1,219 @@
+"""
+Compact in-memory DNA matrix.
+
+A DnaMatrix holds the N*N bases of a table in one row-major bytearray, one ASCII byte per
+base, instead of N separate strings. It is built once per request, from the JSON list of
+rows, from bytes or from a raw file, or wraps a buffer the caller already holds (a NumPy
+uint8 array, bytes, an mmap) without copying it. It is accepted as it is by validation
+(encode_dna), detection, result keys and record persistence, which read its buffer in
+place. Rows, columns and diagonals are exposed as memoryview slices of that buffer,
+strided for everything but rows, and as NumPy views when NumPy is installed, so none of
+them copies a base.
+
+A matrix is treated as read-only once built: its buffer is handed to the engines and may
+be queued for writing as it is.
+"""
+import os
+from math import isqrt
+from typing import List, Optional, Sequence, Tuple, Union
+
+from storage import canonical_symmetry, dna_digest
+
+# NumPy is optional: without it only the memoryview accessors are available
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class DnaValidationError(ValueError):
+    """
+    Raised when a DNA table is rejected, carrying the position of the first offending row
+    and, for invalid characters, column (None when the error is not tied to a cell).
+    """
+
+    def __init__(self, message: str, row: Optional[int] = None, column: Optional[int] = None):
+        super().__init__(message)
+        self.row = row
+        self.column = column
+
+
+class DnaMatrix:
+    """
+    Square DNA matrix backed by one row-major bytearray, or by a byte memoryview of a
+    caller's buffer. Only the shape is checked when it is built; the alphabet is checked by
+    encode_dna.
+
+    :param buffer: The N*N bases, one ASCII byte each, row-major.
+    :param n: Size of the square matrix.
+    """
+    __slots__ = ("buffer", "n", "_canonical")
+
+    def __init__(self, buffer: Union[bytearray, memoryview], n: int):
+        if n <= 0 or len(buffer) != n * n:
+            raise DnaValidationError("DNA must be a square matrix of NxN.")
+        self.buffer = buffer
+        self.n = n
+        self._canonical: Optional[Tuple[bytes, int]] = None
+
+    @classmethod
+    def from_rows(cls, rows: List[str]) -> "DnaMatrix":
+        """
+        Encodes a table given as a list of row strings, as posted to /mutant/, with a single
+        join and a single encode into the buffer.
+
+        :param rows: List of strings representing each row of an NxN DNA sequence table.
+        :raises DnaValidationError: If the table is not a square of strings or holds
+            non-ASCII characters, with the first offending position.
+        """
+        if not rows:
+            raise DnaValidationError("DNA must be a list of strings.")
+        try:
+            joined = ''.join(rows)
+        except TypeError:
+            row = next(i for i, value in enumerate(rows) if not isinstance(value, str))
+            raise DnaValidationError("DNA must be a list of strings.", row=row) from None
+
+        n = len(rows)
+        # N rows adding up to N*N characters, none shorter than N, are all exactly N long
+        if len(joined) != n * n or min(map(len, rows)) != n:
+            row = next(i for i, value in enumerate(rows) if len(value) != n)
+            raise DnaValidationError("DNA must be a square matrix of NxN.", row=row)
+
+        try:
+            return cls(bytearray(joined, 'ascii'), n)
+        except UnicodeEncodeError as e:
+            raise DnaValidationError("DNA can only contain characters A, T, C, G.",
+                                     row=e.start // n, column=e.start % n) from None
+
+    @classmethod
+    def from_bytes(cls, data: bytes, n: Optional[int] = None) -> "DnaMatrix":
+        """
+        Copies N*N row-major bases from a bytes-like object.
+
+        :param data: The bases, one ASCII byte each.
+        :param n: Size of the square matrix; inferred from the length when omitted.
+        """
+        buffer = bytearray(data)
+        return cls(buffer, _size(len(buffer)) if n is None else n)
+
+    @classmethod
+    def from_file(cls, path: str, n: Optional[int] = None) -> "DnaMatrix":
+        """
+        Reads a raw matrix file (N*N bases, one byte each, row-major, as is_mutant_file
+        takes) straight into the buffer.
+
+        :param path: Path to the raw matrix file.
+        :param n: Size of the square matrix; inferred from the file size when omitted.
+        """
+        buffer = bytearray(os.path.getsize(path))
+        with open(path, 'rb') as f:
+            if f.readinto(buffer) != len(buffer):
+                raise ValueError(f"DNA file {path} changed while it was read")
+        return cls(buffer, _size(len(buffer)) if n is None else n)
+
+    @classmethod
+    def view(cls, data, shape: Union[int, Sequence[int], None] = None) -> "DnaMatrix":
+        """
+        Wraps an object exporting the buffer protocol (bytes, bytearray, memoryview,
+        array('B'), mmap, a C-contiguous NumPy array of one-byte items) without copying it.
+        The caller must not change the buffer while the matrix is in use.
+
+        :param data: The N*N bases, one ASCII byte each, row-major.
+        :param shape: (N, N) or N; defaults to the shape of a two-dimensional buffer.
+        :raises DnaValidationError: If the shape is missing or not square, or the buffer does
+            not hold contiguous single bytes.
+        """
+        buffer = memoryview(data)
+        if shape is None:
+            if buffer.ndim != 2:
+                raise DnaValidationError("A flat DNA buffer needs an explicit (N, N) shape.")
+            shape = buffer.shape
+        rows, columns = (shape, shape) if isinstance(shape, int) else shape
+        if rows != columns:
+            raise DnaValidationError("DNA must be a square matrix of NxN.")
+        if buffer.itemsize != 1:
+            raise DnaValidationError("DNA buffers must hold one byte per base.")
+        try:
+            buffer = buffer.cast('B')
+        except TypeError:
+            raise DnaValidationError("DNA buffers must be C-contiguous.") from None
+        return cls(buffer, rows)
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __repr__(self) -> str:
+        return f"DnaMatrix(n={self.n})"
+
+    def canonical(self) -> Tuple[bytes, int]:
+        """
+        Returns the digest of the canonical form (as storage.canonical_digest) and the
+        symmetry that builds that form from this matrix. Computed on first use only, so every
+        key taken from the matrix of a request shares one computation.
+        """
+        if self._canonical is None:
+            form, symmetry = canonical_symmetry(self.buffer, self.n)
+            self._canonical = (dna_digest(form), symmetry)
+        return self._canonical
+
+    def row(self, index: int) -> memoryview:
+        """
+        Returns row ``index`` as a contiguous view of the buffer.
+        """
+        n = self.n
+        return memoryview(self.buffer)[index * n:(index + 1) * n]
+
+    def column(self, index: int) -> memoryview:
+        """
+        Returns column ``index`` as a strided view of the buffer.
+        """
+        return memoryview(self.buffer)[index::self.n]
+
+    def diagonal(self, offset: int = 0) -> memoryview:
+        """
+        Returns a top-left to bottom-right diagonal as a strided view of the buffer.
+
+        :param offset: Column minus row of its cells: positive starts on the first row at
+            that column, negative on the first column at that row.
+        """
+        n = self.n
+        start = offset if offset >= 0 else -offset * n
+        return memoryview(self.buffer)[start:start + (n - abs(offset) - 1) * (n + 1) + 1:n + 1]
+
+    def anti_diagonal(self, offset: int = 0) -> memoryview:
+        """
+        Returns a top-right to bottom-left diagonal as a strided view of the buffer.
+
+        :param offset: N-1 minus row plus column of its cells: positive starts on the first
+            row that many columns from the right, negative on the last column at that row.
+        """
+        n = self.n
+        start = n - 1 - offset if offset >= 0 else (1 - offset) * n - 1
+        # A 1x1 matrix has a single cell, whatever the step
+        step = max(n - 1, 1)
+        return memoryview(self.buffer)[start:start + (n - abs(offset) - 1) * step + 1:step]
+
+    def array(self) -> "np.ndarray":
+        """
+        Returns the matrix as an (N, N) uint8 NumPy view of the buffer; ``array()[:, j]``,
+        ``np.diagonal`` and ``np.fliplr(...).diagonal`` are views as well.
+        """
+        if np is None:
+            raise RuntimeError("NumPy views of a DnaMatrix require NumPy")
+        return np.frombuffer(self.buffer, dtype=np.uint8).reshape(self.n, self.n)
+
+    def rows(self) -> List[str]:
+        """
+        Decodes the rows as strings, for callers that need the list form.
+        """
+        n = self.n
+        text = str(self.buffer, 'ascii', 'replace')
+        return [text[i * n:(i + 1) * n] for i in range(n)]
+
+
+def _size(length: int) -> int:
+    n = isqrt(length)
+    if n == 0 or n * n != length:
+        raise DnaValidationError("DNA must be a square matrix of NxN.")
+    return n
@@ -0,0 +1,223 @@
+"""
+Pluggable detection engines for the mutant DNA analysis.
+
+Every engine receives an already validated NxN matrix flattened into a bytes-like
+object (row-major, one ASCII byte per base) together with N, and returns True when
+more than one line (row, column, diagonal or anti-diagonal) contains a run of four
+identical bases.
+
+When no engine is requested, the engine is picked by select_engine: either the one named
+in the DNA_ENGINE environment variable, or with DNA_ENGINE=auto (the default) the fastest
+engine for the size bucket of N according to a calibration. The calibration is loaded
+from the file named in DNA_ENGINE_CALIBRATION when it exists, otherwise it is measured
+once by timing every engine on a run-free matrix per bucket (and saved to that file).
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+Engine = Callable[[bytes, int], bool]
+
+ENGINE_ENV = "DNA_ENGINE"
+CALIBRATION_ENV = "DNA_ENGINE_CALIBRATION"
+AUTO = "auto"
+
+# Slow string-based implementation every engine is checked against; never auto-selected
+REFERENCE_ENGINE = "python"
+# Used when the configured or calibrated engine does not support the size
+FALLBACK_ENGINE = "scanner"
+
+# (largest N of the bucket, N timed to represent it); the last bucket has no upper bound
+CALIBRATION_BUCKETS: Tuple[Tuple[Optional[int], int], ...] = (
+    (8, 6), (16, 12), (32, 24), (64, 48), (128, 96), (None, 192),
+)
+
+# Fastest engine per bucket, as (largest N of the bucket, engine name)
+Calibration = List[Tuple[Optional[int], str]]
+
+_ENGINES: Dict[str, Engine] = {}
+_MAX_N: Dict[str, int] = {}
+
+_calibration: Optional[Calibration] = None
+_calibration_lock = threading.Lock()
+
+
+def register_engine(name: str, detect: Engine, max_n: Optional[int] = None) -> Engine:
+    """
+    Registers a detection engine under the given name.
+
+    :param name: Name used to select the engine.
+    :param detect: Callable taking the flattened matrix and N, returning the mutant verdict.
+    :param max_n: Largest N the engine supports, None when unbounded.
+    :return: The registered callable, so it can be used as a decorator helper.
+    """
+    _ENGINES[name] = detect
+    if max_n is None:
+        _MAX_N.pop(name, None)
+    else:
+        _MAX_N[name] = max_n
+    return detect
+
+
+def get_engine(name: str) -> Engine:
+    """
+    Looks up a detection engine by name.
+
+    :param name: Name of a registered engine.
+    :return: The engine callable.
+    """
+    try:
+        return _ENGINES[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown detection engine '{name}'. Available engines: {', '.join(available_engines())}"
+        ) from None
+
+
+def available_engines() -> List[str]:
+    """
+    Lists the names of the engines that can be selected in this environment.
+
+    :return: Sorted list of engine names.
+    """
+    return sorted(_ENGINES)
+
+
+def supports(name: str, n: int) -> bool:
+    """
+    Tells whether a registered engine can analyze an NxN matrix.
+    """
+    return name in _ENGINES and n <= _MAX_N.get(name, n)
+
+
+def select_engine(n: int) -> str:
+    """
+    Picks the engine used for an NxN matrix when the caller does not name one.
+
+    :param n: Size of the square matrix.
+    :return: Name of a registered engine.
+    """
+    name = os.environ.get(ENGINE_ENV, AUTO)
+    if name != AUTO:
+        get_engine(name)
+    else:
+        name = next(engine for max_n, engine in get_calibration() if max_n is None or n <= max_n)
+    return name if supports(name, n) else FALLBACK_ENGINE
+
+
+def run_free_matrix(n: int) -> bytes:
+    """
+    Builds an NxN matrix without a single pair of equal neighbours in any direction, which
+    forces every engine through a full scan.
+    """
+    return bytes(b"ATCG"[(j + 2 * i) % 4] for i in range(n) for j in range(n))
+
+
+def calibrate(buckets: Optional[Sequence[Tuple[Optional[int], int]]] = None, repeat: int = 3) -> Calibration:
+    """
+    Times every engine on a run-free matrix per size bucket and keeps the fastest.
+
+    :param buckets: (largest N of the bucket, N timed to represent it) pairs, the last one unbounded.
+                    Defaults to CALIBRATION_BUCKETS.
+    :param repeat: Runs per engine and bucket; the best one counts.
+    :return: Fastest engine per bucket.
+    """
+    calibration: Calibration = []
+    for max_n, n in buckets or CALIBRATION_BUCKETS:
+        flat = run_free_matrix(n)
+        timings = {}
+        for name, detect in _ENGINES.items():
+            if name == REFERENCE_ENGINE or not supports(name, n):
+                continue
+            # The first run pays one-time costs such as table building or code generation
+            detect(flat, n)
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                detect(flat, n)
+                best = min(best, time.perf_counter() - start)
+            timings[name] = best
+        fastest = min(timings, key=timings.get)
+        logger.info(f"Engine calibration for N <= {max_n}: '{fastest}' ({timings[fastest] * 1e6:.1f}us)")
+        calibration.append((max_n, fastest))
+    return calibration
+
+
+def save_calibration(calibration: Calibration, path: str):
+    """
+    Saves a calibration as JSON.
+    """
+    with open(path, "w") as f:
+        json.dump([{"max_n": max_n, "engine": engine} for max_n, engine in calibration], f, indent=2)
+
+
+def load_calibration(path: str) -> Calibration:
+    """
+    Loads a calibration saved by save_calibration. Engines not available here are replaced
+    by the fallback engine.
+    """
+    with open(path) as f:
+        entries = json.load(f)
+    calibration = [(entry["max_n"], entry["engine"] if entry["engine"] in _ENGINES else FALLBACK_ENGINE)
+                   for entry in entries]
+    if not calibration or calibration[-1][0] is not None:
+        raise ValueError(f"Engine calibration {path} must end with an unbounded bucket")
+    return calibration
+
+
+def _load_or_calibrate(path: Optional[str]) -> Calibration:
+    if path and os.path.exists(path):
+        calibration = load_calibration(path)
+        logger.info(f"Engine calibration loaded from {path}")
+        return calibration
+    calibration = calibrate()
+    if path:
+        save_calibration(calibration, path)
+        logger.info(f"Engine calibration saved to {path}")
+    return calibration
+
+
+def init_engines(path: Optional[str] = None) -> Calibration:
+    """
+    Loads the engine calibration, measuring and saving it when no file exists yet.
+    Meant to be called at startup so the first request does not pay for the calibration.
+
+    :param path: Calibration file; defaults to the DNA_ENGINE_CALIBRATION environment variable.
+    :return: The calibration in use.
+    """
+    global _calibration
+    with _calibration_lock:
+        _calibration = _load_or_calibrate(path or os.environ.get(CALIBRATION_ENV))
+        return _calibration
+
+
+def get_calibration() -> Calibration:
+    """
+    Returns the calibration in use, initializing it on first use.
+    """
+    global _calibration
+    if _calibration is None:
+        with _calibration_lock:
+            if _calibration is None:
+                _calibration = _load_or_calibrate(os.environ.get(CALIBRATION_ENV))
+    return _calibration
+
+
+from . import bitplane_engine, codegen_engine, lut_engine, regex_engine, scanner_engine
+register_engine("bitplane", bitplane_engine.detect)
+register_engine("codegen", codegen_engine.detect)
+register_engine("lut", lut_engine.detect, max_n=lut_engine.MAX_N)
+register_engine("regex", regex_engine.detect)
+register_engine("scanner", scanner_engine.detect)
+
+# NumPy is optional: the engine is only offered when the dependency is installed.
+try:
+    from . import numpy_engine
+    register_engine("numpy", numpy_engine.detect)
+except ImportError:
+    logger.info("NumPy not available, 'numpy' detection engine disabled")
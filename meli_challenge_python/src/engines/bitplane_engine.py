@@ -0,0 +1,101 @@
+"""
+Big-integer bitplane detection engine (pure standard library).
+
+The matrix is split into four one-hot bitplanes, one Python int per base, where cell
+(i, j) maps to bit ``i * W + j`` and ``W = N + PADDING``. The padding column is always
+zero, so a run can never wrap from the end of one row into the next. Runs of four in
+each direction are then found with three shifts and ANDs per plane, using a step of
+1 (horizontal), W (vertical), W + 1 (diagonal) or W - 1 (anti-diagonal).
+"""
+from typing import Iterator, Tuple
+
+BASES = b"ATCG"
+PADDING = 1
+RUN_LENGTH = 4
+
+
+def _plane_tables():
+    """
+    Builds one translate table per base mapping that base to b'1' and everything else to b'0'.
+    """
+    tables = {}
+    for base in BASES:
+        table = bytearray(b"0" * 256)
+        table[base] = ord("1")
+        tables[base] = bytes(table)
+    return tables
+
+
+_PLANE_TABLES = _plane_tables()
+
+
+def build_planes(flat: bytes, n: int) -> Tuple[int, ...]:
+    """
+    Converts the flattened matrix into one padded bitplane per base.
+
+    :param flat: Row-major bytes-like object of length N*N holding the validated bases.
+    :param n: Size of the square matrix.
+    :return: Tuple with one int per base in ``BASES`` order.
+    """
+    flat = bytes(flat)
+    pad = b"." * PADDING
+    padded = pad.join(flat[i * n:(i + 1) * n] for i in range(n)) + pad
+    # Reversed so that cell 0 lands on the least significant bit
+    padded = padded[::-1]
+    return tuple(int(padded.translate(_PLANE_TABLES[base]), 2) for base in BASES)
+
+
+def _line_cells(n: int, i: int, j: int, di: int, dj: int) -> Iterator[Tuple[int, int]]:
+    """
+    Yields every cell of the line through (i, j) with direction (di, dj).
+    """
+    while 0 <= i - di < n and 0 <= j - dj < n:
+        i -= di
+        j -= dj
+    while 0 <= i < n and 0 <= j < n:
+        yield i, j
+        i += di
+        j += dj
+
+
+def _line_mask(n: int, width: int, i: int, j: int, di: int, dj: int) -> int:
+    """
+    Builds the bitmask of the line through (i, j) with direction (di, dj).
+    """
+    mask = bytearray((n * width + 7) // 8)
+    for ci, cj in _line_cells(n, i, j, di, dj):
+        bit = ci * width + cj
+        mask[bit >> 3] |= 1 << (bit & 7)
+    return int.from_bytes(mask, "little")
+
+
+def detect(flat: bytes, n: int) -> bool:
+    """
+    Determines if the flattened DNA matrix belongs to a mutant.
+
+    :param flat: Row-major bytes-like object of length N*N holding the validated bases.
+    :param n: Size of the square matrix.
+    :return: True if more than one line contains a run of four identical bases.
+    """
+    if n < RUN_LENGTH:
+        return False
+    width = n + PADDING
+    planes = build_planes(flat, n)
+
+    sequences_found = 0
+    for step, di, dj in ((1, 0, 1), (width, 1, 0), (width + 1, 1, 1), (width - 1, 1, -1)):
+        starts = 0
+        for plane in planes:
+            starts |= plane & (plane >> step) & (plane >> 2 * step) & (plane >> 3 * step)
+        if not starts:
+            continue
+
+        # Any start left once the first line is removed belongs to another line
+        i, j = divmod((starts & -starts).bit_length() - 1, width)
+        if starts & ~_line_mask(n, width, i, j, di, dj):
+            return True
+        sequences_found += 1
+        if sequences_found > 1:
+            return True
+
+    return False
@@ -0,0 +1,78 @@
+"""
+Per-N code generation detection engine.
+
+For a fixed N the 4-cell windows to compare are known ahead of time, so a straight-line
+function is generated for every size: one ``if`` per line chaining the exact index
+comparisons of its windows on the flat buffer, with no loops or range checks. Functions
+are compiled on first use and kept in an LRU cache keyed by N. Sizes above MAX_N, whose
+generated code would be too large to be worth compiling, use the scanner engine.
+"""
+import os
+from functools import lru_cache
+from typing import Callable, List, Tuple
+
+from . import scanner_engine
+
+RUN_LENGTH = 4
+
+# Largest N for which a function is generated; configurable through the environment
+MAX_N = int(os.environ.get("DNA_CODEGEN_MAX_N", "64"))
+CACHE_SIZE = 32
+
+
+def _lines(n: int) -> List[List[int]]:
+    """
+    Lists the flat indexes of every row, column, diagonal and anti-diagonal of length four or more.
+    """
+    lines = [[i * n + j for j in range(n)] for i in range(n)]
+    lines += [[i * n + j for i in range(n)] for j in range(n)]
+    for d in range(-(n - RUN_LENGTH), n - RUN_LENGTH + 1):
+        lines.append([i * n + i + d for i in range(n) if 0 <= i + d < n])
+        lines.append([i * n + n - 1 - i - d for i in range(n) if 0 <= n - 1 - i - d < n])
+    return lines
+
+
+def generate_source(n: int) -> str:
+    """
+    Generates the source of the unrolled detector for N.
+
+    :param n: Size of the square matrix.
+    :return: Source code defining ``detect(f)`` over a flat buffer of N*N bases.
+    """
+    body = ["def detect(f):", "    found = 0"]
+    if n >= RUN_LENGTH:
+        for line in _lines(n):
+            windows: List[Tuple[int, ...]] = [tuple(line[k:k + RUN_LENGTH]) for k in range(len(line) - RUN_LENGTH + 1)]
+            condition = " or ".join(" == ".join(f"f[{index}]" for index in window) for window in windows)
+            body += [f"    if {condition}:",
+                     "        found += 1",
+                     "        if found > 1:",
+                     "            return True"]
+    body.append("    return False")
+    return "\n".join(body) + "\n"
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_detector(n: int) -> Callable[[bytes], bool]:
+    """
+    Compiles the unrolled detector for N, caching it by N.
+
+    :param n: Size of the square matrix.
+    :return: Function taking the flat buffer and returning the mutant verdict.
+    """
+    namespace: dict = {}
+    exec(compile(generate_source(n), f"<dna-detector-{n}>", "exec"), namespace)
+    return namespace["detect"]
+
+
+def detect(flat: bytes, n: int) -> bool:
+    """
+    Determines if the flattened DNA matrix belongs to a mutant.
+
+    :param flat: Row-major bytes-like object of length N*N holding the validated bases.
+    :param n: Size of the square matrix.
+    :return: True if more than one line contains a run of four identical bases.
+    """
+    if n > MAX_N:
+        return scanner_engine.detect(flat, n)
+    return compile_detector(n)(flat)
@@ -0,0 +1,118 @@
+"""
+Lookup-table detection engine for small matrices (N <= 8).
+
+Bases are encoded at 2 bits each, so any line of up to eight bases packs into 16 bits.
+A 65 536-entry table, built lazily on first use, maps every packed line to the bitmask of
+positions where a run of four starts; ANDing it with a mask for the line's length answers
+"does this line contain a run" in one lookup.
+
+Everything that depends only on N is prepared once per size: the gather of every row,
+column and diagonal into 8-byte slots, and the length masks. A matrix is then packed,
+looked up and counted with a fixed number of C-level operations and no per-line loop.
+"""
+from operator import itemgetter
+from struct import Struct
+from typing import Dict, Optional, Tuple
+
+RUN_LENGTH = 4
+MAX_N = 8
+
+_CODES = bytes.maketrans(b"ACGT", b"\x00\x01\x02\x03")
+
+_table: Optional[bytes] = None
+
+# Per N: gather of the line slots, number of lines, per-line start masks as one int, the three
+# masks squeezing every 8-byte slot into 16 bits and the struct reading those 16 bits back
+_Plan = Tuple[itemgetter, int, int, int, int, int, Struct]
+_plans: Dict[int, _Plan] = {}
+
+
+def _build_table() -> bytes:
+    """
+    Builds the table mapping each 16-bit packed line to the bitmask of its run start positions.
+    """
+    table = bytearray(1 << (2 * MAX_N))
+    full = len(table) - 1
+    for start in range(MAX_N - RUN_LENGTH + 1):
+        outside = full & ~(0xFF << (2 * start))
+        for code in range(4):
+            # Four copies of the 2-bit code at the start position
+            run = (code * 0x55) << (2 * start)
+            # Walk every submask of the bits outside the run, i.e. every value of the other bases
+            other = 0
+            while True:
+                table[run | other] |= 1 << start
+                other = (other - outside) & outside
+                if not other:
+                    break
+    return bytes(table)
+
+
+def get_table() -> bytes:
+    """
+    Returns the lookup table, building it on first use.
+    """
+    global _table
+    if _table is None:
+        _table = _build_table()
+    return _table
+
+
+def _build_plan(n: int) -> _Plan:
+    """
+    Lists the cells of every line of length four or more, each padded to MAX_N slots.
+    """
+    lines = [[(i, j) for j in range(n)] for i in range(n)]
+    lines += [[(i, j) for i in range(n)] for j in range(n)]
+    for d in range(-(n - RUN_LENGTH), n - RUN_LENGTH + 1):
+        lines.append([(i, i + d) for i in range(n) if 0 <= i + d < n])
+        lines.append([(i, n - 1 - i - d) for i in range(n) if 0 <= n - 1 - i - d < n])
+
+    indexes = []
+    start_masks = bytearray()
+    for line in lines:
+        # Padding slots repeat cell 0; the start mask ignores them
+        indexes.extend(i * n + j for i, j in line)
+        indexes.extend([0] * (MAX_N - len(line)))
+        start_masks.append((1 << (len(line) - RUN_LENGTH + 1)) - 1)
+    count = len(lines)
+    return (itemgetter(*indexes), count, int.from_bytes(start_masks, "little"),
+            _repeat(0x000F000F000F000F, count), _repeat(0x000000FF000000FF, count), _repeat(0xFFFF, count),
+            Struct("<" + "H6x" * count))
+
+
+def _repeat(pattern: int, count: int) -> int:
+    """
+    Repeats a 64-bit pattern once per slot.
+    """
+    return int.from_bytes(pattern.to_bytes(8, "little") * count, "little")
+
+
+def detect(flat: bytes, n: int) -> bool:
+    """
+    Determines if the flattened DNA matrix belongs to a mutant.
+
+    :param flat: Row-major bytes-like object of length N*N holding the validated bases.
+    :param n: Size of the square matrix, at most MAX_N.
+    :return: True if more than one line contains a run of four identical bases.
+    """
+    if n > MAX_N:
+        raise ValueError(f"The lookup-table engine only supports matrices up to {MAX_N}x{MAX_N}")
+    if n < RUN_LENGTH:
+        return False
+    plan = _plans.get(n)
+    if plan is None:
+        plan = _plans[n] = _build_plan(n)
+    gather, line_count, start_masks, nibble_mask, byte_mask, word_mask, slots = plan
+    table = get_table()
+
+    # One byte per base in 8-byte slots, then squeezed to the low 16 bits of every slot
+    value = int.from_bytes(bytes(gather(bytes(flat).translate(_CODES))), "little")
+    value = (value | value >> 6) & nibble_mask
+    value = (value | value >> 12) & byte_mask
+    value = (value | value >> 24) & word_mask
+    packed = slots.unpack(value.to_bytes(8 * line_count, "little"))
+
+    hits = int.from_bytes(bytes(map(table.__getitem__, packed)), "little") & start_masks
+    sequences_found = line_count - hits.to_bytes(line_count, "little").count(0)
+    return sequences_found > 1
@@ -0,0 +1,120 @@
+"""
+NumPy detection engine.
+
+The matrix is viewed once as an (N, N) ``uint8`` array and runs of four are found with
+shifted-equality masks, one vectorized comparison per direction instead of a Python
+loop per window.
+"""
+import numpy as np
+
+RUN_LENGTH = 4
+
+
+def run_starts(grid: np.ndarray, di: int, dj: int) -> np.ndarray:
+    """
+    Builds the mask of cells where a run of four identical bases starts in direction (di, dj).
+
+    :param grid: (..., R, C) uint8 array of bases, optionally stacked along leading axes.
+    :param di: Row step of the direction (0 or 1).
+    :param dj: Column step of the direction (-1, 0 or 1).
+    :return: Boolean mask indexed by the start cell, restricted to cells where the run fits.
+    """
+    span = RUN_LENGTH - 1
+    rows = max(grid.shape[-2] - span * di, 0)
+    col_start = span if dj < 0 else 0
+    cols = max(grid.shape[-1] - span * abs(dj), 0)
+
+    def window(k: int) -> np.ndarray:
+        i0 = k * di
+        j0 = col_start + k * dj
+        return grid[..., i0:i0 + rows, j0:j0 + cols]
+
+    first = window(0)
+    mask = first == window(1)
+    for k in range(2, RUN_LENGTH):
+        mask &= first == window(k)
+    return mask
+
+
+def detect(flat: bytes, n: int) -> bool:
+    """
+    Determines if the flattened DNA matrix belongs to a mutant.
+
+    :param flat: Row-major bytes-like object of length N*N holding the validated bases.
+    :param n: Size of the square matrix.
+    :return: True if more than one line contains a run of four identical bases.
+    """
+    if n < RUN_LENGTH:
+        return False
+    grid = np.frombuffer(flat, dtype=np.uint8).reshape(n, n)
+
+    # Horizontal: one line per row
+    sequences_found = int(np.count_nonzero(run_starts(grid, 0, 1).any(axis=1)))
+    if sequences_found > 1:
+        return True
+
+    # Vertical: one line per column
+    sequences_found += int(np.count_nonzero(run_starts(grid, 1, 0).any(axis=0)))
+    if sequences_found > 1:
+        return True
+
+    # Diagonals: lines are identified by j - i
+    i, j = np.nonzero(run_starts(grid, 1, 1))
+    sequences_found += len(np.unique(j - i))
+    if sequences_found > 1:
+        return True
+
+    # Anti-diagonals: lines are identified by i + j (start columns are offset by 3)
+    i, j = np.nonzero(run_starts(grid, 1, -1))
+    sequences_found += len(np.unique(i + j))
+    return sequences_found > 1
+
+
+# Lookup table flagging the bytes that are valid DNA bases
+_VALID_BASES = np.zeros(256, dtype=bool)
+_VALID_BASES[list(b"ATCG")] = True
+
+
+def valid_alphabet(grids: np.ndarray) -> np.ndarray:
+    """
+    Checks the alphabet of a stack of matrices in one table lookup.
+
+    :param grids: (B, N, N) uint8 array of matrices.
+    :return: (B,) boolean array, True where the matrix only holds A, T, C and G.
+    """
+    return _VALID_BASES[grids].reshape(len(grids), -1).all(axis=1)
+
+
+def _count_lines(starts: np.ndarray, line_ids: np.ndarray, batch: int) -> np.ndarray:
+    """
+    Counts, per matrix, the distinct lines holding at least one run start.
+
+    :param starts: (B, R, C) boolean run-start mask.
+    :param line_ids: (R, C) non-negative line identifier of each start cell.
+    :param batch: Number of matrices B.
+    :return: (B,) array of line counts.
+    """
+    width = int(line_ids.max()) + 1
+    b, i, j = np.nonzero(starts)
+    lines = np.unique(b * width + line_ids[i, j])
+    return np.bincount(lines // width, minlength=batch)
+
+
+def detect_batch(grids: np.ndarray) -> np.ndarray:
+    """
+    Determines, for a stack of same-size matrices, which ones belong to a mutant.
+
+    :param grids: (B, N, N) uint8 array of validated matrices.
+    :return: (B,) boolean array of verdicts.
+    """
+    batch, n = grids.shape[0], grids.shape[1]
+    if n < RUN_LENGTH or batch == 0:
+        return np.zeros(batch, dtype=bool)
+    sequences_found = np.count_nonzero(run_starts(grids, 0, 1).any(axis=2), axis=1)
+    sequences_found += np.count_nonzero(run_starts(grids, 1, 0).any(axis=1), axis=1)
+
+    size = n - RUN_LENGTH + 1
+    i, j = np.indices((size, size))
+    sequences_found += _count_lines(run_starts(grids, 1, 1), j - i + size, batch)
+    sequences_found += _count_lines(run_starts(grids, 1, -1), i + j, batch)
+    return sequences_found > 1
@@ -0,0 +1,87 @@
+"""
+Single-pass raster scanner detection engine.
+
+The flattened matrix is walked once, row by row, using only index arithmetic on the
+original buffer. Run lengths are tracked for the current row and, in preallocated
+``bytearray`` counters, for every column, diagonal and anti-diagonal, so no string or
+list is created per line. The scan stops as soon as the second line with a run of four
+is found.
+"""
+RUN_LENGTH = 4
+
+# Marks a line that already produced a run, so it is only counted once
+_COUNTED = 0xFF
+
+
+def detect(flat: bytes, n: int) -> bool:
+    """
+    Determines if the flattened DNA matrix belongs to a mutant.
+
+    :param flat: Row-major bytes-like object of length N*N holding the validated bases.
+    :param n: Size of the square matrix.
+    :return: True if more than one line contains a run of four identical bases.
+    """
+    if n < RUN_LENGTH:
+        return False
+
+    # Run length per column, per diagonal (j - i + n - 1) and per anti-diagonal (i + j)
+    col_runs = bytearray(n)
+    diag_runs = bytearray(2 * n - 1)
+    anti_runs = bytearray(2 * n - 1)
+    sequences_found = 0
+    last = n - 1
+
+    for i in range(n):
+        row_start = i * n
+        row_run = 0
+        previous = -1
+        for j in range(n):
+            p = row_start + j
+            base = flat[p]
+
+            # Horizontal
+            if row_run != _COUNTED:
+                row_run = row_run + 1 if base == previous else 1
+                if row_run == RUN_LENGTH:
+                    sequences_found += 1
+                    if sequences_found > 1:
+                        return True
+                    row_run = _COUNTED
+            previous = base
+
+            # Vertical
+            run = col_runs[j]
+            if run != _COUNTED:
+                run = run + 1 if i and base == flat[p - n] else 1
+                if run == RUN_LENGTH:
+                    sequences_found += 1
+                    if sequences_found > 1:
+                        return True
+                    run = _COUNTED
+                col_runs[j] = run
+
+            # Diagonal, continuing from (i - 1, j - 1)
+            k = j - i + last
+            run = diag_runs[k]
+            if run != _COUNTED:
+                run = run + 1 if i and j and base == flat[p - n - 1] else 1
+                if run == RUN_LENGTH:
+                    sequences_found += 1
+                    if sequences_found > 1:
+                        return True
+                    run = _COUNTED
+                diag_runs[k] = run
+
+            # Anti-diagonal, continuing from (i - 1, j + 1)
+            k = i + j
+            run = anti_runs[k]
+            if run != _COUNTED:
+                run = run + 1 if i and j != last and base == flat[p - n + 1] else 1
+                if run == RUN_LENGTH:
+                    sequences_found += 1
+                    if sequences_found > 1:
+                        return True
+                    run = _COUNTED
+                anti_runs[k] = run
+
+    return False
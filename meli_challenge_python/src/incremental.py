@@ -0,0 +1,142 @@
+"""
+Incremental re-analysis of DNA matrices edited cell by cell.
+
+A LineState keeps, next to the bases of a matrix, one flag per line of length four or more
+(rows, columns, diagonals and anti-diagonals, in the order locate_runs scans them) telling
+whether the line holds a run of four. Building it scans every line once; after that, an
+edited matrix only needs the lines through its edited cells rescanned, at most four per
+cell, and the verdict is read from the flags: more than one flagged line is a mutant.
+"""
+import re
+from typing import Iterable, List, Optional, Set, Tuple
+
+from engines.regex_engine import DIAGONAL, HORIZONTAL, RUN_LENGTH, STEPS, VERTICAL, line_layout
+
+_RUN_PATTERN = re.compile(rb"AAAA|CCCC|GGGG|TTTT")
+
+# (row, column, base) with base one ASCII byte
+Edit = Tuple[int, int, int]
+
+
+class LineState:
+    """
+    Bases of a validated matrix and the run flag of each of its lines.
+
+    :param flat: Row-major bases, N*N bytes.
+    :param n: Size of the square matrix.
+    :param flags: One byte per line in locate_runs order, 1 when the line holds a run; None
+        until scan() runs.
+    """
+    __slots__ = ("flat", "n", "flags")
+
+    def __init__(self, flat: bytes, n: int, flags: Optional[bytearray] = None):
+        self.flat = flat
+        self.n = n
+        self.flags = flags
+
+    @classmethod
+    def build(cls, flat: bytes, n: int) -> "LineState":
+        """
+        Scans every line of a matrix once.
+        """
+        state = cls(bytes(flat), n)
+        state.scan()
+        return state
+
+    def scan(self) -> None:
+        """
+        Sets the flag of every line, scanning each of them.
+        """
+        flags = bytearray(len(line_layout(self.n)[1]) if self.n >= RUN_LENGTH else 0)
+        for line in range(len(flags)):
+            flags[line] = _RUN_PATTERN.search(self._line(line)) is not None
+        self.flags = flags
+
+    @property
+    def is_mutant(self) -> bool:
+        first = self.flags.find(1)
+        return first >= 0 and self.flags.find(1, first + 1) >= 0
+
+    def __sizeof__(self) -> int:
+        return object.__sizeof__(self) + len(self.flat) + len(self.flags or b"")
+
+    def edit(self, edits: Iterable[Edit]) -> "LineState":
+        """
+        Applies cell edits to a copy of the matrix, rescanning only the lines through them.
+
+        :param edits: (row, column, base) triples, already validated, base as an ASCII code.
+        :return: The state of the edited matrix; this one is left unchanged.
+        """
+        n = self.n
+        flat = bytearray(self.flat)
+        touched: Set[int] = set()
+        for row, column, base in edits:
+            flat[row * n + column] = base
+            touched.update(lines_through(n, row, column))
+        state = LineState(bytes(flat), n, bytearray(self.flags))
+        for line in touched:
+            state.flags[line] = _RUN_PATTERN.search(state._line(line)) is not None
+        return state
+
+    def locate_runs(self, limit: int = 2) -> List[Tuple[str, int, int]]:
+        """
+        Finds the first run of the first ``limit`` lines holding one, as regex_engine.locate_runs
+        does, but only scanning those lines.
+
+        :return: (direction, row, column) of the first cell of each run, in scan order.
+        """
+        origins = line_layout(self.n)[1] if self.flags else []
+        runs = []
+        line = self.flags.find(1)
+        while line >= 0 and len(runs) < limit:
+            direction, row, column = origins[line]
+            step = _RUN_PATTERN.search(self._line(line)).start()
+            row_step, column_step = STEPS[direction]
+            runs.append((direction, row + step * row_step, column + step * column_step))
+            line = self.flags.find(1, line + 1)
+        return runs
+
+    def _line(self, line: int) -> bytes:
+        n = self.n
+        direction, row, column = line_layout(n)[1][line]
+        start = row * n + column
+        if direction == HORIZONTAL:
+            return self.flat[start:start + n]
+        if direction == VERTICAL:
+            return self.flat[start::n]
+        if direction == DIAGONAL:
+            length, step = n - max(row, column), n + 1
+        else:
+            length, step = min(column + 1, n - row), n - 1
+        return self.flat[start:start + (length - 1) * step + 1:step]
+
+
+def lines_through(n: int, row: int, column: int) -> List[int]:
+    """
+    Lists the lines of length four or more through a cell, as indexes in locate_runs order:
+    rows, then columns, then for every k the diagonals and anti-diagonals starting k cells
+    from the corner, on the first row before the side column.
+
+    :param n: Size of the square matrix.
+    :return: Indexes of the row, column, diagonal and anti-diagonal of the cell that exist.
+    """
+    if n < RUN_LENGTH:
+        return []
+    lines = [row, n + column]
+    last = n - RUN_LENGTH
+    # Diagonal: starts on the first row at column k, or on the first column at row k
+    k = column - row
+    if abs(k) <= last:
+        lines.append(_diagonal_index(n, abs(k), 0 if k >= 0 else 1))
+    # Anti-diagonal: starts on the first row at column n-1-k, or on the last column at row k
+    k = n - 1 - (row + column)
+    if abs(k) <= last:
+        lines.append(_diagonal_index(n, abs(k), 2 if k >= 0 else 3))
+    return lines
+
+
+def _diagonal_index(n: int, k: int, kind: int) -> int:
+    # For k = 0 only the first-row diagonal and anti-diagonal exist (kinds 0 and 2)
+    if k == 0:
+        return 2 * n + kind // 2
+    return 2 * n + 2 + 4 * (k - 1) + kind
@@ -0,0 +1,198 @@
+"""
+Memo of per-line results shared across analyses, for traffic where many matrices reuse the
+same rows (templates, near-duplicates, generated fuzz).
+
+Every row, column, diagonal and anti-diagonal is looked up by its bytes. A known line is
+not scanned again; a new one is scanned once and remembered with whether it holds a run of
+four. The memo is bounded by entry count and by the bytes of its lines, evicting the oldest
+lines first.
+
+Lookups cost a hash of the line and building the lines costs about as much as the fastest
+engines spend on the whole matrix, so the memo only pays off when lines repeat and the
+engine is slow for the sizes seen. It therefore measures itself: analyses are timed per
+cell, first through the engine for a window, then through the memo, and after every window
+of memo analyses it turns itself off when its hit rate is below ``min_hit_rate`` or it cost
+more per cell than the engine did. While off, analyses go to the engine (re-measuring it)
+and the memo is tried again after ``probe_interval`` analyses, in case the traffic changed.
+"""
+import logging
+import re
+import threading
+import time
+from typing import Callable, Dict, Tuple
+
+from engines.regex_engine import RUN_LENGTH, build_lines
+
+logger = logging.getLogger(__name__)
+
+MAX_ENTRIES = 100000
+MAX_BYTES = 32 * 1024 * 1024
+MIN_HIT_RATE = 0.2
+WINDOW = 200
+PROBE_INTERVAL = 2000
+# Rough cost of an entry beyond the bytes of its line: the dict slot, key and result
+ENTRY_OVERHEAD = 80
+
+_RUN_PATTERN = re.compile(rb"AAAA|CCCC|GGGG|TTTT")
+
+def scan_line(line: bytes) -> bool:
+    """
+    Scans one line.
+
+    :param line: The bases of a row, column or diagonal.
+    :return: Whether it holds a run of four.
+    """
+    return _RUN_PATTERN.search(line) is not None
+
+
+class LineMemo:
+    """
+    Bounded memo of line results that turns itself off when it does not pay off.
+
+    :param max_entries: Largest number of lines remembered.
+    :param max_bytes: Largest total of remembered bytes, estimated.
+    :param min_hit_rate: Hit rate under which a window turns the memo off.
+    :param window: Analyses per measured window; the first window measures the engine.
+    :param probe_interval: Analyses made through the engine while off before the memo is tried again.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES,
+                 min_hit_rate: float = MIN_HIT_RATE, window: int = WINDOW, probe_interval: int = PROBE_INTERVAL):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.min_hit_rate = min_hit_rate
+        self.window = window
+        self.probe_interval = probe_interval
+        # Lookups go to the dict without the lock; only changes take it
+        self._entries: Dict[bytes, bool] = {}
+        self._lock = threading.Lock()
+        self.bytes = 0
+        # Off until the engine was measured over a first window
+        self.enabled = False
+        self.hits = 0
+        self.misses = 0
+        self.disables = 0
+        self._period = window
+        self._analyses = 0
+        self._window_hits = 0
+        self._window_lookups = 0
+        # Time and cells analyzed through the memo in this window, and through the engine
+        self._memo_seconds = self._memo_cells = 0.0
+        self._engine_seconds = self._engine_cells = 0.0
+        self.memo_cost = self.engine_cost = 0.0
+
+    def detect(self, flat: bytes, n: int, engine: Callable[[bytes, int], bool]) -> bool:
+        """
+        Determines if the flattened DNA matrix belongs to a mutant, through the memo while
+        it is on, scanning only the lines not seen before, otherwise through the engine.
+
+        :param flat: Row-major bytes-like object of length N*N holding the validated bases.
+        :param n: Size of the square matrix.
+        :param engine: Detection engine for N, used while the memo is off.
+        :return: True if more than one line contains a run of four identical bases.
+        """
+        if n < RUN_LENGTH:
+            return False
+        through_memo = self.enabled
+        start = time.perf_counter()
+        if through_memo:
+            result, hits, misses = self._detect(flat, n)
+        else:
+            result, hits, misses = engine(flat, n), 0, 0
+        self._count(through_memo, time.perf_counter() - start, n * n, hits, misses)
+        return result
+
+    def _detect(self, flat: bytes, n: int) -> Tuple[bool, int, int]:
+        entries = self._entries
+        hits = misses = sequences_found = 0
+        for line in build_lines(flat, n):
+            result = entries.get(line)
+            if result is None:
+                misses += 1
+                result = scan_line(line)
+                self._remember(line, result)
+            else:
+                hits += 1
+            if result:
+                sequences_found += 1
+                if sequences_found > 1:
+                    break
+        return sequences_found > 1, hits, misses
+
+    def clear(self) -> None:
+        """
+        Forgets every line; the counters are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Size, hit statistics and state, for monitoring.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'disables': self.disables,
+                'memo_ns_per_cell': round(self.memo_cost * 1e9, 3),
+                'engine_ns_per_cell': round(self.engine_cost * 1e9, 3),
+            }
+
+    def _remember(self, line: bytes, result: bool) -> None:
+        size = ENTRY_OVERHEAD + len(line)
+        if size > self.max_bytes or not self.enabled:
+            return
+        with self._lock:
+            if line in self._entries:
+                return
+            self._entries[line] = result
+            self.bytes += size
+            # Dicts keep insertion order, so the first key is the oldest line
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                del self._entries[oldest]
+                self.bytes -= ENTRY_OVERHEAD + len(oldest)
+
+    def _count(self, through_memo: bool, seconds: float, cells: int, hits: int, misses: int) -> None:
+        with self._lock:
+            if through_memo:
+                self.hits += hits
+                self.misses += misses
+                self._window_hits += hits
+                self._window_lookups += hits + misses
+                self._memo_seconds += seconds
+                self._memo_cells += cells
+            else:
+                self._engine_seconds += seconds
+                self._engine_cells += cells
+            self._analyses += 1
+            if self._analyses < self._period:
+                return
+            self._analyses = 0
+            if not self.enabled:
+                # Engine measured: try the memo for a window
+                self.engine_cost = self._engine_seconds / self._engine_cells
+                self._engine_seconds = self._engine_cells = 0.0
+                self.enabled = True
+                self._period = self.window
+                return
+            hit_rate = self._window_hits / self._window_lookups if self._window_lookups else 0.0
+            self.memo_cost = self._memo_seconds / self._memo_cells if self._memo_cells else 0.0
+            self._window_hits = self._window_lookups = 0
+            self._memo_seconds = self._memo_cells = 0.0
+            if hit_rate < self.min_hit_rate or self.memo_cost > self.engine_cost:
+                self.enabled = False
+                self.disables += 1
+                self._period = self.probe_interval
+                self._entries.clear()
+                self.bytes = 0
+                logger.info(f"Line memo turned off: hit rate {hit_rate:.2%} (minimum {self.min_hit_rate:.2%}), "
+                            f"{self.memo_cost * 1e9:.1f}ns per cell against {self.engine_cost * 1e9:.1f}ns "
+                            f"for the engine")
@@ -0,0 +1,151 @@
+"""
+Memory-mapped analysis of huge DNA matrices stored as raw files (one byte per base).
+
+The file is split into bands of rows. Each band is scanned together with a halo of the
+three rows above it, so vertical and diagonal runs crossing a band edge are found by the
+band holding their last cell. Bands report the lines (direction plus line id) holding a
+run, and the caller merges them, since a single line may have runs in several bands.
+"""
+import mmap
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterator, Optional, Set, Tuple
+
+import numpy as np
+
+from engines.numpy_engine import RUN_LENGTH, run_starts, valid_alphabet
+
+HALO = RUN_LENGTH - 1
+
+# Default band size in bytes, bounding the working set of every worker
+BAND_BYTES = 64 * 1024 * 1024
+
+Line = Tuple[str, int]
+
+# Mapping opened once per worker process by _attach
+_mapping: Optional[mmap.mmap] = None
+
+
+def matrix_size(path: str) -> int:
+    """
+    Infers N from the size of a raw matrix file.
+
+    :param path: Path to a file holding N*N bases, row-major, one byte each.
+    :return: N.
+    """
+    size = os.path.getsize(path)
+    n = int(size ** 0.5)
+    while n * n > size:
+        n -= 1
+    while (n + 1) * (n + 1) <= size:
+        n += 1
+    if n == 0 or n * n != size:
+        raise ValueError("DNA must be a square matrix of NxN.")
+    return n
+
+
+def bands(n: int, band_rows: int) -> Iterator[Tuple[int, int]]:
+    """
+    Splits the N rows into consecutive [start, stop) bands.
+    """
+    for start in range(0, n, band_rows):
+        yield start, min(start + band_rows, n)
+
+
+def scan_band(buffer, n: int, start: int, stop: int) -> Set[Line]:
+    """
+    Finds the lines holding a run of four whose last cell lies in rows [start, stop).
+
+    :param buffer: Buffer holding the whole matrix.
+    :param n: Size of the square matrix.
+    :param start: First row of the band.
+    :param stop: Row after the last row of the band.
+    :return: Up to two lines as (direction, line id) pairs; two means the DNA is a mutant.
+    """
+    first = max(start - HALO, 0)
+    grid = np.frombuffer(buffer, dtype=np.uint8, count=(stop - first) * n, offset=first * n).reshape(-1, n)
+    if not valid_alphabet(grid[start - first:][np.newaxis])[0]:
+        raise ValueError("DNA can only contain characters A, T, C, G.")
+
+    lines: Set[Line] = set()
+    if n < RUN_LENGTH:
+        return lines
+
+    # Horizontal runs only in the band's own rows, the halo belongs to the previous band
+    rows = np.flatnonzero(run_starts(grid[start - first:], 0, 1).any(axis=1))
+    lines.update(("horizontal", start + int(i)) for i in rows[:2])
+    if len(lines) > 1:
+        return lines
+
+    cols = np.flatnonzero(run_starts(grid, 1, 0).any(axis=0))
+    lines.update(("vertical", int(j)) for j in cols[:2])
+    if len(lines) > 1:
+        return lines
+
+    i, j = np.nonzero(run_starts(grid, 1, 1))
+    lines.update(("diagonal", int(d)) for d in np.unique(j - (i + first))[:2])
+    if len(lines) > 1:
+        return lines
+
+    # Anti-diagonal start columns are offset by the run span
+    i, j = np.nonzero(run_starts(grid, 1, -1))
+    lines.update(("anti-diagonal", int(s)) for s in np.unique(i + first + j + HALO)[:2])
+    return lines
+
+
+def _attach(path: str):
+    """
+    Worker initializer: maps the matrix file once, so bands are read from the shared page cache.
+    """
+    global _mapping
+    with open(path, "rb") as f:
+        _mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _scan_attached_band(n: int, start: int, stop: int) -> Set[Line]:
+    return scan_band(_mapping, n, start, stop)
+
+
+def scan_file(path: str, n: Optional[int] = None, workers: Optional[int] = None,
+              band_rows: Optional[int] = None) -> bool:
+    """
+    Determines if the DNA matrix stored in a raw file belongs to a mutant.
+
+    :param path: Path to a file holding N*N bases, row-major, one byte each.
+    :param n: Size of the square matrix; inferred from the file size when omitted.
+    :param workers: Number of worker processes; 1 scans the bands in the calling process.
+    :param band_rows: Rows per band; defaults to as many rows as fit in BAND_BYTES.
+    :return: True if mutant, False otherwise.
+    """
+    if n is None:
+        n = matrix_size(path)
+    elif n <= 0 or os.path.getsize(path) != n * n:
+        raise ValueError("DNA must be a square matrix of NxN.")
+    if band_rows is None:
+        band_rows = max(BAND_BYTES // n, 1)
+    workers = workers or os.cpu_count() or 1
+
+    lines: Set[Line] = set()
+    if workers == 1 or band_rows >= n:
+        # Not closed explicitly: arrays in a propagating traceback may still export the buffer
+        with open(path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        for start, stop in bands(n, band_rows):
+            lines |= scan_band(mapping, n, start, stop)
+            if len(lines) > 1:
+                return True
+        return False
+
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(path,))
+    try:
+        pending = {executor.submit(_scan_attached_band, n, start, stop) for start, stop in bands(n, band_rows)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                lines |= future.result()
+            if len(lines) > 1:
+                return True
+        return False
+    finally:
+        # Bands still queued are dropped once the verdict is known
+        executor.shutdown(wait=True, cancel_futures=True)
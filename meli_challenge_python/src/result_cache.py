@@ -0,0 +1,114 @@
+"""
+In-process cache of analysis results, for DNA tables submitted again (client retries,
+scanners) to skip validation and detection.
+
+Entries are kept in least-recently-used order and evicted from the oldest once either the
+entry count or the estimated memory in use goes over its bound; an optional time to live
+expires entries on lookup. Every operation takes one lock, so the cache can be shared by
+the request threads of a threaded server.
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+MAX_ENTRIES = 10000
+MAX_BYTES = 64 * 1024 * 1024
+# Rough cost of an entry beyond its key and value: the ordered dict node and the entry tuple
+ENTRY_OVERHEAD = 200
+
+
+class ResultCache:
+    """
+    Bounded LRU cache with optional TTL.
+
+    :param max_entries: Largest number of entries; 0 disables the cache.
+    :param max_bytes: Largest estimated memory in use, in bytes.
+    :param ttl: Seconds an entry stays valid, None to keep it until evicted.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES, ttl: Optional[float] = None):
+        if max_entries < 0 or max_bytes < 0:
+            raise ValueError("Cache bounds cannot be negative")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Returns the value cached for the key and marks it as recently used.
+
+        :return: The value, or None on a miss or an expired entry.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] < time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: Optional[int] = None) -> None:
+        """
+        Caches a value, evicting the least recently used entries to stay within bounds.
+
+        :param size: Estimated memory of the value in bytes; sys.getsizeof of it by default.
+        """
+        if not self.max_entries:
+            return
+        size = ENTRY_OVERHEAD + sys.getsizeof(key) + (sys.getsizeof(value) if size is None else size)
+        if size > self.max_bytes:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl else float("inf")
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, expires)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """
+        Drops every entry; the counters are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Size, memory in use and hit statistics, for monitoring.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
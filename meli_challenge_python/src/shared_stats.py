@@ -0,0 +1,119 @@
+"""
+Mutant and human counters shared by every worker process through shared memory.
+
+The counters live in a small named ``multiprocessing.shared_memory`` segment, so any
+worker (forked or started independently) attaches to the same one and /stats is served
+without touching the database. Updates are serialized by an exclusive ``flock`` on a lock
+file next to it, plus a thread lock within the process. Readers take no lock: the segment
+starts with a sequence number that is odd while an update is in progress, and a read is
+retried until it sees the same even sequence before and after copying the counters.
+
+Layout (little-endian unsigned 64-bit): sequence, mutant count, human count, version.
+"""
+import fcntl
+import os
+import struct
+import tempfile
+import threading
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+from typing import Iterator, Tuple
+
+_LAYOUT = struct.Struct("<QQQQ")
+_SEQUENCE = struct.Struct("<Q")
+
+Counts = Tuple[int, int, int]
+
+
+class SharedStats:
+    """
+    Attaches to (or creates, zeroed) the named counters segment; ``created`` tells which.
+
+    :param name: Name of the shared memory segment, also used for the lock file.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.lock_path = os.path.join(tempfile.gettempdir(), f"{name}.lock")
+        try:
+            self._segment = shared_memory.SharedMemory(name=name, create=True, size=_LAYOUT.size)
+            self._segment.buf[:_LAYOUT.size] = bytes(_LAYOUT.size)
+            self.created = True
+        except FileExistsError:
+            self._segment = shared_memory.SharedMemory(name=name)
+            self.created = False
+        # The segment outlives any single worker; keep the resource tracker from unlinking
+        # it when the process that created it exits
+        resource_tracker.unregister(self._segment._name, "shared_memory")
+        self._buffer = self._segment.buf
+        self._open_lock()
+
+    def _open_lock(self) -> None:
+        # flock belongs to the open file description, which fork() shares with the parent,
+        # so every process opens the lock file itself
+        self._pid = os.getpid()
+        self._thread_lock = threading.Lock()
+        self._lock_file = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """
+        Holds the exclusive update lock across processes and threads.
+        """
+        if self._pid != os.getpid():
+            self._open_lock()
+        with self._thread_lock:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def read(self) -> Counts:
+        """
+        Reads the counters without locking.
+
+        :return: The mutant count, the human count and the version.
+        """
+        buffer = self._buffer
+        while True:
+            sequence, mutant_count, human_count, version = _LAYOUT.unpack_from(buffer)
+            if not sequence & 1 and _SEQUENCE.unpack_from(buffer)[0] == sequence:
+                return mutant_count, human_count, version
+
+    def _write(self, mutant_count: int, human_count: int, version: int) -> None:
+        sequence = _SEQUENCE.unpack_from(self._buffer)[0]
+        _SEQUENCE.pack_into(self._buffer, 0, sequence + 1)
+        _LAYOUT.pack_into(self._buffer, 0, sequence + 1, mutant_count, human_count, version)
+        _SEQUENCE.pack_into(self._buffer, 0, sequence + 2)
+
+    def add(self, mutant_delta: int, human_delta: int, version: int) -> None:
+        """
+        Adds to the counters. Must be called while holding locked().
+
+        :param version: Version of the source counters after the change.
+        """
+        _, mutant_count, human_count, _ = _LAYOUT.unpack_from(self._buffer)
+        self._write(mutant_count + mutant_delta, human_count + human_delta, version)
+
+    def set(self, mutant_count: int, human_count: int, version: int) -> None:
+        """
+        Overwrites the counters, e.g. from the database. Must be called while holding locked().
+        """
+        self._write(mutant_count, human_count, version)
+
+    def close(self, unlink: bool = False) -> None:
+        """
+        Detaches from the segment, removing it and its lock file when ``unlink`` is set.
+        """
+        self._buffer = None
+        self._segment.close()
+        os.close(self._lock_file)
+        if unlink:
+            # unlink() unregisters the segment from the resource tracker, so it is registered back first
+            resource_tracker.register(self._segment._name, "shared_memory")
+            self._segment.unlink()
+            try:
+                os.remove(self.lock_path)
+            except FileNotFoundError:
+                pass
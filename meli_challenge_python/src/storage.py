@@ -0,0 +1,442 @@
+"""
+Compact storage format for the dna_records table.
+
+Every DNA table is stored as a BLOB holding a 4-byte little-endian N followed by the
+N*N bases packed at 2 bits each (A=0, C=1, G=2, T=3, first base in the high bits of the
+first byte). Uniqueness is carried by a fixed-size BLAKE2b-128 digest of the row-major
+bases instead of the full text, so the UNIQUE index holds 16 bytes per row. Writers may
+digest the canonical form of the table instead (``canonical_digest``), so that its
+rotations and mirror images, which always get the same verdict, share one record.
+
+Databases created with the former layout (``dna TEXT NOT NULL UNIQUE``) keep working and
+are converted online by ``migrate``, also available as ``python storage.py migrate``.
+
+The mutant and human counts are kept in the single row of dna_stats by triggers on
+dna_records, which only fire for rows really inserted (not for ignored duplicates) or
+deleted, together with a version bumped on every change. ``repair_stats`` (``python
+storage.py repair-stats``) recounts them from dna_records.
+"""
+import argparse
+import hashlib
+import logging
+import sqlite3
+import struct
+from math import isqrt
+from typing import List, Optional, Tuple
+
+from database import database_path
+from engines.regex_engine import locate_runs
+
+logger = logging.getLogger(__name__)
+
+TABLE = "dna_records"
+MIGRATION_TABLE = "dna_records_packed"
+LEGACY_TABLE = "dna_records_legacy"
+
+DIGEST_SIZE = 16
+CHUNK_SIZE = 10000
+
+PACKED_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        dna_digest BLOB NOT NULL UNIQUE,
+        dna_packed BLOB NOT NULL,
+        is_mutant BOOLEAN NOT NULL,
+        detected_at DATETIME NOT NULL,
+        sequences_discovered TEXT
+    )
+'''
+
+STATS_TABLE = "dna_stats"
+
+STATS_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS dna_stats (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        mutant_count INTEGER NOT NULL,
+        human_count INTEGER NOT NULL,
+        version INTEGER NOT NULL
+    )
+'''
+
+STATS_TRIGGERS = {
+    "dna_records_count_insert": '''
+        CREATE TRIGGER IF NOT EXISTS dna_records_count_insert AFTER INSERT ON dna_records
+        BEGIN
+            UPDATE dna_stats SET mutant_count = mutant_count + (NEW.is_mutant = 1),
+                                 human_count = human_count + (NEW.is_mutant = 0),
+                                 version = version + 1
+            WHERE id = 1;
+        END
+    ''',
+    "dna_records_count_delete": '''
+        CREATE TRIGGER IF NOT EXISTS dna_records_count_delete AFTER DELETE ON dna_records
+        BEGIN
+            UPDATE dna_stats SET mutant_count = mutant_count - (OLD.is_mutant = 1),
+                                 human_count = human_count - (OLD.is_mutant = 0),
+                                 version = version + 1
+            WHERE id = 1;
+        END
+    ''',
+}
+
+_COUNT_QUERY = f"SELECT COALESCE(SUM(is_mutant = 1), 0), COALESCE(SUM(is_mutant = 0), 0) FROM {TABLE}"
+
+_HEADER = struct.Struct("<I")
+# Base to base-4 digit, and packed byte to its four bases
+_TO_DIGITS = bytes.maketrans(b"ACGT", b"0123")
+_BYTE_BASES = [bytes(b"ACGT"[(byte >> shift) & 3] for shift in (6, 4, 2, 0)) for byte in range(256)]
+
+
+def dna_digest(flat: bytes) -> bytes:
+    """
+    Computes the uniqueness key of a DNA table.
+
+    :param flat: Row-major ASCII bases of the table; their length determines N.
+    :return: The 16-byte BLAKE2b digest.
+    """
+    return hashlib.blake2b(flat, digest_size=DIGEST_SIZE).digest()
+
+
+def canonical_form(flat: bytes, n: int) -> bytes:
+    """
+    Returns the smallest of the eight forms of a table under the symmetries of the square
+    (rotations, transposes and flips), which all have the same runs up to their position.
+
+    :param flat: Row-major ASCII bases, N*N bytes.
+    :param n: Size of the square matrix.
+    :return: The canonical row-major bases.
+    """
+    return canonical_symmetry(flat, n)[0]
+
+
+def canonical_symmetry(flat: bytes, n: int) -> Tuple[bytes, int]:
+    """
+    Returns the canonical form of a table together with the symmetry that produced it.
+
+    The forms are the table, its transpose, each with its rows in reverse order, and the
+    reversal of those four. Their first rows are read with O(N) slices and only the forms
+    starting with the smallest one are built, usually just one. Packing maps A < C < G < T
+    to increasing digits, as ASCII orders them, so this is also the form with the smallest
+    packed encoding.
+
+    :param flat: Row-major ASCII bases, N*N bytes.
+    :param n: Size of the square matrix.
+    :return: The canonical row-major bases, and the symmetry (0-7) such that
+        ``apply_symmetry(flat, n, symmetry)`` is that form.
+    """
+    flat = bytes(flat)
+    first_column = flat[0::n]
+    last_column = flat[n - 1::n]
+    # First row of each form, in symmetry order
+    first_rows = (flat[:n], flat[:-n - 1:-1], flat[-n:], flat[n - 1::-1],
+                  first_column, last_column[::-1], first_column[::-1], last_column)
+    smallest = min(first_rows)
+    candidates = [symmetry for symmetry, first_row in enumerate(first_rows) if first_row == smallest]
+    if len(candidates) == 1:
+        return apply_symmetry(flat, n, candidates[0]), candidates[0]
+    return min((apply_symmetry(flat, n, symmetry), symmetry) for symmetry in candidates)
+
+
+def apply_symmetry(flat: bytes, n: int, symmetry: int) -> bytes:
+    """
+    Builds one of the eight forms of a table: 0 the table, 1 its half turn, 2 its rows in
+    reverse order, 3 its columns in reverse order, 4 its transpose, 5 its anti-transpose,
+    6 its quarter turn clockwise, 7 counterclockwise. INVERSE_SYMMETRY undoes each.
+
+    :param flat: Row-major ASCII bases, N*N bytes.
+    :param n: Size of the square matrix.
+    :param symmetry: Index of the form, 0 to 7.
+    :return: The row-major bases of the form.
+    """
+    flat = bytes(flat)
+    if symmetry == 0:
+        return flat
+    if symmetry == 1:
+        return flat[::-1]
+    if symmetry == 2:
+        return _flip_rows(flat, n)
+    if symmetry == 3:
+        return _flip_rows(flat, n)[::-1]
+    if symmetry == 4:
+        return _transpose(flat, n)
+    if symmetry == 5:
+        return _transpose(flat, n)[::-1]
+    if symmetry == 6:
+        return _turn(flat, n)
+    if symmetry == 7:
+        return _turn(flat, n)[::-1]
+    raise ValueError(f"Unknown symmetry {symmetry}")
+
+
+# Symmetry undoing each one: the quarter turns undo each other, the others undo themselves
+INVERSE_SYMMETRY = (0, 1, 2, 3, 4, 5, 7, 6)
+
+
+def _flip_rows(flat: bytes, n: int) -> bytes:
+    return b"".join(flat[start:start + n] for start in range((n - 1) * n, -1, -n))
+
+
+def _transpose(flat: bytes, n: int) -> bytes:
+    return b"".join(flat[column::n] for column in range(n))
+
+
+def _turn(flat: bytes, n: int) -> bytes:
+    # A quarter turn clockwise: the transpose of the table with its rows in reverse order
+    return b"".join(flat[column::n][::-1] for column in range(n))
+
+
+def canonical_digest(flat: bytes, n: int) -> bytes:
+    """
+    Computes the uniqueness key shared by a DNA table and its rotations and mirror images.
+
+    :param flat: Row-major ASCII bases, N*N bytes.
+    :param n: Size of the square matrix.
+    :return: The 16-byte BLAKE2b digest of canonical_form.
+    """
+    return dna_digest(canonical_form(flat, n))
+
+
+def pack_dna(flat: bytes, n: int) -> bytes:
+    """
+    Packs a validated DNA table at 2 bits per base behind a 4-byte N header.
+
+    The bases are read as one base-4 number, which int() converts in linear time for
+    power-of-two bases, so the packing runs in C.
+
+    :param flat: Row-major ASCII bases, N*N bytes.
+    :param n: Size of the square matrix.
+    :return: The packed BLOB.
+    """
+    size = n * n
+    packed_size = (size + 3) // 4
+    if not size:
+        return _HEADER.pack(n)
+    # Pad with A (digit 0) up to a whole byte
+    digits = bytes(flat).translate(_TO_DIGITS) + b"0" * (packed_size * 4 - size)
+    return _HEADER.pack(n) + int(digits, 4).to_bytes(packed_size, "big")
+
+
+def unpack_dna(blob: bytes) -> List[str]:
+    """
+    Restores the rows of a DNA table packed by pack_dna.
+
+    :param blob: The packed BLOB.
+    :return: List of strings representing each row.
+    """
+    (n,) = _HEADER.unpack_from(blob)
+    flat = b"".join(map(_BYTE_BASES.__getitem__, blob[_HEADER.size:]))
+    text = flat[:n * n].decode("ascii")
+    return [text[i * n:(i + 1) * n] for i in range(n)]
+
+
+def uses_packed_format(conn: sqlite3.Connection, table: str = TABLE) -> bool:
+    """
+    Tells whether the table uses the packed layout (True) or the former TEXT one (False).
+    """
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    return "dna_digest" in columns
+
+
+def install_stats(conn: sqlite3.Connection) -> None:
+    """
+    Creates dna_stats and its triggers on dna_records, seeding the counters from
+    dna_records when the row does not exist yet. Runs in one write transaction, so no
+    insert can slip between the seed count and the triggers.
+
+    :param conn: Connection to a database holding dna_records; left without a transaction.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(STATS_SCHEMA)
+        for trigger in STATS_TRIGGERS.values():
+            conn.execute(trigger)
+        if conn.execute(f"SELECT 1 FROM {STATS_TABLE} WHERE id = 1").fetchone() is None:
+            mutant_count, human_count = conn.execute(_COUNT_QUERY).fetchone()
+            conn.execute(f"INSERT INTO {STATS_TABLE} (id, mutant_count, human_count, version) VALUES (1, ?, ?, 1)",
+                         (mutant_count, human_count))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def read_stats(conn: sqlite3.Connection) -> Tuple[int, int, int]:
+    """
+    Reads the maintained counters, installing them first if the table or its row is missing
+    (e.g. on a database init_db never ran on).
+
+    :return: The mutant count, the human count and the version of the counters.
+    """
+    try:
+        row = conn.execute(f"SELECT mutant_count, human_count, version FROM {STATS_TABLE} WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        if conn.execute(f"PRAGMA table_info({STATS_TABLE})").fetchall():
+            raise
+        row = None
+    if row is None:
+        install_stats(conn)
+        return read_stats(conn)
+    return row
+
+
+def repair_stats(conn: sqlite3.Connection) -> Tuple[int, int, int]:
+    """
+    Recounts the counters from dna_records and recreates missing triggers. The version is
+    bumped, so cached /stats responses are revalidated.
+
+    :return: The mutant count, the human count and the new version.
+    """
+    install_stats(conn)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        mutant_count, human_count = conn.execute(_COUNT_QUERY).fetchone()
+        conn.execute(f"UPDATE {STATS_TABLE} SET mutant_count = ?, human_count = ?, version = version + 1 WHERE id = 1",
+                     (mutant_count, human_count))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    logger.info(f"DNA stats repaired: {mutant_count} mutant, {human_count} human")
+    return read_stats(conn)
+
+
+def _convert_rows(rows: List[tuple]) -> List[tuple]:
+    """
+    Converts former-layout rows to packed rows, recomputing the compact runs of mutants
+    that still hold the former list of every diagonal.
+    """
+    converted = []
+    for record_id, text, is_mutant, detected_at, sequences in rows:
+        flat = text.encode("ascii")
+        n = isqrt(len(flat))
+        if sequences is not None and sequences.startswith("["):
+            sequences = ';'.join(f"{d}{r},{c}" for d, r, c in locate_runs(flat, n)) or None
+        converted.append((record_id, dna_digest(flat), pack_dna(flat, n), is_mutant, detected_at, sequences))
+    return converted
+
+
+def _copy_after(conn: sqlite3.Connection, last_id: int, limit: int) -> Tuple[int, int]:
+    """
+    Copies up to ``limit`` former-layout rows with an id above ``last_id`` into the
+    migration table, keeping their ids.
+
+    :return: The number of rows read and the last id copied.
+    """
+    rows = conn.execute(
+        f"SELECT id, dna, is_mutant, detected_at, sequences_discovered FROM {TABLE} "
+        f"WHERE id > ? ORDER BY id LIMIT ?", (last_id, limit)
+    ).fetchall()
+    if rows:
+        conn.executemany(
+            f"INSERT OR IGNORE INTO {MIGRATION_TABLE} "
+            f"(id, dna_digest, dna_packed, is_mutant, detected_at, sequences_discovered) "
+            f"VALUES (?, ?, ?, ?, ?, ?)", _convert_rows(rows)
+        )
+        last_id = rows[-1][0]
+    return len(rows), last_id
+
+
+def migrate(path: str, chunk_size: int = CHUNK_SIZE, keep_legacy: bool = False) -> int:
+    """
+    Converts a dna_records table from the former TEXT layout to the packed layout online.
+
+    Rows are copied by id in chunks, each one in its own short transaction, so the API
+    keeps reading and inserting meanwhile; records are never updated, so copying by id
+    misses nothing. The last chunk and the swap of the tables run in a single write
+    transaction, after which the former table is emptied in chunks and dropped. An
+    interrupted copy resumes where it stopped.
+
+    :param path: Path to the SQLite database.
+    :param chunk_size: Rows copied per transaction.
+    :param keep_legacy: Keep the former table as dna_records_legacy instead of dropping it.
+    :return: Number of rows copied.
+    """
+    conn = sqlite3.connect(path, isolation_level=None)
+    try:
+        if uses_packed_format(conn) or not conn.execute(f"PRAGMA table_info({TABLE})").fetchall():
+            logger.info(f"{path} already uses the packed DNA storage format")
+            return 0
+
+        conn.execute(PACKED_SCHEMA.format(table=MIGRATION_TABLE))
+        last_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {MIGRATION_TABLE}").fetchone()[0]
+        copied = 0
+        while True:
+            conn.execute("BEGIN")
+            count, last_id = _copy_after(conn, last_id, chunk_size)
+            conn.execute("COMMIT")
+            copied += count
+            if count < chunk_size:
+                break
+            logger.info(f"Migrated {copied} DNA records of {path}")
+
+        # Writers are blocked only while the rows inserted since the last chunk are copied
+        conn.execute("BEGIN IMMEDIATE")
+        while True:
+            count, last_id = _copy_after(conn, last_id, chunk_size)
+            copied += count
+            if count < chunk_size:
+                break
+        # The counters stay valid since both tables hold the same rows; only the triggers move
+        has_stats = conn.execute(f"PRAGMA table_info({STATS_TABLE})").fetchall()
+        for name in STATS_TRIGGERS:
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+        conn.execute(f"ALTER TABLE {TABLE} RENAME TO {LEGACY_TABLE}")
+        conn.execute(f"ALTER TABLE {MIGRATION_TABLE} RENAME TO {TABLE}")
+        if has_stats:
+            for trigger in STATS_TRIGGERS.values():
+                conn.execute(trigger)
+        conn.execute("COMMIT")
+
+        if not keep_legacy:
+            # Freeing the pages is journaled, so the former table is emptied in chunks too
+            while conn.execute(
+                f"DELETE FROM {LEGACY_TABLE} WHERE id IN (SELECT id FROM {LEGACY_TABLE} LIMIT ?)", (chunk_size,)
+            ).rowcount:
+                pass
+            conn.execute(f"DROP TABLE {LEGACY_TABLE}")
+        logger.info(f"Migrated {copied} DNA records of {path} to the packed storage format")
+        return copied
+    except Exception as e:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        logger.error(f"Error migrating DNA records of {path}: {e}")
+        raise
+    finally:
+        conn.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Maintenance commands for the DNA records database.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    migrate_parser = commands.add_parser("migrate", help="Convert dna_records to the packed storage format.")
+    migrate_parser.add_argument("database", nargs="?", default=database_path(),
+                                help="Database file; defaults to the DATABASE_URL one.")
+    migrate_parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    migrate_parser.add_argument("--keep-legacy", action="store_true",
+                                help="Keep the former table as dna_records_legacy.")
+    migrate_parser.add_argument("--vacuum", action="store_true",
+                                help="Rebuild the file afterwards to return the freed pages to the OS.")
+    repair_parser = commands.add_parser("repair-stats", help="Rebuild the dna_stats counters from dna_records.")
+    repair_parser.add_argument("database", nargs="?", default=database_path(),
+                               help="Database file; defaults to the DATABASE_URL one.")
+    args = parser.parse_args(argv)
+
+    if args.command == "repair-stats":
+        conn = sqlite3.connect(args.database, isolation_level=None)
+        try:
+            mutant_count, human_count, version = repair_stats(conn)
+        finally:
+            conn.close()
+        print(f"DNA stats rebuilt: {mutant_count} mutant, {human_count} human (version {version})")
+        return
+
+    copied = migrate(args.database, chunk_size=args.chunk_size, keep_legacy=args.keep_legacy)
+    if args.vacuum:
+        conn = sqlite3.connect(args.database)
+        conn.execute("VACUUM")
+        conn.close()
+    print(f"{copied} DNA records migrated")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Streaming mutant detection over rows arriving one at a time.
+
+Rows are consumed as they are read (e.g. from a socket or a file), so the whole matrix
+never has to be held in memory. Only the previous row and O(N) run-length counters per
+column, diagonal and anti-diagonal are kept, and the verdict is settled as soon as the
+second line with a run of four is seen.
+"""
+from typing import Optional
+
+RUN_LENGTH = 4
+
+# Marks a line that already produced a run, so it is only counted once
+_COUNTED = 0xFF
+
+
+class StreamingDetector:
+    """
+    Incremental mutant detector fed one row at a time.
+
+    Only O(N) run-length state is kept: the previous row, the run per column and the run
+    along the diagonal and anti-diagonal ending in each column of the previous row. The
+    verdict is known as soon as the second line with a run of four arrives, so callers can
+    stop reading input early. The rows are validated with the same rules as is_mutant.
+    """
+
+    __slots__ = ("_n", "_rows", "_sequences_found", "_mutant", "_previous",
+                 "_col_runs", "_diag_runs", "_anti_runs", "_next_diag_runs", "_next_anti_runs")
+
+    def __init__(self):
+        self._n: Optional[int] = None
+        self._rows = 0
+        self._sequences_found = 0
+        self._mutant = False
+        self._previous: Optional[bytes] = None
+
+    @property
+    def rows_fed(self) -> int:
+        return self._rows
+
+    def feed(self, row: str) -> bool:
+        """
+        Adds the next row of the DNA table.
+
+        :param row: String holding the next row; its length fixes N when it is the first row.
+        :return: True once the DNA is known to belong to a mutant, False while undecided.
+        """
+        if not isinstance(row, str):
+            raise ValueError("DNA must be a list of strings.")
+        if self._n is None:
+            self._start(len(row))
+        if len(row) != self._n or self._rows >= self._n:
+            raise ValueError("DNA must be a square matrix of NxN.")
+        # Stripping the valid bases from both ends only leaves something behind if another character exists
+        if row.strip("ATCG"):
+            raise ValueError("DNA can only contain characters A, T, C, G.")
+
+        self._rows += 1
+        if not self._mutant:
+            self._scan(row.encode("ascii"))
+        return self._mutant
+
+    def result(self) -> bool:
+        """
+        Returns the verdict for the complete DNA table.
+
+        :return: True if mutant, False otherwise.
+        """
+        if not self._rows:
+            raise ValueError("DNA must be a list of strings.")
+        if self._rows != self._n:
+            raise ValueError("DNA must be a square matrix of NxN.")
+        return self._mutant
+
+    def _start(self, n: int):
+        self._n = n
+        self._col_runs = bytearray(n)
+        self._diag_runs = bytearray(n)
+        self._anti_runs = bytearray(n)
+        self._next_diag_runs = bytearray(n)
+        self._next_anti_runs = bytearray(n)
+
+    def _scan(self, row: bytes):
+        n = self._n
+        last = n - 1
+        previous_row = self._previous
+        col_runs = self._col_runs
+        diag_runs, next_diag_runs = self._diag_runs, self._next_diag_runs
+        anti_runs, next_anti_runs = self._anti_runs, self._next_anti_runs
+        sequences_found = self._sequences_found
+        row_run = 0
+        previous = -1
+
+        for j in range(n):
+            base = row[j]
+
+            # Horizontal
+            if row_run != _COUNTED:
+                row_run = row_run + 1 if base == previous else 1
+                if row_run == RUN_LENGTH:
+                    sequences_found += 1
+                    row_run = _COUNTED
+            previous = base
+
+            # Vertical
+            run = col_runs[j]
+            if run != _COUNTED:
+                run = run + 1 if previous_row is not None and base == previous_row[j] else 1
+                if run == RUN_LENGTH:
+                    sequences_found += 1
+                    run = _COUNTED
+                col_runs[j] = run
+
+            # Diagonal, continuing from (i - 1, j - 1)
+            run = diag_runs[j - 1] if j and previous_row is not None else 0
+            if run != _COUNTED:
+                run = run + 1 if run and base == previous_row[j - 1] else 1
+                if run == RUN_LENGTH:
+                    sequences_found += 1
+                    run = _COUNTED
+            next_diag_runs[j] = run
+
+            # Anti-diagonal, continuing from (i - 1, j + 1)
+            run = anti_runs[j + 1] if j != last and previous_row is not None else 0
+            if run != _COUNTED:
+                run = run + 1 if run and base == previous_row[j + 1] else 1
+                if run == RUN_LENGTH:
+                    sequences_found += 1
+                    run = _COUNTED
+            next_anti_runs[j] = run
+
+            if sequences_found > 1:
+                self._mutant = True
+                break
+
+        self._sequences_found = sequences_found
+        self._previous = row
+        # The runs ending in this row become the previous row's runs for the next one
+        self._diag_runs, self._next_diag_runs = next_diag_runs, diag_runs
+        self._anti_runs, self._next_anti_runs = next_anti_runs, anti_runs
@@ -0,0 +1,183 @@
+"""
+Write-behind queue that moves database writes off the request threads.
+
+Producers enqueue items and return immediately. A single background thread drains the
+queue in batches handed to a writer callable, which is expected to write each batch in one
+transaction (group commit). A batch is written as soon as ``batch_size`` items are
+pending or the oldest pending item has waited ``max_delay`` seconds, whichever comes
+first. flush() blocks until everything enqueued before the call has been written, which
+gives readers a consistent view, and close() flushes and stops the thread.
+
+A batch whose write fails is put back at the head of the queue and retried with
+exponential backoff, so no item is dropped and the write order is kept; flush() returns
+False as soon as a write fails instead of waiting for the retries.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 256
+MAX_DELAY = 0.05
+RETRY_DELAY = 0.05
+RETRY_MAX_DELAY = 5.0
+
+
+class WriteBehindQueue:
+    """
+    Batches items for a background writer.
+
+    :param write_batch: Callable writing a list of items, in one transaction.
+    :param batch_size: Largest batch, and the depth that triggers a write without waiting.
+    :param max_delay: Longest time in seconds an item waits before its batch is written.
+    """
+
+    def __init__(self, write_batch: Callable[[List[Any]], None], batch_size: int = BATCH_SIZE,
+                 max_delay: float = MAX_DELAY):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self._write_batch = write_batch
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._pending: Deque[Tuple[float, Any]] = deque()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        # Items enqueued and items handled so far; flush() waits for the latter to catch up
+        self._enqueued = 0
+        self._handled = 0
+        self._flush_target = 0
+        # Backoff after a failed write: current delay, and when the next attempt is due
+        self._retry_delay = 0.0
+        self._retry_at = 0.0
+        self.batches = 0
+        self.records = 0
+        self.errors = 0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+
+    @property
+    def depth(self) -> int:
+        """
+        Number of items waiting to be written.
+        """
+        return len(self._pending)
+
+    def put(self, item: Any) -> None:
+        """
+        Enqueues an item, starting the writer thread on first use.
+        """
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Write-behind queue is closed")
+            self._pending.append((time.monotonic(), item))
+            self._enqueued += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+            if len(self._pending) == 1 or len(self._pending) >= self.batch_size:
+                self._condition.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Writes every item enqueued before the call without waiting for the time bound.
+
+        :param timeout: Longest time to wait in seconds, None to wait until done.
+        :return: True if everything was written, False on timeout or when a write failed
+            (the failed items stay queued for a retry).
+        """
+        with self._condition:
+            target = self._enqueued
+            if self._handled >= target:
+                return True
+            errors = self.errors
+            self._flush_target = max(self._flush_target, target)
+            self._condition.notify_all()
+            self._condition.wait_for(lambda: self._handled >= target or self.errors > errors, timeout)
+            return self._handled >= target
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Flushes the queue and stops the writer thread. Further put() calls raise.
+
+        :param timeout: Longest time to wait in seconds, None to wait until done. Items
+            still unwritten when it expires (e.g. the database keeps failing) are logged.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+            if thread.is_alive():
+                logger.error(f"Write-behind queue closed with {self.depth} items unwritten")
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Queue depth and write statistics, for monitoring.
+        """
+        return {
+            'depth': self.depth,
+            'batches': self.batches,
+            'records': self.records,
+            'errors': self.errors,
+            'last_flush_seconds': round(self.last_flush_seconds, 6),
+            'max_flush_seconds': round(self.max_flush_seconds, 6),
+            'retry_seconds': round(self._retry_delay, 6),
+        }
+
+    def _next_batch(self) -> Optional[List[Tuple[float, Any]]]:
+        """
+        Waits until a batch is due and takes it off the queue, with the enqueue times; None
+        once closed and drained.
+        """
+        with self._condition:
+            while True:
+                if self._pending:
+                    now = time.monotonic()
+                    if now < self._retry_at:
+                        self._condition.wait(self._retry_at - now)
+                        continue
+                    due = self._pending[0][0] + self.max_delay
+                    if (self._closed or len(self._pending) >= self.batch_size
+                            or self._flush_target > self._handled or now >= due):
+                        count = min(len(self._pending), self.batch_size)
+                        return [self._pending.popleft() for _ in range(count)]
+                    self._condition.wait(due - now)
+                elif self._closed:
+                    return None
+                else:
+                    self._condition.wait()
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            start = time.perf_counter()
+            try:
+                self._write_batch([item for _, item in batch])
+                written = True
+            except Exception as e:
+                written = False
+                logger.error(f"Error writing a batch of {len(batch)} records: {e}", exc_info=True)
+            elapsed = time.perf_counter() - start
+            with self._condition:
+                if written:
+                    self._handled += len(batch)
+                    self.batches += 1
+                    self.records += len(batch)
+                    self._retry_delay = self._retry_at = 0.0
+                else:
+                    # Back at the head of the queue, in order, for the next attempt
+                    self._pending.extendleft(reversed(batch))
+                    self.errors += 1
+                    self._retry_delay = min(max(self._retry_delay * 2, RETRY_DELAY), RETRY_MAX_DELAY)
+                    self._retry_at = time.monotonic() + self._retry_delay
+                    logger.warning(f"Retrying {len(batch)} records in {self._retry_delay:.2f}s")
+                self.last_flush_seconds = elapsed
+                self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+                self._condition.notify_all()
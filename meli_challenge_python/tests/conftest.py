@@ -0,0 +1,39 @@
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import dna_analysis
+from database import configure_database
+
+@pytest.fixture
+def database(tmp_path):
+    """
+    Points the records at a fresh, uninitialized database file for the test, and back at the
+    configured one afterwards. Yields its path.
+    """
+    # Records queued by other tests must not be written into this test's database
+    dna_analysis.flush_records()
+    path = str(tmp_path / 'dna_records.db')
+    configure_database(path)
+    yield path
+    dna_analysis.flush_records()
+    dna_analysis.close_shared_stats(unlink=True)
+    configure_database()
+
+@pytest.fixture
+def tmp_database(database, monkeypatch):
+    """
+    The fresh database, with records written as they are recorded instead of by the
+    write-behind writer.
+    """
+    monkeypatch.setattr(dna_analysis, "WRITE_BEHIND", False)
+    return database
+
+@pytest.fixture
+def records_database(tmp_database):
+    """
+    The fresh database with written-as-recorded records, initialized by init_db.
+    """
+    dna_analysis.init_db()
+    return tmp_database
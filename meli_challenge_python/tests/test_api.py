@@ -2,12 +2,22 @@ import pytest
 from flask import json
 import sys
 import os
+import random
+import sqlite3
+import tempfile
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
-from api import app, init_db
+# Keep the API log of the tests out of the repository's logs directory
+os.environ.setdefault('LOG_DIR', tempfile.mkdtemp())
+from api import app, init_db, limiter, result_cache
+from dna_analysis import flush_records
+from storage import canonical_digest
 
 @pytest.fixture
-def client():
+def client(database):
     init_db()
+    # Every test starts with the per-client rate limits and the result cache untouched
+    limiter.reset()
+    result_cache.clear()
     app.config['TESTING'] = True
     with app.test_client() as client:
         yield client
@@ -33,6 +43,35 @@ def test_mutant_endpoint_with_invalid_dna(client):
     assert response.status_code == 400
     assert response.get_json() == {'error': 'DNA must be a list of strings'}
 
+def test_mutant_endpoint_records_runs(client, database):
+    random.seed(41)
+    # Rows are scanned first, so the two horizontal runs are the ones recorded
+    dna = ["AAAAAAAA", "CCCCCCCC"] + [''.join(random.choice('ATCG') for _ in range(8)) for _ in range(6)]
+    response = client.post('/mutant/', json={'dna': dna})
+    assert response.status_code == 200
+
+    assert flush_records(timeout=10)
+    conn = sqlite3.connect(database)
+    stored = conn.execute(
+        'SELECT is_mutant, sequences_discovered FROM dna_records WHERE dna_digest = ?',
+        (canonical_digest(''.join(dna).encode('ascii'), 8),)
+    ).fetchone()
+    conn.close()
+    assert stored == (1, "H0,0;H1,0")
+
+def test_mutant_endpoint_reports_invalid_position(client):
+    response = client.post('/mutant/', json={
+        'dna': ["ATGCGA", "CAGTGC", "TTATXT", "AGAAGG", "CCCCTA", "TCACTG"]
+    })
+    assert response.status_code == 400
+    assert response.get_json() == {
+        'error': 'DNA can only contain characters A, T, C, G.', 'row': 2, 'column': 4
+    }
+
+    response = client.post('/mutant/', json={'dna': ["ATGC", "CAGT", "TTA", "AGAA"]})
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'DNA must be a square matrix of NxN.', 'row': 2}
+
 def test_mutant_endpoint_with_missing_dna(client):
     response = client.post('/mutant/', json={})
     assert response.status_code == 400
@@ -52,4 +91,173 @@ def test_stats_endpoint(client):
     assert response.status_code == 200
     assert 'count_mutant_dna' in data
     assert 'count_human_dna' in data
-    assert 'ratio' in data
\ No newline at end of file
+    assert 'ratio' in data
+
+def test_stats_endpoint_on_database_never_initialized(database):
+    # A database in the former layout, created before the counters existed
+    conn = sqlite3.connect(database)
+    conn.execute('''
+        CREATE TABLE dna_records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            dna TEXT NOT NULL UNIQUE,
+            is_mutant BOOLEAN NOT NULL,
+            detected_at DATETIME NOT NULL,
+            sequences_discovered TEXT
+        )
+    ''')
+    conn.executemany(
+        'INSERT INTO dna_records (dna, is_mutant, detected_at) VALUES (?, ?, ?)',
+        [("ATGCCAGTTTATAGAA", 1, '2024-11-26 12:00:00'), ("ATGCCAGTTTCTAGAA", 0, '2024-11-26 12:00:00'),
+         ("ATGCCAGTTTGTAGAA", 0, '2024-11-26 12:00:00')]
+    )
+    conn.commit()
+    conn.close()
+
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        response = client.get('/stats')
+    assert response.status_code == 200
+    assert response.get_json() == {'count_mutant_dna': 1, 'count_human_dna': 2, 'ratio': 0.3333}
+
+def test_stats_endpoint_does_not_wait_for_the_writer(client, monkeypatch):
+    import api
+    import dna_analysis
+    flushes = []
+    monkeypatch.setattr(api, 'flush_records', lambda: flushes.append(True))
+    assert client.get('/stats').status_code == 200
+    assert flushes == ([] if dna_analysis.SHARED_STATS else [True])
+    # Only the database counters need the queued records written first
+    monkeypatch.setattr(dna_analysis, 'SHARED_STATS', False)
+    assert client.get('/stats').status_code == 200
+    assert flushes[-1:] == [True]
+
+def test_stats_endpoint_revalidates_with_etag(client):
+    response = client.get('/stats')
+    etag = response.headers['ETag']
+    assert response.status_code == 200
+
+    response = client.get('/stats', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+
+    random.seed(43)
+    client.post('/mutant/', json={'dna': [''.join(random.choice('ATCG') for _ in range(8)) for _ in range(8)]})
+    assert flush_records(timeout=10)
+    response = client.get('/stats', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+def test_repeated_dna_is_answered_from_records(client):
+    dna = ["ATGCGA", "CAGTGC", "TTATTT", "AGACGG", "GCGTCA", "TCACTG"]
+    before = client.get('/metrics').get_json()['record_lookup']
+    assert client.post('/mutant/', json={'dna': dna}).status_code == 403
+    assert flush_records(timeout=10)
+    # As seen by another worker, without the table in its result cache
+    result_cache.clear()
+    response = client.post('/mutant/', json={'dna': dna})
+    assert response.status_code == 403
+    assert response.get_json() == {'message': 'Human DNA detected'}
+    after = client.get('/metrics').get_json()['record_lookup']
+    assert (after['hits'] - before['hits'], after['misses'] - before['misses']) == (1, 1)
+    assert client.get('/stats').get_json()['count_human_dna'] == 1
+
+def test_resubmitted_dna_is_answered_from_the_result_cache(client, monkeypatch):
+    dna = ["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"]
+    assert client.post('/mutant/', json={'dna': dna}).status_code == 200
+    before = result_cache.metrics()
+
+    import api
+    monkeypatch.setattr(api, 'lookup_or_analyze_dna', None)
+    response = client.post('/mutant/', json={'dna': dna})
+    assert response.status_code == 200
+    assert response.get_json() == {'message': 'Mutant DNA detected'}
+    after = client.get('/metrics').get_json()['result_cache']
+    assert after['hits'] - before['hits'] == 1 and after['entries'] == 1 and after['bytes'] > 0
+
+    # Invalid tables are never cached, so they are still rejected
+    monkeypatch.undo()
+    response = client.post('/mutant/', json={'dna': ["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTX"]})
+    assert response.status_code == 400
+
+def test_rotated_dna_shares_the_cached_result(client):
+    dna = ["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"]
+    assert client.post('/mutant/', json={'dna': dna}).status_code == 200
+    before = result_cache.metrics()
+    # The same table turned a quarter and mirrored
+    turned = [''.join(row[column] for row in reversed(dna)) for column in range(6)]
+    for variant in (turned, [row[::-1] for row in dna], dna[::-1]):
+        assert client.post('/mutant/', json={'dna': variant}).status_code == 200
+    after = result_cache.metrics()
+    assert after['hits'] - before['hits'] == 3 and after['entries'] == 1
+    assert flush_records(timeout=10)
+    assert client.get('/stats').get_json()['count_mutant_dna'] == 1
+
+def test_mirrored_dna_is_recorded_without_canonical_storage(client, monkeypatch):
+    import dna_analysis
+    monkeypatch.setattr(dna_analysis, 'CANONICAL_STORAGE', False)
+    dna = ["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"]
+    for variant in (dna, [row[::-1] for row in dna], dna):
+        assert client.post('/mutant/', json={'dna': variant}).status_code == 200
+    # The mirror image is a cache miss and a record of its own; the resubmission is a hit
+    assert result_cache.metrics()['entries'] == 2
+    assert flush_records(timeout=10)
+    assert client.get('/stats').get_json()['count_mutant_dna'] == 2
+
+def test_canonical_form_is_computed_once_per_request(client, monkeypatch):
+    import dna_matrix
+    calls = []
+    canonical_symmetry = dna_matrix.canonical_symmetry
+    monkeypatch.setattr(dna_matrix, 'canonical_symmetry', lambda flat, n: calls.append(n) or canonical_symmetry(flat, n))
+    dna = ["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"]
+    assert client.post('/mutant/', json={'dna': dna}).status_code == 200
+    assert flush_records(timeout=10)
+    assert calls == [6]
+    assert client.get('/stats').get_json()['count_mutant_dna'] == 1
+
+def test_mutant_edits_endpoint(client):
+    import dna_analysis
+    random.seed(81)
+    for _ in range(8):
+        dna = [''.join(random.choice('ATCG') for _ in range(6)) for _ in range(6)]
+        response = client.post('/mutant/', json={'dna': dna})
+        base = response.headers['X-DNA-Digest']
+        assert base == dna_analysis.base_digest(dna).hex()
+        assert flush_records(timeout=10)
+        # Found in dna_records, as by a worker that never saw the table
+        dna_analysis._line_states.clear()
+        response = client.patch(f'/mutant/{base}', json={'edits': []})
+        assert response.status_code in (200, 403)
+        assert response.get_json()['digest'] == base == response.headers['X-DNA-Digest']
+
+    # Past the per-client limit of 10 requests per minute
+    limiter.reset()
+    dna = ["ATGCGA", "CAGTGC", "TTATTT", "AGACGG", "GCGTCA", "TCACTG"]
+    base = client.post('/mutant/', json={'dna': dna}).headers['X-DNA-Digest']
+    # A run of T down the first column and another along the third row
+    response = client.patch(f'/mutant/{base}', json={'edits': [[2, 2, 'T'], [1, 0, 'T'], [3, 0, 'T'], [4, 0, 'T']]})
+    assert response.status_code == 200
+    edited = response.get_json()['digest']
+    assert response.get_json()['message'] == 'Mutant DNA detected'
+    # Edits chain on the edited table, also from another worker once it is written
+    assert flush_records(timeout=10)
+    dna_analysis._line_states.clear()
+    response = client.patch(f'/mutant/{edited}', json={'edits': [[2, 3, 'G']]})
+    assert response.status_code == 403 and response.get_json()['digest'] != edited
+
+    limiter.reset()
+    assert client.patch('/mutant/xyz', json={'edits': []}).status_code == 400
+    assert client.patch(f'/mutant/{base[:32]}', json={'edits': []}).status_code == 400
+    assert client.patch(f'/mutant/{base[:32]}09', json={'edits': []}).status_code == 400
+    assert client.patch(f'/mutant/{"0" * 34}', json={'edits': []}).status_code == 404
+    assert client.patch(f'/mutant/{base}', json={'edits': [[1, 2]]}).status_code == 400
+    response = client.patch(f'/mutant/{base}', json={'edits': [[6, 0, 'A']]})
+    assert response.status_code == 400
+    assert (response.get_json()['row'], response.get_json()['column']) == (6, 0)
+
+def test_metrics_endpoint(client):
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert set(response.get_json()['record_lookup']) == {'hits', 'misses', 'hit_rate'}
+    metrics = response.get_json()['write_behind']
+    assert set(metrics) == {'depth', 'batches', 'records', 'errors', 'last_flush_seconds', 'max_flush_seconds',
+                            'retry_seconds'}
@@ -0,0 +1,21 @@
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from engines import get_engine
+from engines.bitplane_engine import BASES, build_planes, detect
+
+def test_bitplane_engine_is_registered():
+    assert get_engine("bitplane") is detect
+
+def test_build_planes_are_one_hot_and_padded():
+    dna = ["ATCG", "GCTA", "AATT", "CCGG"]
+    planes = build_planes(''.join(dna).encode('ascii'), 4)
+    width = 5
+    for i, row in enumerate(dna):
+        for j, char in enumerate(row):
+            bits = [(plane >> (i * width + j)) & 1 for plane in planes]
+            assert bits == [int(ord(char) == base) for base in BASES]
+        # The padding column never holds a base
+        assert all((plane >> (i * width + 4)) & 1 == 0 for plane in planes)
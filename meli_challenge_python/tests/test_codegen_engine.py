@@ -0,0 +1,28 @@
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from dna_analysis import is_mutant
+from engines import codegen_engine, get_engine
+from engines.codegen_engine import compile_detector, detect, generate_source
+
+def test_codegen_engine_is_registered():
+    assert get_engine("codegen") is detect
+
+def test_generated_source_is_straight_line():
+    source = generate_source(4)
+    assert "for " not in source and "while " not in source
+    assert "f[0] == f[1] == f[2] == f[3]" in source
+    assert "f[3] == f[6] == f[9] == f[12]" in source
+
+def test_compiled_detectors_are_cached_by_size():
+    assert compile_detector(6) is compile_detector(6)
+    assert compile_detector(6) is not compile_detector(7)
+
+def test_codegen_engine_falls_back_above_max_n(monkeypatch):
+    monkeypatch.setattr(codegen_engine, "MAX_N", 5)
+    compile_detector.cache_clear()
+    dna = ["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"]
+    assert is_mutant(dna, engine="codegen") is True
+    assert compile_detector.cache_info().currsize == 0
@@ -0,0 +1,92 @@
+import pytest
+import sys
+import os
+import sqlite3
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import database
+from database import ConnectionManager, configure_database, database_path, get_connection
+
+def test_database_path_from_url(monkeypatch):
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    assert database_path() == "dna_records.db"
+    monkeypatch.setenv("DATABASE_URL", "sqlite:///example.db")
+    assert database_path() == "example.db"
+    assert database_path("sqlite:////var/lib/dna/records.db") == "/var/lib/dna/records.db"
+    with pytest.raises(ValueError, match="Unsupported DATABASE_URL"):
+        database_path("postgresql://localhost/dna")
+
+def test_connection_per_thread_with_tuned_pragmas(tmp_path):
+    manager = ConnectionManager(str(tmp_path / 'records.db'))
+    conn = manager.connection()
+    assert manager.connection() is conn
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+    assert conn.execute("PRAGMA mmap_size").fetchone()[0] == database.MMAP_SIZE
+    assert conn.execute("PRAGMA cache_size").fetchone()[0] == database.CACHE_SIZE
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(manager.connection()))
+    thread.start()
+    thread.join()
+    assert other[0] is not conn
+
+    manager.close_all()
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+    assert manager.connection() is not conn
+    manager.close_all()
+
+def test_readers_do_not_block_the_writer(tmp_path):
+    manager = ConnectionManager(str(tmp_path / 'records.db'))
+    writer = manager.connection()
+    writer.execute("CREATE TABLE t (x INTEGER)")
+    writer.commit()
+
+    reader = sqlite3.connect(manager.path, timeout=0)
+    reader.execute("BEGIN")
+    assert reader.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+    # The open read transaction neither blocks the write nor sees it
+    writer.execute("INSERT INTO t VALUES (1)")
+    writer.commit()
+    assert reader.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+    reader.execute("COMMIT")
+    assert reader.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 1
+    reader.close()
+    manager.close_all()
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="fork() is not available")
+def test_child_process_gets_its_own_connection(tmp_path):
+    manager = ConnectionManager(str(tmp_path / 'records.db'))
+    parent = manager.connection()
+    parent.execute("CREATE TABLE t (pid INTEGER)")
+    parent.commit()
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            child = manager.connection()
+            child.execute("INSERT INTO t VALUES (?)", (os.getpid(),))
+            child.commit()
+            # The parent's connection is kept, so it is not closed when collected either
+            os._exit(0 if child is not parent and parent in database._abandoned else 1)
+        except BaseException:
+            os._exit(2)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    assert parent.execute("SELECT pid FROM t").fetchall() == [(pid,)]
+    manager.close_all()
+
+def test_configure_database_switches_files(tmp_path, monkeypatch):
+    first = configure_database(str(tmp_path / 'first.db'))
+    try:
+        conn = get_connection()
+        assert first.path == str(tmp_path / 'first.db')
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'second.db'}")
+        second = configure_database()
+        assert second.path == str(tmp_path / 'second.db')
+        assert get_connection() is not conn
+    finally:
+        monkeypatch.delenv("DATABASE_URL")
+        configure_database()
@@ -2,9 +2,17 @@ import pytest
 import sys
 import os
 import random
+import re
+import tracemalloc
+from array import array
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
-from dna_analysis import check_sequence, extract_diagonals, is_mutant
+import dna_analysis
+from dna_analysis import (
+    AnalysisResult, DnaValidationError, analyze_dna, check_sequence, encode_dna, extract_diagonals,
+    is_mutant, is_mutant_batch, result_key
+)
+from engines import get_engine, select_engine
 
 def test_check_sequence():
     """
@@ -166,5 +174,212 @@ def test_is_mutant():
         result = is_mutant(random_dna)
         assert isinstance(result, bool), f"Invalid return type for DNA: {random_dna}"
 
+def analyze_one_by_one(dna_list):
+    results = []
+    for dna in dna_list:
+        try:
+            results.append(is_mutant(dna))
+        except ValueError as ve:
+            results.append(ve)
+    return results
+
+def test_encode_dna():
+    """
+    encode_dna returns the row-major bytes and N, or the first offending position
+    """
+    assert encode_dna(["ATG", "CAG", "TTA"]) == (b"ATGCAGTTA", 3)
+
+    cases = [
+        ([], "DNA must be a list of strings.", None, None),
+        (["ATGC", "CAGT", 1234, "AGAA"], "DNA must be a list of strings.", 2, None),
+        (["ATGC", "CAGTT", "TTA", "AGAA"], "DNA must be a square matrix of NxN.", 1, None),
+        (["ATGC", "CAGT", "TTAT"], "DNA must be a square matrix of NxN.", 0, None),
+        (["ATGC", "CAGT", "TTXT", "AGXA"], "DNA can only contain characters A, T, C, G.", 2, 2),
+        (["ATGC", "CAGT", "TTAT", "AGAÄ"], "DNA can only contain characters A, T, C, G.", 3, 3),
+        (["ATGC", "cAGT", "TTAT", "AGAA"], "DNA can only contain characters A, T, C, G.", 1, 0),
+    ]
+    for dna, message, row, column in cases:
+        with pytest.raises(DnaValidationError) as excinfo:
+            encode_dna(dna)
+        assert str(excinfo.value) == message
+        assert (excinfo.value.row, excinfo.value.column) == (row, column)
+        with pytest.raises(ValueError, match=re.escape(message)):
+            is_mutant(dna)
+
+def test_analyze_dna():
+    """
+    analyze_dna returns the verdict of is_mutant with the start of the runs that settled it
+    """
+    result = analyze_dna(["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"])
+    assert isinstance(result, AnalysisResult)
+    assert result.is_mutant is True
+    assert result.run_count == 2
+    assert result.runs == [("H", 4, 0), ("V", 0, 4)]
+    assert result.sequences_discovered() == "H4,0;V0,4"
+
+    result = analyze_dna(["ATGCGA", "CAGTGC", "TTATTT", "AGACGG", "GCGTCA", "TCACTG"])
+    assert (result.is_mutant, result.run_count, result.sequences_discovered()) == (False, None, None)
+    # One run is not enough to be a mutant, and it is not located
+    result = analyze_dna(["AAAAGT", "CAGTGC", "TTATTT", "AGACGG", "GCGTCA", "TCACTG"])
+    assert (result.is_mutant, result.run_count, result.runs) == (False, None, [])
+
+    random.seed(12)
+    for size in range(1, 10):
+        for _ in range(100):
+            dna = [''.join(random.choice('AT') for _ in range(size)) for _ in range(size)]
+            result = analyze_dna(dna)
+            assert result.is_mutant is is_mutant(dna, engine="python"), f"Mismatch for DNA: {dna}"
+            assert result.run_count == (2 if result.is_mutant else None)
+
+    with pytest.raises(DnaValidationError, match="DNA can only contain characters A, T, C, G."):
+        analyze_dna(["ATGC", "CAGT", "TTXT", "AGAA"])
+
+def test_result_key():
+    """
+    result_key is the storage digest for square tables and None for anything ambiguous
+    """
+    dna = ["ATGC", "CAGT", "TTAT", "AGAC"]
+    assert result_key(dna) == dna_analysis.canonical_digest(''.join(dna).encode('ascii'), 4)
+    # Rotations, transposes and flips share the key
+    transposed = [''.join(row[column] for row in dna) for column in range(4)]
+    for variant in (transposed, transposed[::-1], [row[::-1] for row in dna], [row[::-1] for row in dna[::-1]]):
+        assert result_key(variant) == result_key(dna)
+    assert result_key(["ATGC", "CAGT", "TTAT", "AGAA"]) != result_key(dna)
+    # Same characters split into rows of the wrong length
+    assert result_key(["ATG", "CCAGT", "TTAT", "AGAC"]) is None
+    assert result_key(["ATGC", None, "TTAT", "AGAC"]) is None
+    assert result_key(["ATGÇ", "CAGT", "TTAT", "AGAC"]) is None
+    assert result_key([]) is None
+
+def test_result_key_of_exact_form(monkeypatch):
+    monkeypatch.setattr(dna_analysis, "CANONICAL_KEYS", False)
+    dna = ["ATGC", "CAGT", "TTAT", "AGAC"]
+    assert result_key(dna) == dna_analysis.dna_digest(''.join(dna).encode('ascii'))
+    assert result_key(dna[::-1]) != result_key(dna)
+
+def assert_same_results(results, expected):
+    assert len(results) == len(expected)
+    for result, reference in zip(results, expected):
+        if isinstance(reference, ValueError):
+            assert isinstance(result, ValueError) and str(result) == str(reference)
+        else:
+            assert result is reference
+
+def test_is_mutant_batch():
+    """
+    is_mutant_batch returns the same verdicts and errors as is_mutant, in input order
+    """
+    random.seed(99)
+    dna_list = [
+        [''.join(random.choice('ATCG') for _ in range(size)) for _ in range(size)]
+        for size in random.choices([1, 4, 6, 9], k=300)
+    ]
+    dna_list[3:3] = [
+        [],
+        ["ATGC", "CAGT", 1234, "AGAA"],
+        ["ATGCGA", "CAGTGC", "TTATGT"],
+        ["ATGCG", "CAG", "TTATG", "AGAAG", "CCCCT"],
+        ["ATGC", "CAGT", "TTXT", "AGAA"],
+        ["ATGC", "CAGT", "TTÄT", "AGAA"],
+        ["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"],
+    ]
+    results = is_mutant_batch(dna_list)
+    assert_same_results(results, analyze_one_by_one(dna_list))
+    assert results[9] is True
+    assert is_mutant_batch([]) == []
+
+def test_is_mutant_batch_without_numpy(monkeypatch):
+    monkeypatch.setattr(dna_analysis, "np", None)
+    dna_list = [
+        ["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"],
+        ["ATGCGA", "CAGTGC", "TTATTT", "AGACGG", "GCGTCA", "TCACTG"],
+        ["ATGC", "CAGT", "TTXT", "AGAA"],
+    ]
+    assert_same_results(is_mutant_batch(dna_list), analyze_one_by_one(dna_list))
+
+def test_is_mutant_batch_of_many_tables():
+    # Timed against the loop in benchmarks/bench_batch.py
+    random.seed(7)
+    dna_list = [[''.join(random.choice('ATCG') for _ in range(6)) for _ in range(6)] for _ in range(2000)]
+    assert is_mutant_batch(dna_list) == analyze_one_by_one(dna_list)
+
+def test_extract_diagonals_follows_the_gather_plans(monkeypatch):
+    random.seed(73)
+    for n in range(1, 30):
+        dna = [''.join(random.choice('ATCG') for _ in range(n)) for _ in range(n)]
+        expected = [''.join(dna[i][i - d] for i in range(max(d, 0), min(n, n + d))) for d in range(-n + 1, n)]
+        expected += [''.join(dna[i][n - 1 - i - d] for i in range(max(-d, 0), min(n, n - d))) for d in range(-n + 1, n)]
+        assert extract_diagonals(dna) == expected
+        assert extract_diagonals([list(row) for row in dna]) == expected
+    # Plans are built once per N, and the least recently used go first past the memory bound
+    plans = dna_analysis.ResultCache()
+    monkeypatch.setattr(dna_analysis, '_diagonal_plans', plans)
+    assert dna_analysis.diagonal_plan(100) is dna_analysis.diagonal_plan(100)
+    plans.max_bytes = 4 * plans.bytes
+    for n in range(101, 110):
+        dna_analysis.diagonal_plan(n)
+    assert plans.bytes <= plans.max_bytes and plans.evictions > 0 and plans.get(100) is None
+
+def test_is_mutant_accepts_buffers():
+    random.seed(71)
+    for n in (1, 4, 6, 20):
+        for _ in range(20):
+            dna = [''.join(random.choice('AT') for _ in range(n)) for _ in range(n)]
+            flat = ''.join(dna).encode('ascii')
+            expected = is_mutant(dna)
+            for buffer in (flat, bytearray(flat), memoryview(flat), array('B', flat)):
+                assert is_mutant(buffer, shape=(n, n)) is expected
+                assert is_mutant(buffer, shape=n) is expected
+            assert analyze_dna(flat, shape=n).runs == analyze_dna(dna).runs
+    np = pytest.importorskip("numpy")
+    grid = np.frombuffer(flat, dtype=np.uint8).reshape(n, n)
+    # A two-dimensional buffer carries its own shape
+    assert is_mutant(grid) is expected
+    assert encode_dna(grid)[0].obj is grid
+
+def test_is_mutant_rejects_bad_buffers():
+    with pytest.raises(DnaValidationError, match="explicit"):
+        is_mutant(b"ATGCAGTTA")
+    with pytest.raises(DnaValidationError, match="square"):
+        is_mutant(b"ATGCAGTTA", shape=(3, 4))
+    with pytest.raises(DnaValidationError) as error:
+        is_mutant(b"ATGCAGTXA", shape=3)
+    assert (error.value.row, error.value.column) == (2, 1)
+    np = pytest.importorskip("numpy")
+    grid = np.frombuffer(b"ATGCAGTTA" * 4, dtype=np.uint8).reshape(6, 6)
+    with pytest.raises(DnaValidationError, match="contiguous"):
+        is_mutant(grid[:3, :3])
+    with pytest.raises(DnaValidationError, match="one byte"):
+        is_mutant(grid.astype(np.uint16))
+
+def test_is_mutant_reads_buffers_in_place():
+    """
+    A buffer costs no more memory than the engine itself needs: it is neither copied nor
+    turned into strings
+    """
+    n = 1000
+    random.seed(72)
+    flat = bytes(random.choice(b'ATCG') for _ in range(n * n))
+    engine = get_engine(select_engine(n))
+
+    def peak(func):
+        func()
+        tracemalloc.start()
+        try:
+            func()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    engine_peak = peak(lambda: engine(memoryview(flat), n))
+    assert peak(lambda: is_mutant(flat, shape=n)) - engine_peak < n * n // 4
+    assert peak(lambda: is_mutant(memoryview(flat), shape=(n, n))) - engine_peak < n * n // 4
+    np = pytest.importorskip("numpy")
+    grid = np.frombuffer(flat, dtype=np.uint8).reshape(n, n)
+    assert peak(lambda: is_mutant(grid)) - engine_peak < n * n // 4
+    # Whereas the list of strings is at least joined and encoded
+    dna = [flat[i * n:(i + 1) * n].decode('ascii') for i in range(n)]
+    assert peak(lambda: is_mutant(dna)) - engine_peak > n * n // 2
+
 if __name__ == "__main__":
     pytest.main()
\ No newline at end of file
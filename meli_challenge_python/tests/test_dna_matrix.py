@@ -0,0 +1,93 @@
+import pytest
+import sys
+import os
+import random
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import dna_analysis
+from dna_analysis import (
+    analyze_dna, encode_dna, extract_diagonals, find_dna_analysis, flush_records, init_db,
+    is_mutant, record_dna_analysis, result_key
+)
+from dna_matrix import DnaMatrix, DnaValidationError
+
+MUTANT = ["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"]
+
+def generate_rows(n, valid_chars='ATCG'):
+    return [''.join(random.choice(valid_chars) for _ in range(n)) for _ in range(n)]
+
+def test_constructors_share_one_buffer_layout(tmp_path):
+    flat = ''.join(MUTANT).encode('ascii')
+    path = tmp_path / 'dna.raw'
+    path.write_bytes(flat)
+    for matrix in (DnaMatrix.from_rows(MUTANT), DnaMatrix.from_bytes(flat), DnaMatrix.from_file(str(path)),
+                   DnaMatrix.from_file(str(path), n=6)):
+        assert isinstance(matrix.buffer, bytearray) and matrix.buffer == flat
+        assert len(matrix) == 6 and matrix.rows() == MUTANT
+
+def test_constructors_reject_bad_shapes(tmp_path):
+    for rows, row in (([], None), (["ATG", "CAG"], 0), (["ATG", 3, "TTA"], 1), (["ATG", "CAGT", "TT"], 1)):
+        with pytest.raises(DnaValidationError) as error:
+            DnaMatrix.from_rows(rows)
+        assert error.value.row == row
+    with pytest.raises(DnaValidationError) as error:
+        DnaMatrix.from_rows(["ATG", "CAG", "TÄA"])
+    assert (error.value.row, error.value.column) == (2, 1)
+    with pytest.raises(DnaValidationError):
+        DnaMatrix.from_bytes(b"ATGCA")
+    with pytest.raises(DnaValidationError):
+        DnaMatrix.from_bytes(b"ATGC", n=3)
+    path = tmp_path / 'empty.raw'
+    path.write_bytes(b"")
+    with pytest.raises(DnaValidationError):
+        DnaMatrix.from_file(str(path))
+
+def test_views_match_the_lines_without_copying():
+    random.seed(61)
+    for n in (1, 2, 5, 8):
+        rows = generate_rows(n)
+        matrix = DnaMatrix.from_rows(rows)
+        diagonals = extract_diagonals(rows)
+        for i in range(n):
+            assert matrix.row(i).tobytes().decode() == rows[i]
+            assert matrix.column(i).tobytes().decode() == ''.join(row[i] for row in rows)
+        # extract_diagonals lists the diagonals from offset n-1 down, then the anti-diagonals up
+        for index, offset in enumerate(range(n - 1, -n, -1)):
+            assert matrix.diagonal(offset).tobytes().decode() == diagonals[index]
+            assert matrix.anti_diagonal(-offset).tobytes().decode() == diagonals[2 * n - 1 + index]
+        # Views are slices of the buffer itself
+        assert matrix.column(n - 1).obj is matrix.buffer
+    np = pytest.importorskip("numpy")
+    matrix = DnaMatrix.from_rows(MUTANT)
+    grid = matrix.array()
+    assert np.shares_memory(grid, np.frombuffer(matrix.buffer, dtype=np.uint8))
+    assert grid[:, 1].tobytes() == matrix.column(1).tobytes()
+    assert grid.diagonal(2).tobytes() == matrix.diagonal(2).tobytes()
+    assert np.fliplr(grid).diagonal(-1).tobytes() == matrix.anti_diagonal(-1).tobytes()
+
+def test_analysis_accepts_a_matrix():
+    random.seed(62)
+    for n in (4, 6, 30):
+        for _ in range(20):
+            rows = generate_rows(n, 'AT')
+            matrix = DnaMatrix.from_rows(rows)
+            assert is_mutant(matrix) is is_mutant(rows)
+            assert analyze_dna(matrix).runs == analyze_dna(rows).runs
+            assert result_key(matrix) == result_key(rows)
+    # The buffer is validated in place, not copied
+    matrix = DnaMatrix.from_rows(MUTANT)
+    assert encode_dna(matrix)[0] is matrix.buffer
+    invalid = DnaMatrix.from_bytes(b"ATGCAGTXA")
+    with pytest.raises(DnaValidationError) as error:
+        is_mutant(invalid)
+    assert (error.value.row, error.value.column) == (2, 1)
+
+def test_matrix_is_recorded_and_found(database):
+    init_db()
+    matrix = DnaMatrix.from_rows(MUTANT)
+    record_dna_analysis(matrix, analyze_dna(matrix))
+    assert flush_records(timeout=10)
+    found = find_dna_analysis(encode_dna(MUTANT)[0])
+    assert found is not None and found.is_mutant
+    assert found.runs == analyze_dna(MUTANT).runs
+    assert dna_analysis.get_stats()[0] == 1
@@ -0,0 +1,115 @@
+import pytest
+import sys
+import os
+import json
+import random
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import engines
+from dna_analysis import is_mutant
+from engines import (AUTO, CALIBRATION_ENV, ENGINE_ENV, FALLBACK_ENGINE, REFERENCE_ENGINE, available_engines,
+                     calibrate, get_engine, init_engines, load_calibration, run_free_matrix, save_calibration,
+                     select_engine, supports)
+
+ALL_ENGINES = available_engines()
+
+# (DNA, expected verdict) pairs every engine must agree on
+CONFORMANCE_CASES = [
+    (["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"], True),
+    (["ATGCGA", "CAGTGC", "TTATTT", "AGACGG", "GCGTCA", "TCACTG"], False),
+    # Two runs on the same row count once
+    (["AAAACCCC", "AGTCTGGA", "ACCCGGAA", "CGAACGCG", "CAGCTAGA", "TCTTGGGA", "TGGCTGCG", "CGTTATTT"], False),
+    # Off-centre anti-diagonal plus a row
+    (["GCAGG", "GAGAT", "CGTAG", "GAACT", "ATTTT"], True),
+    # Runs must not wrap from the end of a row into the next one
+    (["CGAA", "AACT", "GTAA", "AATC"], False),
+    (["AAAA", "CCCC", "TTTT", "GGGG"], True),
+    (["AAA", "AAA", "AAA"], False),
+    (["A"], False),
+]
+
+@pytest.fixture
+def calibration_file(tmp_path):
+    return str(tmp_path / "calibration.json")
+
+@pytest.fixture
+def isolated_calibration(monkeypatch):
+    monkeypatch.setattr(engines, "_calibration", None)
+    monkeypatch.delenv(ENGINE_ENV, raising=False)
+    monkeypatch.delenv(CALIBRATION_ENV, raising=False)
+
+@pytest.mark.parametrize("engine", ALL_ENGINES)
+def test_engine_conformance_cases(engine):
+    for dna, expected in CONFORMANCE_CASES:
+        if supports(engine, len(dna)):
+            assert is_mutant(dna, engine=engine) is expected, f"{engine} failed on {dna}"
+
+@pytest.mark.parametrize("engine", ALL_ENGINES)
+def test_engine_conformance_random(engine):
+    random.seed(1000)
+    for size in range(1, 17):
+        if not supports(engine, size):
+            continue
+        for _ in range(60):
+            dna = [''.join(random.choice(random.choice(['ATCG', 'AT'])) for _ in range(size)) for _ in range(size)]
+            assert is_mutant(dna, engine=engine) is is_mutant(dna, engine=REFERENCE_ENGINE), \
+                f"{engine} disagrees with the reference on {dna}"
+
+@pytest.mark.parametrize("engine", ALL_ENGINES)
+def test_engine_conformance_run_free(engine):
+    for size in (4, 7, 8, 33):
+        if supports(engine, size):
+            assert get_engine(engine)(run_free_matrix(size), size) is False
+
+def test_run_free_matrix_has_no_equal_neighbours():
+    size = 9
+    flat = run_free_matrix(size)
+    for i in range(size):
+        for j in range(size):
+            for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                if 0 <= i + di < size and 0 <= j + dj < size:
+                    assert flat[i * size + j] != flat[(i + di) * size + j + dj]
+
+def test_unknown_engine():
+    with pytest.raises(ValueError, match="Unknown detection engine"):
+        is_mutant(["ATGC", "CAGT", "TTAT", "AGAA"], engine="missing")
+
+def test_select_engine_from_environment(isolated_calibration, monkeypatch):
+    monkeypatch.setenv(ENGINE_ENV, "regex")
+    assert select_engine(6) == "regex"
+    assert select_engine(500) == "regex"
+    monkeypatch.setenv(ENGINE_ENV, "missing")
+    with pytest.raises(ValueError, match="Unknown detection engine"):
+        select_engine(6)
+
+def test_auto_selection_uses_calibration_buckets(isolated_calibration, monkeypatch):
+    monkeypatch.setenv(ENGINE_ENV, AUTO)
+    monkeypatch.setattr(engines, "_calibration", [(8, "lut"), (64, "codegen"), (None, "bitplane")])
+    assert select_engine(6) == "lut"
+    assert select_engine(9) == "codegen"
+    assert select_engine(64) == "codegen"
+    assert select_engine(1000) == "bitplane"
+
+def test_calibrate_picks_a_supported_engine_per_bucket():
+    calibration = calibrate(buckets=((8, 6), (None, 20)), repeat=1)
+    assert [max_n for max_n, _ in calibration] == [8, None]
+    assert all(supports(engine, 20) or max_n == 8 for max_n, engine in calibration)
+    assert all(engine != REFERENCE_ENGINE for _, engine in calibration)
+
+def test_init_engines_saves_and_loads_calibration(isolated_calibration, monkeypatch, calibration_file):
+    monkeypatch.setattr(engines, "CALIBRATION_BUCKETS", ((8, 6), (None, 12)))
+    calibration = init_engines(calibration_file)
+    with open(calibration_file) as f:
+        assert [entry["max_n"] for entry in json.load(f)] == [8, None]
+
+    # A saved calibration is loaded instead of measured again
+    monkeypatch.setattr(engines, "calibrate", lambda *args, **kwargs: pytest.fail("calibration re-run"))
+    assert init_engines(calibration_file) == calibration
+
+def test_load_calibration_replaces_unknown_engines(calibration_file):
+    save_calibration([(8, "not-installed"), (None, "regex")], calibration_file)
+    assert load_calibration(calibration_file) == [(8, FALLBACK_ENGINE), (None, "regex")]
+
+    save_calibration([(8, "regex")], calibration_file)
+    with pytest.raises(ValueError, match="unbounded bucket"):
+        load_calibration(calibration_file)
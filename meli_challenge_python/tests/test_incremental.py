@@ -0,0 +1,136 @@
+import pytest
+import sys
+import os
+import random
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import dna_analysis
+from dna_analysis import DnaValidationError, analyze_dna, analyze_edits, base_digest, record_dna_analysis
+from engines import get_engine
+from engines.regex_engine import build_lines, line_layout, locate_runs
+from incremental import LineState, lines_through
+
+
+def generate_flat(n, valid_chars='ATCG'):
+    return ''.join(random.choice(valid_chars) for _ in range(n * n)).encode('ascii')
+
+def apply(flat, n, edits):
+    edited = bytearray(flat)
+    for row, column, base in edits:
+        edited[row * n + column] = base
+    return bytes(edited)
+
+def test_state_matches_full_scan():
+    random.seed(51)
+    for n in range(1, 12):
+        for _ in range(50):
+            flat = generate_flat(n, 'AT' if n > 5 else 'ATCG')
+            state = LineState.build(flat, n)
+            assert state.is_mutant is get_engine("python")(flat, n)
+            assert state.locate_runs(limit=2) == locate_runs(flat, n, limit=2)
+            if n >= 4:
+                assert [state._line(line) for line in range(len(state.flags))] == build_lines(flat, n)
+
+def test_lines_through_a_cell():
+    n = 7
+    origins = line_layout(n)[1]
+    flat = bytes(range(n * n))
+    state = LineState(flat, n, bytearray(len(origins)))
+    for row in range(n):
+        for column in range(n):
+            expected = [line for line in range(len(origins)) if row * n + column in state._line(line)]
+            assert sorted(lines_through(n, row, column)) == expected
+    assert lines_through(3, 1, 1) == []
+
+def test_edits_rescan_only_touched_lines():
+    random.seed(52)
+    for n in (4, 5, 9, 16):
+        for _ in range(50):
+            flat = generate_flat(n, 'AT')
+            state = LineState.build(flat, n)
+            edits = [(random.randrange(n), random.randrange(n), ord(random.choice('ATCG'))) for _ in range(3)]
+            edited = state.edit(edits)
+            reference = LineState.build(apply(flat, n, edits), n)
+            assert edited.flat == reference.flat and edited.flags == reference.flags
+            assert edited.locate_runs(limit=2) == locate_runs(reference.flat, n, limit=2)
+            # The base state is left as it was
+            assert state.flat == flat
+
+def test_analyze_edits_of_a_recorded_table(records_database):
+    dna = ["ATGCGA", "CAGTGC", "TTATTT", "AGACGG", "GCGTCA", "TCACTG"]
+    record_dna_analysis(dna, analyze_dna(dna))
+
+    result, digest = analyze_edits(base_digest(dna), [(2, 4, 'T'), (3, 1, 'T')])
+    edited = ["ATGCGA", "CAGTGC", "TTATTT", "ATACGG", "GCGTCA", "TCACTG"]
+    assert result.is_mutant is False and digest == base_digest(edited)
+    # Chained on the edited table, which was recorded; another process only finds it there
+    dna_analysis._line_states.clear()
+    result, digest = analyze_edits(digest, [(0, 0, 'C'), (1, 0, 'C'), (2, 0, 'C'), (3, 0, 'C'), (1, 1, 'T')])
+    expected = analyze_dna(["CTGCGA", "CTGTGC", "CTATTT", "CTACGG", "GCGTCA", "TCACTG"])
+    assert result.is_mutant and result.runs == expected.runs
+    assert dna_analysis.lookup_or_analyze_dna(edited)[1]
+
+@pytest.mark.parametrize("canonical_storage", [True, False])
+def test_every_orientation_of_a_recorded_table_is_edited_as_submitted(records_database, monkeypatch, canonical_storage):
+    monkeypatch.setattr(dna_analysis, "CANONICAL_STORAGE", canonical_storage)
+    dna = ["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"]
+    record_dna_analysis(dna, analyze_dna(dna))
+    turned = [''.join(row[column] for row in reversed(dna)) for column in range(6)]
+    variants = [dna, dna[::-1], [row[::-1] for row in dna], turned, turned[::-1]]
+    for variant in variants if canonical_storage else [dna]:
+        dna_analysis._line_states.clear()
+        result, digest = analyze_edits(base_digest(variant), [])
+        assert result.runs == analyze_dna(variant).runs and digest == base_digest(variant)
+
+def test_analyze_edits_of_a_remembered_table(records_database, monkeypatch):
+    monkeypatch.setattr(dna_analysis, "EDIT_MIN_N", 6)
+    monkeypatch.setattr(dna_analysis, "WRITE_BEHIND", True)
+    dna = ["ATGCGA", "CAGTGC", "TTATTT", "AGACGG", "GCGTCA", "TCACTG"][::-1]
+    assert not dna_analysis.lookup_or_analyze_dna(dna)[0].is_mutant
+    # Never recorded, so only found in memory
+    result, _ = analyze_edits(base_digest(dna), [(0, 0, 'G')])
+    assert result.is_mutant is False
+
+def test_kept_views_of_a_callers_buffer_are_copies(records_database, monkeypatch):
+    monkeypatch.setattr(dna_analysis, "EDIT_MIN_N", 6)
+    monkeypatch.setattr(dna_analysis, "WRITE_BEHIND", True)
+    dna = ["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"]
+    flat = ''.join(dna).encode('ascii')
+    buffer = bytearray(flat)
+    matrix = dna_analysis.as_matrix(memoryview(buffer), shape=6)
+    analysis, _ = dna_analysis.lookup_or_analyze_dna(matrix)
+    record_dna_analysis(matrix, analysis)
+    # The caller reuses its buffer before the record is written or the table edited
+    buffer[:] = b"A" * 36
+    assert dna_analysis.flush_records(timeout=10)
+    assert dna_analysis.find_dna_analysis(flat) is not None
+    result, _ = analyze_edits(base_digest(dna), [])
+    assert result.runs == analyze_dna(dna).runs
+
+def test_analyze_edits_rejects_bad_input(records_database):
+    for base in (bytes(17), bytes(16), b""):
+        with pytest.raises(LookupError):
+            analyze_edits(base, [])
+    dna = ["ATGC", "CAGT", "TTAT", "AGAC"]
+    record_dna_analysis(dna, analyze_dna(dna))
+    base = base_digest(dna)
+    with pytest.raises(DnaValidationError) as error:
+        analyze_edits(base, [(0, 0, 'A'), (1, 4, 'A')])
+    assert (error.value.row, error.value.column) == (1, 4)
+    with pytest.raises(DnaValidationError, match="A, T, C, G"):
+        analyze_edits(base, [(2, 2, 'X')])
+
+def test_edits_on_large_matrix_rescan_at_most_four_lines_per_cell(monkeypatch):
+    random.seed(53)
+    n = 600
+    flat = generate_flat(n)
+    state = LineState.build(flat, n)
+    edits = [(random.randrange(n), random.randrange(n), ord('A')) for _ in range(10)]
+    scanned = []
+    line = LineState._line
+    monkeypatch.setattr(LineState, "_line", lambda self, index: scanned.append(index) or line(self, index))
+    edited = state.edit(edits)
+    edited.is_mutant
+    assert 0 < len(scanned) <= 4 * len(edits)
+    monkeypatch.undo()
+    assert edited.flags == LineState.build(apply(flat, n, edits), n).flags
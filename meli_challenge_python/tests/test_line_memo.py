@@ -0,0 +1,120 @@
+import pytest
+import sys
+import os
+import random
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import dna_analysis
+import line_memo
+from dna_analysis import analyze_dna, is_mutant
+from engines import get_engine
+from line_memo import LineMemo, scan_line
+
+def generate_flat(n, valid_chars='ATCG'):
+    return ''.join(random.choice(valid_chars) for _ in range(n * n)).encode('ascii')
+
+def test_scan_line():
+    assert scan_line(b"AAATCCCCG") is True
+    assert scan_line(b"GGGTTTAA") is False
+    assert scan_line(b"TTTT") is True
+
+def always_on_memo(**kwargs):
+    memo = LineMemo(min_hit_rate=0, **kwargs)
+    memo.enabled = True
+    memo.engine_cost = float("inf")
+    return memo
+
+def test_matches_reference_engine():
+    random.seed(21)
+    memo = always_on_memo()
+    for n in range(1, 10):
+        for _ in range(200):
+            flat = generate_flat(n, 'AT')
+            rows = [flat[i * n:(i + 1) * n].decode('ascii') for i in range(n)]
+            assert memo.detect(flat, n, slow_engine) is is_mutant(rows, engine="python"), f"Mismatch for DNA: {rows}"
+    assert memo.metrics()['hits'] > 0
+
+def slow_engine(flat, n):
+    # Makes the memo the faster path
+    time.sleep(0.001)
+    return get_engine("python")(flat, n)
+
+def failing_engine(flat, n):
+    raise AssertionError("the memo is on")
+
+def test_measures_the_engine_before_turning_on():
+    memo = LineMemo(window=3)
+    flat = b"ATGCGACAGTGCTTATTTAGACGGGCGTCATCACTG"
+    for _ in range(3):
+        assert not memo.enabled
+        assert memo.detect(flat, 6, slow_engine) is False
+    assert memo.enabled and memo.metrics()['engine_ns_per_cell'] > 0
+    assert memo.detect(flat, 6, failing_engine) is False
+
+def test_repeated_rows_are_not_scanned_again(monkeypatch):
+    rows = [b"ATGCGA", b"CAGTGC", b"TTATTT", b"AGACGG", b"GCGTCA", b"TCACTG"]
+    memo = always_on_memo()
+    assert memo.detect(b"".join(rows), 6, failing_engine) is False
+    misses = memo.metrics()['misses']
+
+    # The same rows in another order: only new columns and diagonals are scanned
+    scanned = []
+    monkeypatch.setattr(line_memo, "scan_line", lambda line: scanned.append(line) or scan_line(line))
+    assert memo.detect(b"".join(reversed(rows)), 6, failing_engine) is False
+    assert not set(rows) & set(scanned)
+    metrics = memo.metrics()
+    assert metrics['misses'] - misses == len(scanned) and metrics['hits'] >= 6
+    assert 0 < metrics['hit_rate'] < 1
+
+def test_bounded_by_entries_and_bytes():
+    random.seed(22)
+    memo = always_on_memo(max_entries=50)
+    for _ in range(20):
+        memo.detect(generate_flat(8), 8, slow_engine)
+    assert memo.metrics()['entries'] == 50
+    memo = always_on_memo(max_bytes=10 * (line_memo.ENTRY_OVERHEAD + 8))
+    for _ in range(20):
+        memo.detect(generate_flat(8), 8, slow_engine)
+    assert memo.metrics()['bytes'] <= memo.max_bytes
+
+def test_turns_off_below_min_hit_rate_and_probes_again():
+    random.seed(23)
+    memo = LineMemo(min_hit_rate=0.5, window=5, probe_interval=10)
+    flat = generate_flat(12)
+    for _ in range(5):
+        memo.detect(flat, 12, slow_engine)
+    # One repeated matrix keeps it on
+    for _ in range(20):
+        assert memo.detect(flat, 12, failing_engine) is memo.detect(flat, 12, slow_engine)
+    assert memo.enabled and memo.metrics()['disables'] == 0
+
+    # Random matrices share almost no lines
+    while memo.enabled:
+        memo.detect(generate_flat(12), 12, slow_engine)
+    metrics = memo.metrics()
+    assert metrics['disables'] == 1 and metrics['entries'] == 0 and metrics['hit_rate'] < 1
+    for _ in range(10):
+        memo.detect(flat, 12, slow_engine)
+    assert memo.enabled
+
+def test_turns_off_when_slower_than_the_engine():
+    memo = LineMemo(window=2)
+    memo.engine_cost = memo.memo_cost = 0.0
+    flat = b"ATGCGACAGTGCTTATTTAGACGGGCGTCATCACTG"
+    # An engine faster than anything the memo can do
+    for _ in range(2):
+        memo.detect(flat, 6, lambda flat, n: False)
+    memo.engine_cost = 1e-12
+    for _ in range(2):
+        memo.detect(flat, 6, failing_engine)
+    assert not memo.enabled and memo.metrics()['disables'] == 1
+
+def test_analyze_dna_with_and_without_memo(monkeypatch):
+    random.seed(24)
+    monkeypatch.setattr(dna_analysis, "_line_memo", always_on_memo())
+    tables = [[''.join(random.choice('AT') for _ in range(7)) for _ in range(7)] for _ in range(100)]
+    with_memo = [analyze_dna(dna).is_mutant for dna in tables]
+    monkeypatch.setattr(dna_analysis, "LINE_MEMO", False)
+    assert [analyze_dna(dna).is_mutant for dna in tables] == with_memo
+    assert dna_analysis.line_memo_metrics()['hits'] > 0
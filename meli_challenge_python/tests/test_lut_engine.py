@@ -0,0 +1,38 @@
+import pytest
+import sys
+import os
+import random
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import engines
+from dna_analysis import is_mutant
+from engines import ENGINE_ENV, get_engine, select_engine
+from engines.lut_engine import MAX_N, detect, get_table
+
+def test_lut_engine_is_registered():
+    assert get_engine("lut") is detect
+
+def test_lut_table():
+    table = get_table()
+    assert len(table) == 65536
+    assert get_table() is table
+    random.seed(3)
+    for value in random.sample(range(len(table)), 2000):
+        codes = [(value >> (2 * k)) & 3 for k in range(MAX_N)]
+        expected = sum(1 << start for start in range(MAX_N - 3) if len(set(codes[start:start + 4])) == 1)
+        assert table[value] == expected
+
+def test_lut_engine_rejects_large_matrices():
+    with pytest.raises(ValueError, match="only supports matrices up to 8x8"):
+        detect(b"A" * 81, 9)
+
+def test_lut_engine_is_only_selected_up_to_max_n(monkeypatch):
+    monkeypatch.setenv(ENGINE_ENV, "lut")
+    assert select_engine(MAX_N) == "lut"
+    assert select_engine(MAX_N + 1) == "scanner"
+
+    calls = []
+    monkeypatch.setitem(engines._ENGINES, "lut", lambda flat, n: calls.append(n) or detect(flat, n))
+    assert is_mutant(["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"]) is True
+    assert is_mutant(["ATGCGATCG"] * 9) is True
+    assert calls == [6]
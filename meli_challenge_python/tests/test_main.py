@@ -3,7 +3,7 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 from main import main
-from main import is_mutant
+from main import extract_diagonals, is_mutant
 
 def test_main():
     """Simple test to ensure main function runs without error."""
@@ -68,3 +68,8 @@ def test_is_mutant_with_invalid_dna_invalid_characters():
     ]
     with pytest.raises(ValueError, match="DNA can only contain characters A, T, C, G."):
         is_mutant(dna_sample)
+
+def test_extract_diagonals_keeps_those_of_four_bases_or_more():
+    dna_sample = ["ATGCG", "CAGTG", "TTATT", "AGACG", "GCGTC"]
+    assert extract_diagonals(dna_sample) == ["TGTG", "AAACC", "CTAT", "GTAC", "GTAGG", "CGTA"]
+    assert extract_diagonals(["ATG", "CAG", "TTA"]) == []
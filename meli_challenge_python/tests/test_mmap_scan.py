@@ -0,0 +1,57 @@
+import pytest
+import sys
+import os
+import random
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+pytest.importorskip("numpy")
+from dna_analysis import is_mutant, is_mutant_file
+from mmap_scan import matrix_size, scan_file
+
+def generate_dna_sequence(size, valid_chars='ATCG'):
+    return [''.join(random.choice(valid_chars) for _ in range(size)) for _ in range(size)]
+
+def write_matrix(path, dna):
+    path.write_bytes(''.join(dna).encode('ascii'))
+    return str(path)
+
+def test_matrix_size(tmp_path):
+    assert matrix_size(write_matrix(tmp_path / "dna.raw", ["ATGC"] * 4)) == 4
+    with pytest.raises(ValueError, match="DNA must be a square matrix of NxN."):
+        matrix_size(write_matrix(tmp_path / "bad.raw", ["ATGCG"] * 4))
+
+def test_scan_file_known_cases(tmp_path):
+    mutant = write_matrix(tmp_path / "mutant.raw", ["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"])
+    human = write_matrix(tmp_path / "human.raw", ["ATGCGA", "CAGTGC", "TTATTT", "AGACGG", "GCGTCA", "TCACTG"])
+    assert is_mutant_file(mutant) is True
+    assert is_mutant_file(human) is False
+
+def test_scan_file_runs_across_band_edges(tmp_path):
+    random.seed(31)
+    for size in range(1, 12):
+        for index in range(40):
+            dna = generate_dna_sequence(size, valid_chars=random.choice(['ATCG', 'AT', 'ATC']))
+            path = write_matrix(tmp_path / f"dna{size}_{index}.raw", dna)
+            expected = is_mutant(dna, engine="python")
+            for band_rows in (1, 2, 3, 5):
+                assert scan_file(path, workers=1, band_rows=band_rows) is expected, \
+                    f"Mismatch for DNA {dna} with bands of {band_rows} rows"
+
+def test_scan_file_with_process_pool(tmp_path):
+    random.seed(32)
+    for index in range(4):
+        dna = generate_dna_sequence(40, valid_chars='ATCG')
+        path = write_matrix(tmp_path / f"dna{index}.raw", dna)
+        assert scan_file(path, workers=2, band_rows=7) is is_mutant(dna, engine="python")
+
+    # Vertical run split across two bands of a human matrix
+    dna = ["ATCGAT", "CGATCG", "ATCAAT", "CGAACG", "ATCAAT", "CGAACG"]
+    path = write_matrix(tmp_path / "edge.raw", dna)
+    assert scan_file(path, workers=2, band_rows=3) is is_mutant(dna, engine="python")
+
+def test_scan_file_validation(tmp_path):
+    path = write_matrix(tmp_path / "dna.raw", ["ATGC", "CAGT", "TTXT", "AGAA"])
+    with pytest.raises(ValueError, match="DNA can only contain characters A, T, C, G."):
+        scan_file(path, workers=1, band_rows=2)
+    with pytest.raises(ValueError, match="DNA must be a square matrix of NxN."):
+        scan_file(path, n=3)
@@ -0,0 +1,12 @@
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+pytest.importorskip("numpy")
+from engines import available_engines, get_engine
+from engines.numpy_engine import detect
+
+def test_numpy_engine_is_registered():
+    assert "numpy" in available_engines()
+    assert get_engine("numpy") is detect
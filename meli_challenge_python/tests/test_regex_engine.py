@@ -0,0 +1,45 @@
+import pytest
+import sys
+import os
+import random
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from dna_analysis import extract_diagonals, is_mutant
+from engines import get_engine
+from engines.regex_engine import build_lines, detect, locate_runs
+
+def generate_dna_sequence(size, valid_chars='ATCG'):
+    return [''.join(random.choice(valid_chars) for _ in range(size)) for _ in range(size)]
+
+def test_regex_engine_is_registered():
+    assert get_engine("regex") is detect
+
+def test_build_lines_matches_reference_lines():
+    random.seed(8)
+    for size in range(4, 10):
+        dna = generate_dna_sequence(size)
+        columns = [''.join(column) for column in zip(*dna)]
+        expected = dna + columns + [diagonal for diagonal in extract_diagonals(dna) if len(diagonal) >= 4]
+        lines = [line.decode('ascii') for line in build_lines(''.join(dna).encode('ascii'), size)]
+        assert sorted(lines) == sorted(expected)
+
+def test_locate_runs_reports_start_cells():
+    dna = ["AAAACCCC", "AGTCTGGA", "ACCCGGAA", "CGAACGCG",
+           "CAGCTAGA", "TCTTGGGA", "TGGCTGCG", "CGTTATTT"]
+    flat = ''.join(dna).encode('ascii')
+    assert locate_runs(flat, 8) == [("H", 0, 0)]
+    assert locate_runs(flat, 8, limit=1) == [("H", 0, 0)]
+
+    dna = ["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"]
+    assert locate_runs(''.join(dna).encode('ascii'), 6) == [("H", 4, 0), ("V", 0, 4)]
+
+    random.seed(21)
+    steps = {"H": (0, 1), "V": (1, 0), "D": (1, 1), "A": (1, -1)}
+    for size in range(1, 12):
+        for _ in range(100):
+            dna = generate_dna_sequence(size, valid_chars=random.choice(['ATCG', 'AT']))
+            runs = locate_runs(''.join(dna).encode('ascii'), size, limit=size * 6)
+            for direction, row, column in runs:
+                di, dj = steps[direction]
+                assert len({dna[row + k * di][column + k * dj] for k in range(4)}) == 1
+            assert (len(runs) > 1) is is_mutant(dna, engine="python"), f"Mismatch for DNA: {dna}"
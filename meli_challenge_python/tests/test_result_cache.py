@@ -0,0 +1,73 @@
+import pytest
+import sys
+import os
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import result_cache
+from result_cache import ResultCache
+
+def test_evicts_least_recently_used():
+    cache = ResultCache(max_entries=3)
+    for key in "abc":
+        cache.put(key, key.upper())
+    assert cache.get("a") == "A"
+    cache.put("d", "D")
+    assert cache.get("b") is None
+    assert [cache.get(key) for key in "acd"] == ["A", "C", "D"]
+    metrics = cache.metrics()
+    assert metrics['entries'] == 3 and metrics['evictions'] == 1
+    assert (metrics['hits'], metrics['misses']) == (4, 1) and metrics['hit_rate'] == 0.8
+
+def test_bounds_memory_in_use():
+    cache = ResultCache(max_entries=100, max_bytes=3 * (result_cache.ENTRY_OVERHEAD + 1000))
+    for key in range(10):
+        cache.put(key, None, size=1000 - sys.getsizeof(key))
+    assert len(cache) == 3 and cache.metrics()['bytes'] <= cache.max_bytes
+    assert cache.metrics()['evictions'] == 7
+    # Too large to ever fit: not cached, nothing evicted for it
+    cache.put("huge", None, size=cache.max_bytes)
+    assert cache.get("huge") is None and len(cache) == 3
+
+def test_replacing_an_entry_keeps_the_memory_count():
+    cache = ResultCache()
+    cache.put("a", None, size=100)
+    cache.put("a", None, size=300)
+    assert len(cache) == 1 and cache.bytes == result_cache.ENTRY_OVERHEAD + sys.getsizeof("a") + 300
+    cache.clear()
+    assert len(cache) == 0 and cache.bytes == 0
+
+def test_entries_expire_after_ttl():
+    cache = ResultCache(ttl=0.05)
+    cache.put("a", 1)
+    assert cache.get("a") == 1
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert cache.metrics()['expirations'] == 1 and len(cache) == 0 and cache.bytes == 0
+
+def test_disabled_cache_keeps_nothing():
+    cache = ResultCache(max_entries=0)
+    cache.put("a", 1)
+    assert cache.get("a") is None and len(cache) == 0
+
+def test_concurrent_use_keeps_bounds():
+    cache = ResultCache(max_entries=50)
+
+    def use(offset):
+        for key in range(500):
+            cache.put(offset + key % 80, key)
+            cache.get(offset + (key * 7) % 80)
+
+    threads = [threading.Thread(target=use, args=(offset * 1000,)) for offset in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    metrics = cache.metrics()
+    assert metrics['entries'] == 50 and metrics['hits'] + metrics['misses'] == 2000
+    assert metrics['bytes'] == sum(entry[1] for entry in cache._entries.values())
+
+def test_rejects_negative_bounds():
+    with pytest.raises(ValueError):
+        ResultCache(max_entries=-1)
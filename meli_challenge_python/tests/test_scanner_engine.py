@@ -0,0 +1,50 @@
+import pytest
+import sys
+import os
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from dna_analysis import extract_diagonals, is_mutant
+from engines import FALLBACK_ENGINE, get_engine
+from engines.scanner_engine import detect
+
+def human_dna(size):
+    """Builds an NxN matrix without any run of four in any direction."""
+    pattern = "ATCG" * (size // 4 + 2)
+    return [pattern[(i * 2) % 4:(i * 2) % 4 + size] if i % 2 == 0 else pattern[i % 4 + 1:i % 4 + 1 + size]
+            for i in range(size)]
+
+def traced_peak(func, *args):
+    """Returns the live blocks left behind by the function's module and the peak traced bytes of a call."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    module_file = sys.modules[func.__module__].__file__
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename')
+                 if stat.traceback[0].filename == module_file)
+    return blocks, peak
+
+def test_scanner_engine_is_the_fallback():
+    assert FALLBACK_ENGINE == "scanner"
+    assert get_engine("scanner") is detect
+
+def test_scanner_engine_does_not_allocate_per_line():
+    size = 300
+    dna = human_dna(size)
+    assert is_mutant(dna, engine="python") is False
+    flat = ''.join(dna).encode('ascii')
+
+    blocks, peak = traced_peak(detect, flat, size)
+    # Only the O(N) run counters are allocated, nothing survives the call
+    assert blocks == 0
+    assert peak < 16 * size + 4096
+
+    # Building every diagonal as a string costs O(N^2)
+    _, diagonals_peak = traced_peak(extract_diagonals, dna)
+    assert diagonals_peak > size * size
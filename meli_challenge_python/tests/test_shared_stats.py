@@ -0,0 +1,83 @@
+import pytest
+import sys
+import os
+import sqlite3
+import threading
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+shared_stats = pytest.importorskip("shared_stats")
+import dna_analysis
+from dna_analysis import (
+    analyze_dna, get_shared_stats, get_stats, init_db, reconcile_shared_stats, record_dna_analysis
+)
+from shared_stats import SharedStats
+
+@pytest.fixture
+def stats():
+    stats = SharedStats(f"dna_stats_test_{uuid.uuid4().hex[:8]}")
+    yield stats
+    stats.close(unlink=True)
+
+@pytest.fixture
+def shared_database(tmp_database, monkeypatch):
+    monkeypatch.setattr(dna_analysis, "SHARED_STATS", True)
+    init_db()
+    return tmp_database
+
+def test_attaches_to_the_same_segment(stats):
+    assert stats.created and stats.read() == (0, 0, 0)
+    other = SharedStats(stats.name)
+    assert not other.created
+    with stats.locked():
+        stats.add(2, 3, 7)
+    assert other.read() == (2, 3, 7)
+    other.close()
+
+def test_concurrent_adds_are_not_lost(stats):
+    def add_many():
+        for _ in range(500):
+            with stats.locked():
+                stats.add(1, 2, 0)
+
+    threads = [threading.Thread(target=add_many) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert stats.read()[:2] == (2000, 4000)
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs fork()")
+def test_adds_from_forked_processes(stats):
+    children = []
+    for _ in range(3):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                for _ in range(200):
+                    with stats.locked():
+                        stats.add(1, 1, 0)
+            finally:
+                os._exit(0)
+        children.append(pid)
+    for pid in children:
+        assert os.waitpid(pid, 0)[1] == 0
+    assert stats.read()[:2] == (600, 600)
+
+def test_records_update_the_shared_counters(shared_database):
+    record_dna_analysis(["AAAA", "CCCC", "TTAT", "AGAC"], analyze_dna(["AAAA", "CCCC", "TTAT", "AGAC"]))
+    record_dna_analysis(["ATGC", "CAGT", "TTAT", "AGAC"], analyze_dna(["ATGC", "CAGT", "TTAT", "AGAC"]))
+    # Duplicates are not counted twice
+    record_dna_analysis(["ATGC", "CAGT", "TTAT", "AGAC"], analyze_dna(["ATGC", "CAGT", "TTAT", "AGAC"]))
+    mutant_count, human_count, version = get_stats()
+    assert (mutant_count, human_count) == (1, 1)
+    assert get_stats() == dna_analysis.read_stats(sqlite3.connect(shared_database))
+
+def test_reconcile_corrects_drift(shared_database):
+    shared = get_shared_stats()
+    # A write from a process with shared stats disabled
+    record_dna_analysis(["ATGC", "CAGT", "TTAT", "AGAC"], analyze_dna(["ATGC", "CAGT", "TTAT", "AGAC"]))
+    with shared.locked():
+        shared.set(5, 5, 0)
+    reconcile_shared_stats()
+    assert get_stats()[:2] == (0, 1)
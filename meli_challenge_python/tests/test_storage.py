@@ -0,0 +1,234 @@
+import pytest
+import sys
+import os
+import random
+import sqlite3
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import dna_analysis
+from dna_analysis import analyze_dna, init_db, lookup_metrics, lookup_or_analyze_dna, record_dna_analysis
+import storage
+from storage import (
+    INVERSE_SYMMETRY, apply_symmetry, canonical_digest, canonical_form, canonical_symmetry, dna_digest, install_stats, main, migrate, pack_dna, read_stats, repair_stats, unpack_dna, uses_packed_format
+)
+
+LEGACY_SCHEMA = '''
+    CREATE TABLE dna_records (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        dna TEXT NOT NULL UNIQUE,
+        is_mutant BOOLEAN NOT NULL,
+        detected_at DATETIME NOT NULL,
+        sequences_discovered TEXT
+    )
+'''
+
+def generate_dna_sequence(size, valid_chars='ATCG'):
+    return [''.join(random.choice(valid_chars) for _ in range(size)) for _ in range(size)]
+
+def create_legacy_db(path, tables):
+    conn = sqlite3.connect(path)
+    conn.execute(LEGACY_SCHEMA)
+    for dna in tables:
+        mutant = analyze_dna(dna).is_mutant
+        conn.execute(
+            'INSERT OR IGNORE INTO dna_records (dna, is_mutant, detected_at, sequences_discovered) VALUES (?, ?, ?, ?)',
+            (''.join(dna), mutant, '2024-11-26 12:00:00', str(dna_analysis.extract_diagonals(dna)) if mutant else None)
+        )
+    conn.commit()
+    conn.close()
+
+def test_pack_round_trip():
+    random.seed(13)
+    for size in range(0, 12):
+        dna = generate_dna_sequence(size)
+        flat = ''.join(dna).encode('ascii')
+        blob = pack_dna(flat, size)
+        assert len(blob) == 4 + (size * size + 3) // 4
+        assert unpack_dna(blob) == dna
+    assert pack_dna(b"ACGT" * 4, 4) == bytes([4, 0, 0, 0]) + bytes([0b00011011] * 4)
+    assert unpack_dna(pack_dna(b"T" * 9, 3)) == ["TTT"] * 3
+
+def test_digest_is_fixed_size():
+    assert len(dna_digest(b"ATGC" * 4)) == 16
+    assert dna_digest(b"ATGC" * 4) != dna_digest(b"ATGA" * 4)
+
+def test_symmetries_are_undone_by_their_inverse():
+    flat = b"ATGCCAGTTTATAGAC"
+    forms = [apply_symmetry(flat, 4, symmetry) for symmetry in range(8)]
+    assert len(set(forms)) == 8
+    for symmetry, form in enumerate(forms):
+        assert apply_symmetry(form, 4, INVERSE_SYMMETRY[symmetry]) == flat
+    form, symmetry = canonical_symmetry(flat, 4)
+    assert form == min(forms) == forms[symmetry]
+
+def test_canonical_form_is_shared_by_symmetric_tables():
+    rows = ["GTCA", "CAGT", "TTAT", "AGAC"]
+    variants = []
+    for table in (rows, [''.join(row[column] for row in rows) for column in range(4)]):
+        for flipped in (table, table[::-1]):
+            variants += [flipped, [row[::-1] for row in flipped]]
+    forms = {''.join(variant).encode('ascii') for variant in variants}
+    assert len(forms) == 8
+    assert {canonical_form(form, 4) for form in forms} == {min(forms)}
+    assert len({canonical_digest(form, 4) for form in forms}) == 1
+    assert canonical_digest(b"ATGCCAGTTTATAGAC", 4) != canonical_digest(b"ATGCCAGTTTATAGAA", 4)
+
+def test_init_db_creates_packed_table(tmp_database):
+    init_db()
+    dna = ["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"]
+    record_dna_analysis(dna, analyze_dna(dna))
+    record_dna_analysis(dna, analyze_dna(dna))
+
+    conn = sqlite3.connect(tmp_database)
+    assert uses_packed_format(conn)
+    rows = conn.execute('SELECT dna_digest, dna_packed, is_mutant, sequences_discovered FROM dna_records').fetchall()
+    conn.close()
+    flat = ''.join(dna).encode('ascii')
+    assert rows == [(canonical_digest(flat, 6), pack_dna(flat, 6), 1, "H4,0;V0,4")]
+    assert unpack_dna(rows[0][1]) == dna
+
+def test_migrate_in_chunks(tmp_database, monkeypatch):
+    random.seed(31)
+    path = tmp_database
+    tables = [generate_dna_sequence(random.choice([4, 6, 9]), 'ATCG' if i % 2 else 'AT') for i in range(250)]
+    create_legacy_db(path, tables)
+    conn = sqlite3.connect(path)
+    legacy = conn.execute('SELECT id, dna, is_mutant, detected_at FROM dna_records ORDER BY id').fetchall()
+    conn.close()
+
+    assert migrate(path, chunk_size=16) == len(legacy)
+    assert migrate(path, chunk_size=16) == 0
+
+    conn = sqlite3.connect(path)
+    assert uses_packed_format(conn)
+    tables_left = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    migrated = conn.execute(
+        'SELECT id, dna_digest, dna_packed, is_mutant, detected_at, sequences_discovered FROM dna_records ORDER BY id'
+    ).fetchall()
+    conn.close()
+    assert 'dna_records_legacy' not in tables_left and 'dna_records_packed' not in tables_left
+    assert len(migrated) == len(legacy)
+    for (record_id, text, mutant, detected_at), row in zip(legacy, migrated):
+        dna = unpack_dna(row[2])
+        assert (row[0], ''.join(dna), row[3], row[4]) == (record_id, text, mutant, detected_at)
+        assert row[1] == dna_digest(text.encode('ascii'))
+        assert row[5] == analyze_dna(dna).sequences_discovered() if mutant else row[5] is None
+
+    # Writers that detected the former layout switch to the packed one
+    monkeypatch.setitem(dna_analysis._packed_storage, path, False)
+    dna = ["AAAAT", "CCCCT", "GTAGT", "TAGTA", "GTAGC"]
+    record_dna_analysis(dna, analyze_dna(dna))
+    conn = sqlite3.connect(path)
+    assert conn.execute('SELECT COUNT(*) FROM dna_records').fetchone()[0] == len(legacy) + 1
+    conn.close()
+
+def test_lookup_answers_recorded_dna(tmp_database, monkeypatch):
+    init_db()
+    dna = ["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"]
+    before = lookup_metrics()
+    analysis, known = lookup_or_analyze_dna(dna)
+    assert not known and analysis.is_mutant
+    record_dna_analysis(dna, analysis)
+
+    # Detection is not run again for a recorded table
+    monkeypatch.setattr(dna_analysis, "_analyze_encoded", None)
+    analysis, known = lookup_or_analyze_dna(dna)
+    assert known and analysis.is_mutant and analysis.sequences_discovered() == "H4,0;V0,4"
+    after = lookup_metrics()
+    assert (after['hits'] - before['hits'], after['misses'] - before['misses']) == (1, 1)
+
+def test_lookup_finds_symmetric_and_exact_form_records(tmp_database, monkeypatch):
+    init_db()
+    dna = ["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"]
+    record_dna_analysis(dna, analyze_dna(dna))
+    analysis, known = lookup_or_analyze_dna([row[::-1] for row in dna])
+    assert known and analysis.is_mutant
+    # Another mirror image is not recorded again
+    record_dna_analysis(dna[::-1], analyze_dna(dna[::-1]))
+    conn = sqlite3.connect(tmp_database)
+    assert conn.execute('SELECT COUNT(*) FROM dna_records').fetchone()[0] == 1
+    conn.close()
+
+    # Records deduplicated by their exact form stay distinct and are still found
+    monkeypatch.setattr(dna_analysis, "CANONICAL_STORAGE", False)
+    human = ["ATGC", "CAGT", "TTAT", "AGAC"]
+    record_dna_analysis(human, analyze_dna(human))
+    record_dna_analysis(human[::-1], analyze_dna(human[::-1]))
+    monkeypatch.setattr(dna_analysis, "CANONICAL_STORAGE", True)
+    assert lookup_or_analyze_dna(human[::-1])[1]
+    conn = sqlite3.connect(tmp_database)
+    assert conn.execute('SELECT COUNT(*) FROM dna_records').fetchone()[0] == 3
+    conn.close()
+
+def test_lookup_in_former_layout(tmp_database):
+    dna = ["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"]
+    create_legacy_db(tmp_database, [dna])
+    # Runs recorded in the former format are not restored
+    analysis, known = lookup_or_analyze_dna(dna)
+    assert known and analysis.is_mutant and analysis.runs == []
+    analysis, known = lookup_or_analyze_dna(["ATGC", "CAGT", "TTAT", "AGAC"])
+    assert not known and not analysis.is_mutant
+
+def test_migrate_resumes_and_keeps_legacy(tmp_path, capsys):
+    random.seed(5)
+    path = str(tmp_path / 'dna_records.db')
+    create_legacy_db(path, [generate_dna_sequence(6) for _ in range(40)])
+    # A migration interrupted after its first chunk
+    conn = sqlite3.connect(path)
+    conn.execute(storage.PACKED_SCHEMA.format(table=storage.MIGRATION_TABLE))
+    assert storage._copy_after(conn, 0, 7) == (7, 7)
+    conn.commit()
+    conn.close()
+
+    main(['migrate', path, '--chunk-size', '7', '--keep-legacy', '--vacuum'])
+    assert capsys.readouterr().out.strip() == "33 DNA records migrated"
+    conn = sqlite3.connect(path)
+    assert conn.execute('SELECT COUNT(*) FROM dna_records').fetchone()[0] == 40
+    assert conn.execute('SELECT COUNT(*) FROM dna_records_legacy').fetchone()[0] == 40
+    conn.close()
+
+def test_stats_count_only_new_records(tmp_database):
+    init_db()
+    conn = sqlite3.connect(tmp_database, isolation_level=None)
+    assert read_stats(conn) == (0, 0, 1)
+
+    mutant = ["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"]
+    human = ["ATGCGA", "CAGTGC", "TTATTT", "AGACGG", "GCGTCA", "TCACTG"]
+    for dna in (mutant, human, mutant, mutant):
+        record_dna_analysis(dna, analyze_dna(dna))
+    assert read_stats(conn) == (1, 1, 3)
+
+    conn.execute("DELETE FROM dna_records WHERE is_mutant = 0")
+    assert read_stats(conn) == (1, 0, 4)
+
+    # Counters that drifted (e.g. rows written with the triggers missing) are rebuilt
+    conn.execute("UPDATE dna_stats SET mutant_count = 42")
+    assert repair_stats(conn) == (1, 0, 5)
+    conn.close()
+
+def test_stats_survive_migration_and_repair_command(tmp_path, capsys):
+    random.seed(17)
+    path = str(tmp_path / 'dna_records.db')
+    tables = [generate_dna_sequence(6) for _ in range(60)]
+    create_legacy_db(path, tables)
+    conn = sqlite3.connect(path, isolation_level=None)
+    install_stats(conn)
+    mutant_count, human_count, _ = read_stats(conn)
+    assert mutant_count + human_count == 60
+    conn.close()
+
+    migrate(path, chunk_size=8)
+    conn = sqlite3.connect(path, isolation_level=None)
+    assert read_stats(conn)[:2] == (mutant_count, human_count)
+    dna = ["AAAAT", "CCCCT", "GTAGT", "TAGTA", "GTAGC"]
+    flat = ''.join(dna).encode('ascii')
+    conn.execute(
+        'INSERT INTO dna_records (dna_digest, dna_packed, is_mutant, detected_at) VALUES (?, ?, 1, ?)',
+        (dna_digest(flat), pack_dna(flat, 5), '2024-11-26 12:00:00')
+    )
+    assert read_stats(conn)[:2] == (mutant_count + 1, human_count)
+    conn.execute("DELETE FROM dna_stats")
+    conn.close()
+
+    main(['repair-stats', path])
+    assert capsys.readouterr().out.startswith(f"DNA stats rebuilt: {mutant_count + 1} mutant, {human_count} human")
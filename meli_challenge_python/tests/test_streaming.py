@@ -0,0 +1,56 @@
+import pytest
+import sys
+import os
+import random
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from dna_analysis import is_mutant
+from streaming import StreamingDetector
+
+def generate_dna_sequence(size, valid_chars='ATCG'):
+    return [''.join(random.choice(valid_chars) for _ in range(size)) for _ in range(size)]
+
+def stream(dna):
+    detector = StreamingDetector()
+    for row in dna:
+        detector.feed(row)
+    return detector.result()
+
+def test_streaming_known_cases():
+    assert stream(["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"]) is True
+    assert stream(["ATGCGA", "CAGTGC", "TTATTT", "AGACGG", "GCGTCA", "TCACTG"]) is False
+
+def test_streaming_decides_before_last_row():
+    detector = StreamingDetector()
+    assert detector.feed("AAAAGT") is False
+    assert detector.feed("CCCCTA") is True
+    assert detector.rows_fed == 2
+
+def test_streaming_matches_reference():
+    random.seed(555)
+    for size in range(1, 13):
+        for _ in range(200):
+            dna = generate_dna_sequence(size, valid_chars=random.choice(['ATCG', 'AT', 'ATC']))
+            assert stream(dna) is is_mutant(dna, engine="python"), f"Mismatch for DNA: {dna}"
+
+def test_streaming_validation():
+    with pytest.raises(ValueError, match="DNA must be a list of strings."):
+        StreamingDetector().result()
+    with pytest.raises(ValueError, match="DNA must be a list of strings."):
+        StreamingDetector().feed(123456)
+
+    detector = StreamingDetector()
+    detector.feed("ATGC")
+    with pytest.raises(ValueError, match="DNA must be a square matrix of NxN."):
+        detector.feed("ATG")
+    with pytest.raises(ValueError, match="DNA must be a square matrix of NxN."):
+        detector.result()
+
+    detector = StreamingDetector()
+    for row in ["ATGC", "CAGT", "TTAT", "AGAA"]:
+        detector.feed(row)
+    with pytest.raises(ValueError, match="DNA must be a square matrix of NxN."):
+        detector.feed("ATGC")
+
+    with pytest.raises(ValueError, match="DNA can only contain characters A, T, C, G."):
+        StreamingDetector().feed("ATXC")
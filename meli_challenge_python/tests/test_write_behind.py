@@ -0,0 +1,119 @@
+import pytest
+import sys
+import os
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import write_behind
+from write_behind import WriteBehindQueue
+
+class RecordingWriter:
+    def __init__(self, delay=0.0, fail_on=None):
+        self.batches = []
+        self.delay = delay
+        self.fail_on = fail_on
+        self.lock = threading.Lock()
+
+    def __call__(self, batch):
+        time.sleep(self.delay)
+        if self.fail_on is not None and self.fail_on in batch:
+            raise RuntimeError("disk full")
+        with self.lock:
+            self.batches.append(list(batch))
+
+def test_batches_by_size_and_keeps_order():
+    writer = RecordingWriter()
+    queue = WriteBehindQueue(writer, batch_size=10, max_delay=60)
+    for item in range(35):
+        queue.put(item)
+    # Full batches are written without waiting for the time bound
+    deadline = time.monotonic() + 5
+    while sum(map(len, writer.batches)) < 30 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert writer.batches[:3] == [list(range(0, 10)), list(range(10, 20)), list(range(20, 30))]
+    assert queue.depth == 5
+
+    assert queue.flush(timeout=5)
+    assert [item for batch in writer.batches for item in batch] == list(range(35))
+    assert queue.depth == 0
+    queue.close()
+
+def test_writes_partial_batch_after_max_delay():
+    writer = RecordingWriter()
+    queue = WriteBehindQueue(writer, batch_size=100, max_delay=0.02)
+    queue.put("a")
+    queue.put("b")
+    deadline = time.monotonic() + 5
+    while not writer.batches and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert writer.batches == [["a", "b"]]
+    queue.close()
+
+def test_groups_concurrent_producers():
+    writer = RecordingWriter(delay=0.005)
+    queue = WriteBehindQueue(writer, batch_size=64, max_delay=0.01)
+
+    def produce(offset):
+        for item in range(200):
+            queue.put(offset + item)
+
+    threads = [threading.Thread(target=produce, args=(offset * 1000,)) for offset in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert queue.flush(timeout=10)
+    written = [item for batch in writer.batches for item in batch]
+    assert sorted(written) == sorted(offset * 1000 + item for offset in range(4) for item in range(200))
+    # Far fewer transactions than records
+    assert len(writer.batches) < 100
+    metrics = queue.metrics()
+    assert metrics['records'] == 800 and metrics['depth'] == 0 and metrics['errors'] == 0
+    assert 0 < metrics['last_flush_seconds'] <= metrics['max_flush_seconds']
+    queue.close()
+
+def test_close_flushes_and_rejects_new_items():
+    writer = RecordingWriter()
+    queue = WriteBehindQueue(writer, batch_size=100, max_delay=60)
+    for item in range(5):
+        queue.put(item)
+    queue.close(timeout=5)
+    assert writer.batches == [list(range(5))]
+    with pytest.raises(RuntimeError, match="closed"):
+        queue.put(5)
+
+def test_failed_batch_is_kept_and_retried(monkeypatch):
+    monkeypatch.setattr(write_behind, 'RETRY_DELAY', 0.01)
+    writer = RecordingWriter(fail_on=3)
+    queue = WriteBehindQueue(writer, batch_size=4, max_delay=60)
+    for item in range(8):
+        queue.put(item)
+    # The failure is reported instead of being waited out
+    assert not queue.flush(timeout=5)
+    metrics = queue.metrics()
+    assert metrics['errors'] >= 1 and metrics['records'] == 0 and metrics['depth'] == 8
+    assert metrics['retry_seconds'] > 0
+
+    # Once the writer recovers the batch is written first, nothing lost or reordered
+    writer.fail_on = None
+    deadline = time.monotonic() + 5
+    while queue.depth and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert queue.flush(timeout=5)
+    assert writer.batches == [[0, 1, 2, 3], [4, 5, 6, 7]]
+    assert queue.metrics()['records'] == 8 and queue.metrics()['retry_seconds'] == 0
+    queue.close()
+
+def test_close_gives_up_on_a_failing_writer_after_timeout():
+    writer = RecordingWriter(fail_on=0)
+    queue = WriteBehindQueue(writer, batch_size=4, max_delay=60)
+    queue.put(0)
+    start = time.monotonic()
+    queue.close(timeout=0.2)
+    assert time.monotonic() - start < 2
+    assert queue.depth == 1 and writer.batches == []
+
+def test_rejects_empty_batches():
+    with pytest.raises(ValueError):
+        WriteBehindQueue(RecordingWriter(), batch_size=0)